@@ -0,0 +1,40 @@
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sound_wizard.utils import fft as fft_engine
+
+# python benchmarks/bench_fft.py
+# compares the engine with np.fft, the ratio column is engine time / numpy time
+
+SIZES = [256, 1000, 1024, 4096, 44100, 65536, 1 << 20]
+
+def best_of(func, repeat=5):
+    number = max(1, int(0.2 / max(1e-7, timeit.timeit(func, number=1))))
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'n':>9} {'op':>6} {'engine ms':>10} {'numpy ms':>10} {'ratio':>7} {'max err':>9}")
+
+    for n in SIZES:
+        x = rng.standard_normal(n)
+        cases = [
+            ("fft", fft_engine.fft, np.fft.fft),
+            ("rfft", fft_engine.rfft, np.fft.rfft),
+            ("ifft", fft_engine.ifft, np.fft.ifft),
+        ]
+        for name, ours, theirs in cases:
+            # warm the plan caches first
+            error = np.abs(ours(x) - theirs(x)).max()
+            ours_time = best_of(lambda: ours(x))
+            theirs_time = best_of(lambda: theirs(x))
+            print(f"{n:>9} {name:>6} {ours_time * 1e3:>10.3f} {theirs_time * 1e3:>10.3f} "
+                  f"{ours_time / theirs_time:>7.1f} {error:>9.1e}")
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,11 @@ setup(
     packages=find_packages(),
     python_requires=">=3.7",
     install_requires=[
-        
+        "numpy",
     ],
+    entry_points={
+        "console_scripts": [
+            "sound-wizard=sound_wizard.cli:main",
+        ],
+    },
 )
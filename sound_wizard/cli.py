@@ -0,0 +1,290 @@
+import argparse
+import concurrent.futures
+import glob
+import json
+import os
+import sys
+import time
+
+# sound-wizard batch "recordings/*.wav" -o rendered --effect gain:db=-3 --effect fade:in=0.5,out=2 --rate 48000 --workers 8
+#
+# an effect is name:key=value,key=value, the chain runs in the order given
+#   gain:db=-3 (or factor=0.5)
+#   fade:in=0.5,out=1.0,shape=linear|equal_power|exponential|s_curve (seconds)
+#   delay:time=0.25,feedback=0.4,mix=0.3,ping_pong=1,depth=0.002,rate=0.5 (seconds, Hz)
+#   eq:filter=peaking,freq=3000,q=1.5,db=-4 (one band, filter=lowpass|highpass|bandpass|notch|allpass|peaking|
+#      lowshelf|highshelf, order=4 for steeper low / high passes), in --chain also "bands": [{...}, ...]
+#   compressor:threshold=-18,ratio=3,attack=0.005,release=0.15,knee=6,makeup=2 (dB, seconds)
+#   expander:threshold=-50,ratio=4,range=20 (takes the compressor's keys, range limits the reduction)
+#   limiter:ceiling=-1,lookahead=0.005,release=0.05 (dB, seconds)
+# --chain takes the same as a JSON list: [{"type": "gain", "db": -3}, {"type": "fade", "in": 0.5}]
+#
+# sound-wizard mix drums.wav bass.wav:gain=-3,pan=-0.3 vocals.wav:offset=12.5 -o mix.wav
+#
+# a track is path:key=value,... with gain (dB), pan (-1 .. 1) and offset (seconds), all optional
+
+EFFECTS = ('gain', 'fade', 'delay', 'eq', 'compressor', 'expander', 'limiter')
+
+def parse_params(spec, params, reserved=()):
+    """ 'key=value,key=value' -> dict, numbers become floats """
+    parsed = {}
+    for item in filter(None, params.split(',')):
+        key, sep, value = item.partition('=')
+        if not sep or key.strip() in reserved:
+            raise ValueError(f"Expected key=value in '{spec}', got '{item}'")
+        try:
+            parsed[key.strip()] = float(value)
+        except ValueError:
+            parsed[key.strip()] = value.strip()
+    return parsed
+
+def parse_bool(value, name):
+    """ true/false, yes/no, on/off or 1/0 (parse_params has made the numbers floats already) """
+    text = str(value).strip().lower()
+    if text in ('true', 'yes', 'on', '1', '1.0'):
+        return True
+    if text in ('false', 'no', 'off', '0', '0.0'):
+        return False
+    raise ValueError(f"{name} must be true/false, yes/no, on/off or 1/0, got '{value}'")
+
+def parse_effect(spec):
+    """ 'gain:db=-3' -> {'type': 'gain', 'db': -3.0} """
+    name, _, params = spec.partition(':')
+    effect = {'type': name.strip().lower()}
+    effect.update(parse_params(spec, params, reserved=('type',)))
+    if effect['type'] not in EFFECTS:
+        raise ValueError(f"Unknown effect '{effect['type']}', expected one of {EFFECTS}")
+    return effect
+
+def parse_track(spec):
+    """ 'bass.wav:gain=-3,pan=-0.3' -> ('bass.wav', {'gain': -3.0, 'pan': -0.3}) """
+    # split at the last ':' only when key=value follows, paths can have colons too
+    path, sep, params = spec.rpartition(':')
+    if not sep or '=' not in params:
+        return spec, {}
+    return path, parse_params(spec, params)
+
+def build_chain(effects, info, block_size):
+    """ Turn effect configs into an EffectChain for one file (fades and delays need its length / rate) """
+    from .effects.chain import EffectChain
+    from .effects.delay import DELAY, FADE
+    from .effects.dynamics import COMPRESSOR, LIMITER
+    from .effects.eq import EQ
+    from .effects.gain import GAIN
+    from .utils.filters import BUTTERWORTH_Q
+
+    sample_rate = info['sample_rate']
+    chain = EffectChain(block_size=block_size)
+    for config in effects:
+        kind = config['type']
+        if kind == 'gain':
+            gain = GAIN()
+            if 'db' in config:
+                gain.set_gain_db(config['db'])
+            else:
+                gain.set_gain(config.get('factor', 1.0))
+            chain.add(gain)
+        elif kind == 'fade':
+            chain.add(FADE(info['num_frames'], int(config.get('in', 0) * sample_rate),
+                           int(config.get('out', 0) * sample_rate), config.get('shape', 'linear')))
+        elif kind == 'delay':
+            chain.add(DELAY(sample_rate, delay_seconds=config.get('time', 0.25), feedback=config.get('feedback', 0.4),
+                            mix=config.get('mix', 0.5), ping_pong=parse_bool(config.get('ping_pong', 0), 'ping_pong'),
+                            mod_depth_seconds=config.get('depth', 0.0), mod_rate=config.get('rate', 0.5),
+                            channels=info['channels'], max_block=block_size))
+        elif kind == 'eq':
+            eq = EQ(sample_rate)
+            for band in config.get('bands', [config]):
+                eq.add_band(band.get('filter', 'peaking'), band['freq'], q=band.get('q', BUTTERWORTH_Q),
+                            gain_db=band.get('db', 0.0), order=int(band.get('order', 2)))
+            chain.add(eq)
+        elif kind in ('compressor', 'expander'):
+            chain.add(COMPRESSOR(sample_rate, threshold_db=config.get('threshold', -20.0),
+                                 ratio=config.get('ratio', 4.0), attack=config.get('attack', 0.01),
+                                 release=config.get('release', 0.1), knee_db=config.get('knee', 0.0),
+                                 makeup_db=config.get('makeup', 0.0), mode=kind, range_db=config.get('range')))
+        elif kind == 'limiter':
+            chain.add(LIMITER(sample_rate, ceiling_db=config.get('ceiling', -1.0),
+                              lookahead=config.get('lookahead', 0.005), release=config.get('release', 0.05)))
+        else:
+            raise ValueError(f"Unknown effect '{kind}'")
+    return chain
+
+def validate_chain(effects, paths, block_size):
+    """
+    Build the chain once for the first readable file, so a bad effect is one usage
+    error (ValueError) instead of the same failure for every file of the batch.
+    """
+    from .formats.wav_read import info_wav
+
+    for path in paths:
+        try:
+            info = info_wav(path)
+        except Exception:
+            continue # the worker reports files that can't be read
+        try:
+            build_chain(effects, info, block_size)
+        except (KeyError, TypeError, ValueError) as error:
+            detail = f"missing setting {error}" if isinstance(error, KeyError) else error
+            raise ValueError(f"Invalid effect chain: {detail}") from None
+        return
+
+def render_file(job):
+    """
+    Worker: render one file, never raises so one bad file can't stop the batch.
+    Returns (input, output, error, seconds, audio_seconds).
+    """
+    from .formats.wav_read import info_wav
+
+    source, target, effects, options = job
+    start = time.perf_counter()
+    try:
+        info = info_wav(source)
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+        chain = build_chain(effects, info, options['block_size'])
+        chain.render(source, target, options['bits'], dither=options['dither'], sample_rate=options['rate'])
+        return source, target, None, time.perf_counter() - start, info['duration']
+    except Exception as error:
+        return source, target, f"{type(error).__name__}: {error}", time.perf_counter() - start, 0.0
+
+def find_inputs(inputs, recursive):
+    """ Directories (their .wav files), glob patterns and plain files -> [(path, relative name)] """
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, '**', '*.wav') if recursive else os.path.join(item, '*.wav')
+            for path in sorted(glob.glob(pattern, recursive=recursive)):
+                found.append((path, os.path.relpath(path, item)))
+        else:
+            matches = sorted(glob.glob(item, recursive=recursive)) if glob.has_magic(item) else [item]
+            found.extend((path, os.path.basename(path)) for path in matches)
+    return found
+
+def batch(args):
+    effects = [parse_effect(spec) for spec in args.effect]
+    if args.chain:
+        with open(args.chain) as f:
+            effects = [dict(config, type=config['type'].lower()) for config in json.load(f)] + effects
+
+    files = find_inputs(args.inputs, args.recursive)
+    if not files:
+        print("No input files found", file=sys.stderr)
+        return 1
+
+    validate_chain(effects, [path for path, _ in files], args.block_size)
+
+    options = {'bits': args.bits, 'dither': 'tpdf' if args.dither else None, 'block_size': args.block_size,
+               'rate': args.rate}
+    jobs = []
+    for path, name in files:
+        stem, ext = os.path.splitext(name)
+        target = os.path.join(args.output, stem + args.suffix + (ext or '.wav'))
+        if os.path.abspath(target) == os.path.abspath(path):
+            print(f"Skipping {path}, output would overwrite the input", file=sys.stderr)
+            continue
+        jobs.append((path, target, effects, options))
+
+    workers = args.workers or os.cpu_count() or 1
+    print(f"Rendering {len(jobs)} files with {workers} workers")
+
+    start = time.perf_counter()
+    failed = 0
+    if workers == 1:
+        results = map(render_file, jobs)
+    else:
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        futures = [pool.submit(render_file, job) for job in jobs]
+        results = (future.result() for future in concurrent.futures.as_completed(futures))
+
+    try:
+        for done, (source, target, error, seconds, duration) in enumerate(results, 1):
+            if error is None:
+                speed = duration / seconds if seconds > 0 else float('inf')
+                print(f"[{done}/{len(jobs)}] {source} -> {target} {seconds:.2f}s ({speed:.1f}x realtime)")
+            else:
+                failed += 1
+                print(f"[{done}/{len(jobs)}] FAILED {source}: {error}", file=sys.stderr)
+    finally:
+        if workers != 1:
+            pool.shutdown()
+
+    print(f"Done in {time.perf_counter() - start:.2f}s, {len(jobs) - failed} ok, {failed} failed")
+    return 1 if failed else 0
+
+def mix(args):
+    from .effects.mixer import MIXER
+    from .formats.wav_read import info_wav
+    from .formats.wav_write import WAVE_FORMAT_IEEE_FLOAT, WAVE_FORMAT_PCM
+
+    bits = args.bits or (32 if args.float else 24)
+    if args.float and bits not in (32, 64):
+        raise ValueError(f"Float output is 32 or 64 bit, not {bits}")
+    if not args.float and bits == 64:
+        raise ValueError("64 bit output needs --float")
+
+    tracks = []
+    for spec in args.tracks:
+        path, params = parse_track(spec)
+        if not os.path.isfile(path):
+            raise ValueError(f"Track file not found: {path}")
+        unknown = set(params) - {'gain', 'pan', 'offset'}
+        if unknown:
+            raise ValueError(f"Unknown track settings {sorted(unknown)} for {path}, expected gain, pan, offset")
+        settings = {}
+        for name in ('gain', 'pan', 'offset'):
+            try:
+                settings[name] = float(params.get(name, 0.0))
+            except ValueError:
+                raise ValueError(f"{name} of {path} must be a number, got '{params[name]}'") from None
+        tracks.append((path, settings))
+
+    sample_rate = info_wav(tracks[0][0])['sample_rate']
+    start = time.perf_counter()
+    with MIXER(sample_rate, args.channels, args.block_size) as mixer:
+        for path, settings in tracks:
+            mixer.add_track(path, settings['gain'], settings['pan'], settings['offset'])
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        mixer.render(args.output, bits, WAVE_FORMAT_IEEE_FLOAT if args.float else WAVE_FORMAT_PCM,
+                     'tpdf' if args.dither else None)
+        duration = mixer.num_frames / sample_rate
+    print(f"Mixed {len(tracks)} tracks ({duration:.1f}s) into {args.output} in {time.perf_counter() - start:.2f}s")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="sound-wizard", description="sound_wizard command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch_parser = commands.add_parser("batch", help="render WAV files through an effect chain")
+    batch_parser.add_argument("inputs", nargs="+", help="WAV files, directories or glob patterns")
+    batch_parser.add_argument("-o", "--output", required=True, help="output directory")
+    batch_parser.add_argument("-e", "--effect", action="append", default=[],
+                              help="effect as name:key=value,... (" + ", ".join(EFFECTS) + "), can be repeated")
+    batch_parser.add_argument("--chain", help="JSON file with a list of effects")
+    batch_parser.add_argument("-j", "--workers", type=int, default=0, help="worker processes (default: all cores)")
+    batch_parser.add_argument("-r", "--recursive", action="store_true", help="search directories recursively")
+    batch_parser.add_argument("--bits", type=int, choices=(8, 16, 24, 32), help="output bit depth (default: same as input)")
+    batch_parser.add_argument("--rate", type=int, help="resample the output to this sample rate (default: same as input)")
+    batch_parser.add_argument("--dither", action="store_true", help="TPDF dither when writing PCM")
+    batch_parser.add_argument("--suffix", default="", help="added to every output file name")
+    batch_parser.add_argument("--block-size", type=int, default=65536, help="frames per processing block")
+    batch_parser.set_defaults(func=batch)
+
+    mix_parser = commands.add_parser("mix", help="mix WAV files into one")
+    mix_parser.add_argument("tracks", nargs="+", help="WAV files as path:gain=-3,pan=0.5,offset=1.5 (settings optional)")
+    mix_parser.add_argument("-o", "--output", required=True, help="output WAV file")
+    mix_parser.add_argument("--channels", type=int, default=2, help="channels of the mix (default: 2)")
+    mix_parser.add_argument("--bits", type=int, choices=(8, 16, 24, 32, 64),
+                            help="output bit depth (default: 24, 32 with --float)")
+    mix_parser.add_argument("--float", action="store_true", help="write 32 or 64 bit float samples instead of PCM")
+    mix_parser.add_argument("--dither", action="store_true", help="TPDF dither when writing PCM")
+    mix_parser.add_argument("--block-size", type=int, default=65536, help="frames per mixing block")
+    mix_parser.set_defaults(func=mix)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except ValueError as error:
+        parser.error(str(error))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import numpy as np
+
+from ..formats.wav_read import info_wav, iter_blocks
+from ..formats.wav_write import WAVE_FORMAT_PCM, WavWriter
+from ..utils.resample import RESAMPLER
+
+class EffectChain:
+    """
+    Runs a list of effects block by block over one preallocated working buffer.
+
+    Every effect follows the process(block, out=None) protocol: it reads block and
+    writes the result into out (which can be block itself) and returns it. GAIN,
+    FADE, DELAY, EQ, COMPRESSOR, LIMITER and CONVOLVER all do. Plain functions f(block) -> block work too,
+    their result is copied back into the buffer.
+
+        chain = EffectChain([GAIN(gain_factor=0.5), DELAY(48000)])
+        chain.render("in.wav", "out.wav")
+
+    A block is copied into the buffer once, every stage works on it in place and
+    the result is copied out once, so N effects do not mean N copies of the signal.
+    """
+    def __init__(self, effects=(), block_size=4096):
+        self.effects = list(effects)
+        self.block_size = block_size
+        self._buffer = np.empty(0)
+
+    def add(self, effect):
+        self.effects.append(effect)
+        return self
+
+    def _work(self, shape):
+        size = int(np.prod(shape))
+        if self._buffer.size < size:
+            self._buffer = np.empty(size)
+        return self._buffer[:size].reshape(shape)
+
+    def process(self, block, out=None):
+        block = np.asarray(block)
+        work = self._work(block.shape)
+        work[...] = block
+
+        for effect in self.effects:
+            if hasattr(effect, 'process'):
+                result = effect.process(work, out=work)
+            else:
+                result = effect(work)
+            if result is not None and result is not work:
+                work[...] = result
+
+        if out is None:
+            return work.copy() # the buffer is reused by the next block
+        out[...] = work
+        return out
+
+    @property
+    def latency(self):
+        """ Frames the output is late by, the sum of the effects' `latency` (LIMITER's look-ahead) """
+        return sum(getattr(effect, 'latency', 0) for effect in self.effects)
+
+    def _align(self):
+        # an effect behind a latency sees input frame n at its position n + latency
+        upstream = 0
+        for effect in self.effects:
+            if upstream and hasattr(effect, 'position'):
+                effect.position -= upstream
+            upstream += getattr(effect, 'latency', 0)
+
+    def render(self, input_file, output_file, bits_per_sample=None, audio_format=None, dither=None, sample_rate=None):
+        """
+        Stream a WAV file through the chain into another WAV file, the format defaults to the input's.
+        sample_rate resamples the output after the chain.
+        Latency is made up for: the first `latency` frames are dropped and silence is
+        pushed through at the end, so the output lines up with the input. Effects that
+        count frames (FADE, GAIN automation) after a latency start that many frames
+        earlier, so their positions line up with the input too.
+        """
+        info = info_wav(input_file)
+        if bits_per_sample is None:
+            bits_per_sample = info['bits_per_sample']
+            audio_format = info['audio_format'] if audio_format is None else audio_format
+        if audio_format is None:
+            audio_format = WAVE_FORMAT_PCM
+
+        resampler = None
+        if sample_rate is not None and sample_rate != info['sample_rate']:
+            resampler = RESAMPLER(info['sample_rate'], sample_rate)
+
+        self._align()
+        with WavWriter(output_file, sample_rate or info['sample_rate'], info['channels'], bits_per_sample,
+                       audio_format, dither) as writer:
+            skip = latency = self.latency
+
+            def write(block):
+                nonlocal skip
+                dropped = min(skip, block.shape[0])
+                skip -= dropped
+                block = block[dropped:]
+                writer.write(block if resampler is None else resampler.process(block))
+
+            for block in iter_blocks(input_file, self.block_size, dtype=np.float64):
+                write(self.process(block, out=block))
+            for start in range(0, latency, self.block_size):
+                write(self.process(np.zeros((min(self.block_size, latency - start), info['channels']))))
+            if resampler is not None:
+                writer.write(resampler.flush())
+        return output_file
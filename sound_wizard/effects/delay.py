@@ -1,14 +1,263 @@
+import functools
+
 import numpy as np
 
-fade_in_seconds = 2.0
-fade_out_seconds = 1.0
-fade_type = "linear"
-sample_rate = 48000
+FADE_TYPES = ('linear', 'equal_power', 'exponential', 's_curve')
+
+@functools.lru_cache(maxsize=128)
+def fade_curve(length, fade_type="linear"):
+    """
+    Fade in envelope of `length` samples going from 0 to 1 (read-only, cached).
+    A fade out is the same curve reversed.
+
+    linear: t
+    equal_power: sin(t * pi / 2), a crossfade with it keeps the power constant
+    exponential: 60 dB exponential rise, sounds linear to the ear
+    s_curve: 0.5 - 0.5 * cos(t * pi), slow at both ends
+    """
+    if length < 0:
+        raise ValueError("Fade length can't be negative")
+
+    # sampled at the middle of every sample, so curve[::-1] is the curve at 1 - t
+    # and a linear / equal power crossfade sums to exactly 1 in amplitude / power
+    t = (np.arange(length, dtype=np.float64) + 0.5) / max(1, length)
+
+    if fade_type == "linear":
+        curve = t
+    elif fade_type == "equal_power":
+        curve = np.sin(t * np.pi / 2)
+    elif fade_type == "exponential":
+        floor = 10 ** (-60 / 20)
+        curve = (floor ** (1 - t) - floor) / (1 - floor)
+    elif fade_type == "s_curve":
+        curve = 0.5 - 0.5 * np.cos(t * np.pi)
+    else:
+        raise ValueError(f"Unknown fade type: {fade_type}, expected one of {FADE_TYPES}")
+
+    curve.setflags(write=False)
+    return curve
+
+def _apply(samples, start, curve):
+    # multiply samples[start:start + len(curve)] by curve in place, clipped to the samples
+    stop = min(samples.shape[0], start + len(curve))
+    if stop <= max(0, start):
+        return
+    segment = curve[max(0, -start):stop - start]
+    if samples.ndim == 2:
+        segment = segment[:, np.newaxis]
+    samples[max(0, start):stop] *= segment
 
 def fade(samples, num_channels, fade_in_seconds, fade_out_seconds, fade_type, sample_rate):
-    samples = np.array(samples)
-    fade_in_samples = fade_in_seconds * sample_rate
-    print(samples[:fade_in_samples] * np.linspace(0, 1, fade_in_samples))
-    # print(np.linspace(0, 1, fade_in_samples))
-    
-fade([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14], 1, 3, 1, "linear", 44100)
\ No newline at end of file
+    """
+    Fade in the start and fade out the end of samples, in place when samples is a float array.
+    samples: (frames, channels) or 1-D mono, num_channels is kept for the old signature.
+    Returns the faded samples.
+    """
+    samples = np.asarray(samples) if isinstance(samples, np.ndarray) else np.array(samples, dtype=np.float64)
+    if not np.issubdtype(samples.dtype, np.floating):
+        samples = samples.astype(np.float64)
+
+    fade_in_samples = min(samples.shape[0], int(round(fade_in_seconds * sample_rate)))
+    fade_out_samples = min(samples.shape[0], int(round(fade_out_seconds * sample_rate)))
+
+    _apply(samples, 0, fade_curve(fade_in_samples, fade_type))
+    _apply(samples, samples.shape[0] - fade_out_samples, fade_curve(fade_out_samples, fade_type)[::-1])
+    return samples
+
+def crossfade(outgoing, incoming, length, fade_type="equal_power", out=None):
+    """
+    Join two clips, the last `length` frames of outgoing overlap the first `length` of incoming.
+    Returns len(outgoing) + len(incoming) - length frames (written into out if given).
+    """
+    outgoing = np.asarray(outgoing)
+    incoming = np.asarray(incoming)
+    if length > min(outgoing.shape[0], incoming.shape[0]):
+        raise ValueError("Crossfade is longer than one of the clips")
+
+    total = outgoing.shape[0] + incoming.shape[0] - length
+    if out is None:
+        out = np.empty((total,) + outgoing.shape[1:], dtype=np.result_type(outgoing.dtype, incoming.dtype, np.float32))
+
+    split = outgoing.shape[0] - length
+    out[:split] = outgoing[:split]
+    out[outgoing.shape[0]:] = incoming[length:]
+
+    curve = fade_curve(length, fade_type)
+    overlap = out[split:outgoing.shape[0]]
+    overlap[...] = incoming[:length]
+    _apply(overlap, 0, curve)
+    tail = outgoing[split:] * (curve[::-1][:, np.newaxis] if outgoing.ndim == 2 else curve[::-1])
+    overlap += tail
+    return out
+
+class FADE:
+    """
+    Fade in / fade out applied block by block to a stream of known length.
+
+        fader = FADE(total_frames, fade_in_frames=4800, fade_out_frames=48000)
+        for block in blocks:
+            fader.process_block(block, out=block)
+
+    Only the blocks that overlap a fade are touched.
+    """
+    def __init__(self, total_frames, fade_in_frames=0, fade_out_frames=0, fade_type="linear"):
+        self.total_frames = total_frames
+        self.fade_in = fade_curve(min(fade_in_frames, total_frames), fade_type)
+        self.fade_out = fade_curve(min(fade_out_frames, total_frames), fade_type)[::-1]
+        self.position = 0
+
+    def process_block(self, block, out=None):
+        if out is None:
+            out = np.array(block, dtype=np.result_type(np.asarray(block).dtype, np.float32))
+        elif out is not block:
+            out[...] = block
+
+        start = self.position
+        self.position += out.shape[0]
+
+        _apply(out, -start, self.fade_in)
+        _apply(out, self.total_frames - len(self.fade_out) - start, self.fade_out)
+        return out
+
+    process = process_block
+
+class DELAY:
+    """
+    Multichannel feedback delay on a preallocated ring buffer.
+
+    delay_seconds: delay time, mod_depth_seconds / mod_rate modulate it with a sine
+                   (chorus / tape wobble), fractional delays are read with linear interpolation
+    feedback: amount of the delayed signal fed back into the buffer
+    mix: 0 dry .. 1 wet
+    ping_pong: the feedback of every channel goes into the next one (L -> R -> L for stereo)
+
+    process(block, out=None) takes (frames, channels) or 1-D blocks of any size and
+    keeps the buffer and LFO phase between calls. Work is done in vectorized chunks
+    of the shortest delay in the block (nothing in a chunk can read what the same
+    chunk writes), scratch space is allocated once and only grows for bigger blocks.
+    """
+    def __init__(self, sample_rate, delay_seconds=0.25, feedback=0.4, mix=0.5, ping_pong=False,
+                 mod_depth_seconds=0.0, mod_rate=0.5, max_delay_seconds=None, channels=2, max_block=4096):
+        self.sample_rate = sample_rate
+        self.delay_seconds = delay_seconds
+        self.feedback = feedback
+        self.mix = mix
+        self.ping_pong = ping_pong
+        self.mod_depth_seconds = mod_depth_seconds
+        self.mod_rate = mod_rate
+        self.channels = channels
+
+        if max_delay_seconds is None:
+            # the same sum _delays() checks against, so rounding can't put it over the bound
+            self.max_delay = delay_seconds * sample_rate + mod_depth_seconds * sample_rate
+        else:
+            self.max_delay = max_delay_seconds * sample_rate
+        self.size = int(np.ceil(self.max_delay)) + 2 # ring buffer length
+
+        self._buffer = np.zeros((self.size, channels))
+        self._allocate(max_block)
+        self.reset()
+
+    def reset(self):
+        self._buffer.fill(0.0)
+        self._written = 0 # samples written so far, the write head is _written % size
+
+    def _allocate(self, max_block):
+        self.max_block = max_block
+        self._steps = np.arange(max_block, dtype=np.float64)
+        self._read = np.empty(max_block)
+        self._index = np.empty(max_block, dtype=np.intp)
+        self._next = np.empty(max_block, dtype=np.intp)
+        self._frac = np.empty((max_block, 1))
+        self._delayed = np.empty((max_block, self.channels))
+        self._other = np.empty((max_block, self.channels))
+        self._feed = np.empty((max_block, self.channels))
+
+    def _delays(self, n):
+        """ Delay in samples for the next n samples, written into self._read """
+        delays = self._read[:n]
+        base = self.delay_seconds * self.sample_rate
+        depth = self.mod_depth_seconds * self.sample_rate
+
+        if depth > 0:
+            # LFO phase comes from the absolute sample count, so it is continuous across blocks
+            np.add(self._steps[:n], self._written, out=delays)
+            delays *= 2 * np.pi * self.mod_rate / self.sample_rate
+            np.sin(delays, out=delays)
+            delays *= depth
+            delays += base
+        else:
+            delays.fill(base)
+
+        # slack for rounding of seconds * sample_rate at the top, the buffer has 2 samples to spare
+        if base - depth < 1 or base + depth > self.max_delay + 1e-9:
+            raise ValueError(f"Delay must stay between 1 sample and max_delay ({self.max_delay:.0f} samples)")
+        return delays, max(1, int(base - depth))
+
+    def process(self, block, out=None):
+        block = np.asarray(block, dtype=np.float64)
+        mono = block.ndim == 1
+        x = block[:, np.newaxis] if mono else block
+        if x.shape[1] != self.channels:
+            raise ValueError(f"DELAY has {self.channels} channels, block has {x.shape[1]}")
+
+        n = x.shape[0]
+        if n > self.max_block:
+            self._allocate(n)
+
+        # read positions (absolute, fractional) = write position - delay
+        read, chunk = self._delays(n)
+        np.subtract(self._written, read, out=read)
+        read += self._steps[:n]
+
+        buffer = self._buffer
+        for start in range(0, n, chunk):
+            stop = min(n, start + chunk)
+            length = stop - start
+
+            index = self._index[:length]
+            following = self._next[:length]
+            frac = self._frac[:length]
+            delayed = self._delayed[start:stop]
+            other = self._other[:length]
+            feed = self._feed[:length]
+
+            # linear interpolation between buffer[index] and buffer[index + 1]
+            np.floor(read[start:stop], out=frac[:, 0])
+            index[:] = frac[:, 0]
+            np.subtract(read[start:stop, np.newaxis], frac, out=frac)
+            np.add(index, 1, out=following)
+            np.remainder(index, self.size, out=index)
+            np.remainder(following, self.size, out=following)
+
+            np.take(buffer, index, axis=0, out=delayed)
+            np.take(buffer, following, axis=0, out=other)
+            other -= delayed
+            other *= frac
+            delayed += other
+
+            # write input + feedback into the ring
+            source = delayed
+            if self.ping_pong and self.channels > 1:
+                source = other
+                source[:, 1:] = delayed[:, :-1]
+                source[:, 0] = delayed[:, -1]
+            np.multiply(source, self.feedback, out=feed)
+            feed += x[start:stop]
+
+            np.add(self._steps[:length], self._written + start, out=read[start:stop]) # read is no longer needed here
+            index[:] = read[start:stop]
+            np.remainder(index, self.size, out=index)
+            buffer[index] = feed
+
+        self._written += n
+
+        if out is None:
+            out = np.empty_like(x)
+        elif mono:
+            out = out[:, np.newaxis]
+        np.multiply(x, 1.0 - self.mix, out=out)
+        wet = self._other[:n]
+        np.multiply(self._delayed[:n], self.mix, out=wet)
+        out += wet
+        return out[:, 0] if mono else out
@@ -0,0 +1,233 @@
+import numpy as np
+
+from ..utils.filters import sosfilt
+from ..utils.math_utils import amp_to_db, db_to_amp
+
+DYNAMICS_MODES = ('compressor', 'expander')
+
+def time_coefficient(seconds, sample_rate):
+    """ One-pole coefficient that covers 1 - 1/e of a step in `seconds`, 0 (instant) for no time """
+    return float(np.exp(-1.0 / (seconds * sample_rate))) if seconds > 0 else 0.0
+
+def peak_envelope(level, coefficient, state=0.0):
+    """
+    env[n] = max(level[n], coefficient * env[n - 1]) down the first axis, env[-1] = state:
+    a peak hold with exponential release.
+
+    In the log domain the decay is a subtraction, log env[n] is the max over k <= n of
+    log level[k] + (n - k) * log coefficient, so the recursion is one cumulative max.
+    """
+    level = np.asarray(level, dtype=np.float64)
+    if coefficient <= 0:
+        return level.copy()
+
+    ramp = np.log(coefficient) * np.arange(1, len(level) + 1).reshape((-1,) + (1,) * (level.ndim - 1))
+    with np.errstate(divide='ignore'):
+        held = np.log(level)
+        start = np.log(state)
+    held -= ramp
+    np.maximum.accumulate(held, axis=0, out=held)
+    np.maximum(held, start, out=held)
+    held += ramp
+    return np.exp(held, out=held)
+
+def sliding_max(x, width):
+    """
+    max(x[i:i + width]) down the first axis for every full window, len(x) - width + 1 values.
+    O(N) whatever the width: prefix and suffix maxima of width long pieces (van Herk / Gil-Werman).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    count = len(x) - width + 1
+    if width < 1 or count < 1:
+        raise ValueError(f"Window of {width} does not fit in {len(x)} values")
+
+    pieces = -(-len(x) // width)
+    padded = np.full((pieces * width,) + x.shape[1:], -np.inf)
+    padded[:len(x)] = x
+    shaped = padded.reshape((pieces, width) + x.shape[1:])
+    prefix = np.maximum.accumulate(shaped, axis=1).reshape(padded.shape)
+    suffix = np.maximum.accumulate(shaped[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+    # a window touches at most two pieces: the end of one and the start of the next
+    return np.maximum(suffix[:count], prefix[width - 1:width - 1 + count])
+
+def gain_computer(level_db, threshold_db, ratio, knee_db=0.0, mode='compressor'):
+    """
+    Static curve: gain in dB for levels in dB.
+    compressor: above the threshold the output rises 1 / ratio dB per dB
+    expander: below the threshold the output falls ratio dB per dB
+    knee_db: the curve bends quadratically over this width around the threshold
+    """
+    if ratio < 1:
+        raise ValueError("ratio must be at least 1")
+    if mode == 'compressor':
+        slope, side = 1 / ratio - 1, 1.0
+    elif mode == 'expander':
+        slope, side = ratio - 1, -1.0
+    else:
+        raise ValueError(f"Unknown mode: {mode}, expected one of {DYNAMICS_MODES}")
+
+    over = np.asarray(level_db, dtype=np.float64) - threshold_db
+    active = np.maximum(side * over, 0.0) # dB into the side of the threshold the curve acts on
+    if knee_db > 0:
+        active = np.where(np.abs(over) < knee_db / 2, (side * over + knee_db / 2) ** 2 / (2 * knee_db), active)
+    return side * slope * active
+
+def _columns(block):
+    # (frames, channels) view of a block, 1-D is mono
+    return block[:, np.newaxis] if block.ndim == 1 else block
+
+def _detect(x, sidechain, link):
+    # level to detect on: |sidechain or x|, the loudest channel when linked
+    detect = x if sidechain is None else _columns(np.asarray(sidechain, dtype=np.float64))
+    if detect.shape[0] != x.shape[0]:
+        raise ValueError(f"Sidechain has {detect.shape[0]} frames, block has {x.shape[0]}")
+    level = np.abs(detect)
+    if link:
+        # channel by channel, a max over the short axis of every frame is far slower
+        loudest = np.zeros((len(x), 1))
+        for channel in range(level.shape[1]):
+            np.maximum(loudest[:, 0], level[:, channel], out=loudest[:, 0])
+        return loudest
+    if level.shape[1] != x.shape[1]:
+        raise ValueError(f"Unlinked sidechain needs {x.shape[1]} channels, got {level.shape[1]}")
+    return level
+
+def _apply_gain(block, x, gain, out):
+    if out is None:
+        out = np.empty(block.shape)
+    np.multiply(x, gain, out=_columns(out))
+    return out
+
+class COMPRESSOR:
+    """
+    Feed-forward compressor / downward expander with attack and release.
+
+        compressor = COMPRESSOR(48000, threshold_db=-18, ratio=3, attack=0.005, release=0.15, knee_db=6)
+        for block in blocks:
+            compressor.process(block, out=block)
+
+    threshold_db, ratio, knee_db, mode: the static curve, see gain_computer()
+    attack, release: seconds for the detector to follow a rise / fall of the level
+    makeup_db: gain added after the curve
+    range_db: most gain reduction there can be (an expander with a high ratio and a range is a gate)
+    link: one gain for all channels from the loudest one, keeps the stereo image
+
+    process(block, out=None, sidechain=None) takes (frames, channels) or 1-D blocks and
+    keeps the detector state between calls; sidechain is detected instead of the block.
+    The detector is a peak hold with exponential release (peak_envelope, a cumulative max)
+    smoothed by a one-pole attack filter run through sosfilt, and the curve works on
+    the whole block, so no Python loop runs per sample.
+    """
+    def __init__(self, sample_rate, threshold_db=-20.0, ratio=4.0, attack=0.01, release=0.1, knee_db=0.0,
+                 makeup_db=0.0, mode='compressor', range_db=None, link=True):
+        gain_computer(0.0, threshold_db, ratio, knee_db, mode) # fail early on bad settings
+        self.sample_rate = sample_rate
+        self.threshold_db = threshold_db
+        self.ratio = ratio
+        self.attack = attack
+        self.release = release
+        self.knee_db = knee_db
+        self.makeup_db = makeup_db
+        self.mode = mode
+        self.range_db = range_db
+        self.link = link
+        self.reset()
+
+    def reset(self):
+        self._held = None # peak hold, per detector channel
+        self._smoothed = None # attack filter state
+
+    def gain_db(self, level):
+        """ Gain in dB for a detector level (frames, detector channels), advances the detector state """
+        if self._held is None or self._held.shape[0] != level.shape[1]:
+            self._held = np.zeros(level.shape[1])
+            self._smoothed = np.zeros((level.shape[1], 1, 2))
+
+        held = peak_envelope(level, time_coefficient(self.release, self.sample_rate), self._held)
+        if len(held):
+            self._held = held[-1].copy()
+
+        a = time_coefficient(self.attack, self.sample_rate)
+        envelope, self._smoothed = sosfilt([1 - a, 0, 0, 1, -a, 0], held, self._smoothed)
+
+        gain = gain_computer(amp_to_db(envelope), self.threshold_db, self.ratio, self.knee_db, self.mode)
+        if self.range_db is not None:
+            np.maximum(gain, -self.range_db, out=gain)
+        return gain + self.makeup_db
+
+    def process(self, block, out=None, sidechain=None):
+        block = np.asarray(block, dtype=np.float64)
+        x = _columns(block)
+        gain = db_to_amp(self.gain_db(_detect(x, sidechain, self.link)))
+        return _apply_gain(block, x, gain, out)
+
+class LIMITER:
+    """
+    Look-ahead brickwall limiter, no output sample goes over ceiling_db.
+
+        limiter = LIMITER(48000, ceiling_db=-1, lookahead=0.005, release=0.05)
+
+    The reduction every sample needs is held over the look-ahead (sliding_max), averaged
+    over the same length so the gain ramps down smoothly, and released exponentially
+    (peak_envelope). The audio is delayed by the look-ahead, so the gain is all the way
+    down when a peak comes out: the output is `latency` frames late. EffectChain.render
+    makes up for it, flush() returns the delayed last frames of a stream.
+
+    process(block, out=None, sidechain=None) streams like COMPRESSOR.process.
+    """
+    def __init__(self, sample_rate, ceiling_db=-1.0, lookahead=0.005, release=0.05, link=True):
+        self.sample_rate = sample_rate
+        self.ceiling_db = ceiling_db
+        self.release = release
+        self.link = link
+        self.latency = int(round(lookahead * sample_rate))
+        self.reset()
+
+    def reset(self):
+        self._audio = None # last `latency` input frames
+        self._mono = False # the stream comes in 1-D blocks
+        self._reduction = None # reduction in dB of the last 2 * latency frames
+        self._held = None
+
+    def _start(self, channels, detector_channels):
+        if self._audio is None or self._audio.shape[1] != channels:
+            self._audio = np.zeros((self.latency, channels))
+        if self._reduction is None or self._reduction.shape[1] != detector_channels:
+            self._reduction = np.zeros((2 * self.latency, detector_channels))
+            self._held = np.zeros(detector_channels)
+
+    def process(self, block, out=None, sidechain=None):
+        block = np.asarray(block, dtype=np.float64)
+        x = _columns(block)
+        level = _detect(x, sidechain, self.link)
+        self._start(x.shape[1], level.shape[1])
+        self._mono = block.ndim == 1
+        frames, width = len(x), self.latency + 1
+
+        reduction = np.maximum(amp_to_db(level) - self.ceiling_db, 0.0)
+        history = np.concatenate([self._reduction, reduction])
+        self._reduction = history[frames:]
+
+        # the gain at a sample works on the audio `latency` earlier: every hold it
+        # averages covers that sample, so the average is at least its reduction
+        hold = sliding_max(history, width)
+        sums = np.zeros((len(hold) + 1, hold.shape[1]))
+        np.cumsum(hold, axis=0, out=sums[1:])
+        smooth = (sums[width:] - sums[:-width]) / width
+        np.maximum(smooth, history[self.latency:self.latency + frames], out=smooth) # rounding of the sums
+
+        reduction = peak_envelope(smooth, time_coefficient(self.release, self.sample_rate), self._held)
+        if frames:
+            self._held = reduction[-1].copy()
+
+        audio = np.concatenate([self._audio, x])
+        self._audio = audio[frames:]
+        return _apply_gain(block, audio[:frames], db_to_amp(-reduction), out)
+
+    def flush(self):
+        """ The last `latency` frames of the stream, then the limiter starts over """
+        if self._audio is None:
+            return np.zeros(0)
+        tail = self.process(np.zeros(self._audio.shape[0] if self._mono else self._audio.shape))
+        self.reset()
+        return tail
@@ -0,0 +1,140 @@
+import numpy as np
+
+from ..utils.filters import BUTTERWORTH_Q, as_sos, biquad, butterworth_q, cascade, frequency_response, sosfilt
+from ..utils.math_utils import amp_to_db
+
+def design(filter_type, frequency, sample_rate, q=BUTTERWORTH_Q, gain_db=0.0, order=2):
+    """
+    Sections of one filter: an RBJ biquad, or for lowpass / highpass with an even
+    order > 2 a Butterworth cascade of order / 2 biquads (q is ignored then).
+    """
+    if order == 2:
+        return biquad(filter_type, float(frequency), sample_rate, float(q), float(gain_db))[np.newaxis, :]
+    if filter_type not in ('lowpass', 'highpass'):
+        raise ValueError(f"Only lowpass and highpass filters take an order, not {filter_type}")
+    return cascade(*(biquad(filter_type, float(frequency), sample_rate, float(section_q))
+                     for section_q in butterworth_q(order)))
+
+class BIQUAD:
+    """
+    Cascade of second order sections with per-channel state kept across blocks.
+
+        highpass = BIQUAD.design('highpass', 80, 48000, order=4)
+        for block in blocks:
+            highpass.process(block, out=block)
+
+    process(block, out=None) takes (frames, channels) or 1-D blocks of any size. The
+    recursion runs through sosfilt's block state-space kernel, not a loop per sample.
+    The state is made for the channel count of the first block, reset() clears it.
+    """
+    def __init__(self, sos):
+        self.sos = as_sos(sos)
+        self._state = None
+
+    @classmethod
+    def design(cls, filter_type, frequency, sample_rate, q=BUTTERWORTH_Q, gain_db=0.0, order=2):
+        return cls(design(filter_type, frequency, sample_rate, q, gain_db, order))
+
+    def set_sos(self, sos):
+        """ New coefficients, the state carries over when the number of sections stays the same """
+        sos = as_sos(sos)
+        if self._state is not None and self._state.shape[1] != len(sos):
+            self._state = None
+        self.sos = sos
+
+    def reset(self):
+        self._state = None
+
+    def response(self, frequencies, sample_rate):
+        """ Magnitude response in dB at frequencies in Hz """
+        return amp_to_db(np.abs(frequency_response(self.sos, frequencies, sample_rate)))
+
+    def process(self, block, out=None):
+        block = np.asarray(block, dtype=np.float64)
+        x = block[:, np.newaxis] if block.ndim == 1 else block
+        if self._state is None or self._state.shape[0] != x.shape[1]:
+            self._state = np.zeros((x.shape[1], len(self.sos), 2))
+
+        y, self._state = sosfilt(self.sos, x, self._state)
+        y = y.reshape(block.shape)
+        if out is None:
+            return y
+        out[...] = y
+        return out
+
+class EQ:
+    """
+    Parametric EQ: bands of RBJ filters run as one cascade.
+
+        eq = EQ(48000)
+        eq.add_band('highpass', 80, order=4)
+        eq.add_band('peaking', 3000, q=1.5, gain_db=-4)
+        eq.add_band('highshelf', 10000, gain_db=2)
+        eq.process(block, out=block)
+
+    Bands can change between blocks with set_band(), the filter state carries over
+    so moving a band does not click (adding or removing one restarts the state).
+    Without bands process() passes the block through.
+    """
+    def __init__(self, sample_rate, bands=()):
+        self.sample_rate = sample_rate
+        self._bands = []
+        self._filter = None
+        for band in bands:
+            self.add_band(**band)
+
+    @property
+    def bands(self):
+        return [dict(band) for band in self._bands]
+
+    @property
+    def sos(self):
+        return None if self._filter is None else self._filter.sos
+
+    def add_band(self, filter_type, frequency, q=BUTTERWORTH_Q, gain_db=0.0, order=2):
+        """ Append a band, returns its index """
+        band = {'filter_type': filter_type, 'frequency': frequency, 'q': q, 'gain_db': gain_db, 'order': order}
+        design(**band, sample_rate=self.sample_rate) # fail before changing anything
+        self._bands.append(band)
+        self._update()
+        return len(self._bands) - 1
+
+    def set_band(self, index, **changes):
+        """ Change parameters of a band: set_band(1, gain_db=-6) """
+        band = dict(self._bands[index], **changes)
+        design(**band, sample_rate=self.sample_rate)
+        self._bands[index] = band
+        self._update()
+
+    def remove_band(self, index):
+        del self._bands[index]
+        self._update()
+
+    def _update(self):
+        if not self._bands:
+            self._filter = None
+            return
+        sos = cascade(*(design(**band, sample_rate=self.sample_rate) for band in self._bands))
+        if self._filter is None:
+            self._filter = BIQUAD(sos)
+        else:
+            self._filter.set_sos(sos)
+
+    def reset(self):
+        if self._filter is not None:
+            self._filter.reset()
+
+    def response(self, frequencies):
+        """ Magnitude response in dB at frequencies in Hz """
+        if self._filter is None:
+            return np.zeros(np.shape(frequencies))
+        return self._filter.response(frequencies, self.sample_rate)
+
+    def process(self, block, out=None):
+        if self._filter is not None:
+            return self._filter.process(block, out)
+        if out is None:
+            return np.array(block, dtype=np.float64)
+        if out is not block:
+            out[...] = block
+        return out
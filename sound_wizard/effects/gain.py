@@ -1,51 +1,135 @@
-from utils.math_utils import *
+import numpy as np
+
+from ..utils.math_utils import db_to_amp
 
 class GAIN:
-    def __init__(self, samples, gain_factor = 1.0):
-        self.samples = samples
-        self.gain_factor = gain_factor
-
-    def process(self):
-        processed = []
-
-        if len(self.samples) > 0 and isinstance(self.samples[0], list):
-
-            for frame in self.samples:
-                processed_samples = [sample * self.gain_factor for sample in frame]
-                processed.append(processed_samples)
-        else:
-            processed_samples = [sample * self.gain_factor for sample in self.samples]
-            processed.append(processed_samples)
-        
-        self.samples = processed
-
-    def get_rms(self):
-        processed = []
-        if len(self.samples) > 0 and isinstance(self.samples[0], list):
-            # [[L0, R0], [L1, R1]] -> [L0, R0, L1, R1]
-            flat_samples = []
-            for frame in samples:
-                flat_samples.extend(frame)
-            samples = flat_samples
-        else:
-            samples = self.samples
-
-        sum_of_squares = 0
-        for sample in samples:
-            sum_of_squares += sample ** 2
-        
-        mean = sum_of_squares / len(samples)
-        
-        rms = mean ** 0.5
-        
-        return rms
-    
+    """
+    Gain on numpy samples, (frames, channels) or 1-D mono.
+
+    Gain changes are ramped linearly over ramp_samples so there is no zipper
+    noise, and set_automation() takes a dB curve over time. process_block()
+    keeps the ramp / automation position between calls, so the same object can
+    run over a stream block by block.
+    """
+    def __init__(self, samples=None, gain_factor=1.0, ramp_samples=0):
+        self.samples = None if samples is None else np.array(samples, dtype=np.float64) # own copy, processed in place
+        self.ramp_samples = ramp_samples
+
+        self._target = float(gain_factor)
+        self._current = float(gain_factor) # gain right now, moves towards _target
+        self._ramp_left = 0
+        self._automation = None
+        self._position = 0 # samples processed so far, for automation
+
+    @property
+    def gain_factor(self):
+        return self._target
+
+    @gain_factor.setter
+    def gain_factor(self, gain_factor):
+        self.set_gain(gain_factor)
+
+    @property
+    def position(self):
+        """ Samples processed so far, where the automation curve is read """
+        return self._position
+
+    @position.setter
+    def position(self, position):
+        self._position = position
+
+    def set_gain(self, gain_factor, ramp_samples=None):
+        """ New gain, reached linearly over ramp_samples (default self.ramp_samples) """
+        self._target = float(gain_factor)
+        self._ramp_left = self.ramp_samples if ramp_samples is None else ramp_samples
+        if self._ramp_left <= 0:
+            self._current = self._target
+
+    def set_gain_db(self, gain_db, ramp_samples=None):
+        self.set_gain(db_to_amp(gain_db), ramp_samples)
+
+    def set_automation(self, positions, gains_db):
+        """
+        Gain curve in dB at sample positions (counted from the first processed sample),
+        interpolated linearly in dB in between and held outside. None turns it off.
+        """
+        if positions is None:
+            self._automation = None
+            return
+        positions = np.asarray(positions, dtype=np.float64)
+        gains_db = np.asarray(gains_db, dtype=np.float64)
+        if positions.shape != gains_db.shape or positions.ndim != 1 or len(positions) == 0:
+            raise ValueError("positions and gains_db must be 1-D arrays of the same length")
+        if np.any(np.diff(positions) < 0):
+            raise ValueError("Automation positions must be increasing")
+        self._automation = (positions, gains_db)
+
+    def gain_curve(self, num_frames):
+        """ Per sample gains for the next num_frames, a scalar when the gain is constant. Advances the state. """
+        start = self._position
+        self._position += num_frames
+
+        if self._automation is not None:
+            positions, gains_db = self._automation
+            index = np.arange(start, start + num_frames, dtype=np.float64)
+            curve = db_to_amp(np.interp(index, positions, gains_db))
+            return curve * self._advance_ramp(num_frames)
+
+        return self._advance_ramp(num_frames)
+
+    def _advance_ramp(self, num_frames):
+        if self._ramp_left <= 0:
+            return self._current
+
+        steps = min(num_frames, self._ramp_left)
+        step = (self._target - self._current) / self._ramp_left
+
+        curve = np.full(num_frames, self._target)
+        curve[:steps] = self._current + step * np.arange(1, steps + 1)
+
+        self._current = float(curve[steps - 1])
+        self._ramp_left -= steps
+        return curve
+
+    def process_block(self, block, out=None):
+        """
+        Apply the gain to one block, the state carries over to the next call.
+        out=block works in place, integer (PCM) outputs are rounded and clipped to their range.
+        """
+        block = np.asarray(block)
+        gains = self.gain_curve(block.shape[0])
+        if np.ndim(gains) == 1 and block.ndim == 2:
+            gains = gains[:, np.newaxis]
+        if out is None:
+            return np.multiply(block, gains, dtype=np.result_type(block.dtype, np.float32))
+        if np.issubdtype(out.dtype, np.integer):
+            # a float ramp can't be written into integers directly, go through a float buffer
+            limits = np.iinfo(out.dtype)
+            result = np.multiply(block, gains, dtype=np.float64)
+            np.rint(result, out=result)
+            np.clip(result, limits.min, limits.max, out=result)
+            out[...] = result
+            return out
+        return np.multiply(block, gains, out=out)
+
+    def process(self, block=None, out=None):
+        # without a block the stored samples are processed in place (the old GAIN(samples).process())
+        if block is None:
+            self.process_block(self.samples, out=self.samples)
+            return self.samples
+        return self.process_block(block, out)
+
+    def get_rms(self, per_channel=False):
+        samples = self.samples
+        if samples is None or samples.size == 0:
+            raise ValueError("Cannot calculate rms of empty samples!")
+
+        if per_channel and samples.ndim == 2:
+            return np.sqrt(np.mean(np.square(samples), axis=0))
+        return float(np.sqrt(np.mean(np.square(samples))))
+
     def is_stereo(self):
-        return len(self.samples) > 0 and isinstance(self.samples[0], list)
+        return self.samples is not None and self.samples.ndim == 2 and self.samples.shape[1] > 1
 
     def get_samples(self):
         return self.samples
-
-gain = GAIN([1,2,3,4], 2)
-print(gain.get_samples())
-# print(gain.get_samples())
\ No newline at end of file
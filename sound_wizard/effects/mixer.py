@@ -0,0 +1,149 @@
+import os
+
+import numpy as np
+
+from ..formats.wav_file import WavFile
+from ..formats.wav_write import WAVE_FORMAT_PCM, WavWriter
+from ..utils.math_utils import db_to_amp
+
+class TRACK:
+    """
+    One source of a MIXER: a WAV file (read through WavFile, only the frames of the
+    block being mixed are decoded) or an array, (frames, channels) or 1-D mono.
+
+    gain_db: track gain
+    pan: -1 (left) .. 1 (right). Mono tracks are panned with a constant power law
+         (-3 dB each side in the centre), stereo tracks are balanced (the centre leaves them as they are)
+    offset_seconds: where the track starts in the mix, negative offsets cut off its start
+    """
+    def __init__(self, source, sample_rate, gain_db=0.0, pan=0.0, offset_seconds=0.0):
+        if isinstance(source, (str, os.PathLike)):
+            self.wav = WavFile(os.fspath(source))
+            if self.wav.sample_rate != sample_rate:
+                raise ValueError(f"{source} is at {self.wav.sample_rate} Hz, the mix at {sample_rate} Hz")
+            self.samples = None
+            self.channels = self.wav.channels
+            self.num_frames = self.wav.num_frames
+        else:
+            self.wav = None
+            self.samples = np.asarray(source)
+            if self.samples.ndim == 1:
+                self.samples = self.samples[:, np.newaxis]
+            if self.samples.ndim != 2:
+                raise ValueError(f"Expected 1-D or (frames, channels) samples, got shape {self.samples.shape}")
+            self.channels = self.samples.shape[1]
+            self.num_frames = self.samples.shape[0]
+
+        if not -1 <= pan <= 1:
+            raise ValueError(f"pan must be between -1 and 1, got {pan}")
+        self.gain_db = gain_db
+        self.pan = pan
+        self.offset = int(round(offset_seconds * sample_rate))
+
+    def read(self, start, stop):
+        """ Source frames [start, stop) as (frames, channels) """
+        if self.wav is not None:
+            return self.wav.read(start, stop)
+        return self.samples[start:stop]
+
+    def matrix(self, channels):
+        """ (track channels, mix channels) gains that route the track into the mix """
+        gain = db_to_amp(self.gain_db)
+        angle = (self.pan + 1) * np.pi / 4
+        if self.channels == 1 and channels == 2:
+            return gain * np.array([[np.cos(angle), np.sin(angle)]])
+        if self.channels == 2 and channels == 2:
+            return gain * np.diag([min(1.0, 1.0 - self.pan), min(1.0, 1.0 + self.pan)])
+        if self.pan != 0:
+            raise ValueError(f"Can't pan {self.channels} channels into {channels}")
+        if self.channels == channels:
+            return gain * np.eye(channels)
+        if channels == 1:
+            return np.full((self.channels, 1), gain / self.channels) # downmix
+        if self.channels == 1:
+            return np.full((1, channels), gain)
+        raise ValueError(f"Can't mix {self.channels} channels into {channels}")
+
+    def close(self):
+        if self.wav is not None:
+            self.wav.close()
+
+class MIXER:
+    """
+    Sums any number of tracks into one (frames, channels) stream.
+
+        with MIXER(48000) as mixer:
+            mixer.add_track("drums.wav", gain_db=-2)
+            mixer.add_track("bass.wav", pan=-0.2)
+            mixer.add_track(vocals, offset_seconds=4.5)
+            mixer.render("mix.wav", bits_per_sample=24)
+
+    blocks() goes through the mix block_size frames at a time: every track gives only
+    the frames that overlap the block and they are added into one preallocated
+    buffer, so memory depends on block_size, not on the number or length of the tracks.
+    """
+    def __init__(self, sample_rate, channels=2, block_size=65536):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_size = block_size
+        self.tracks = []
+
+    def add_track(self, source, gain_db=0.0, pan=0.0, offset_seconds=0.0):
+        track = TRACK(source, self.sample_rate, gain_db, pan, offset_seconds)
+        track.matrix(self.channels) # fail now for channel layouts that don't fit
+        self.tracks.append(track)
+        return track
+
+    @property
+    def num_frames(self):
+        return max((max(0, track.offset + track.num_frames) for track in self.tracks), default=0)
+
+    def blocks(self):
+        """
+        Yield the mix as (frames, channels) blocks. The same buffer is reused for every
+        block, copy a block to keep it past the next one.
+        """
+        total = self.num_frames
+        buffer = np.empty((self.block_size, self.channels))
+        scratch = np.empty((self.block_size, self.channels))
+        matrices = [track.matrix(self.channels) for track in self.tracks]
+
+        for start in range(0, total, self.block_size):
+            stop = min(start + self.block_size, total)
+            mix = buffer[:stop - start]
+            mix.fill(0.0)
+            for track, matrix in zip(self.tracks, matrices):
+                first = max(start, track.offset)
+                last = min(stop, track.offset + track.num_frames)
+                if first >= last:
+                    continue
+                routed = np.matmul(track.read(first - track.offset, last - track.offset), matrix,
+                                   out=scratch[:last - first])
+                mix[first - start:last - start] += routed
+            yield mix
+
+    def mix(self):
+        """ The whole mix as one array """
+        out = np.empty((self.num_frames, self.channels))
+        position = 0
+        for block in self.blocks():
+            out[position:position + len(block)] = block
+            position += len(block)
+        return out
+
+    def render(self, output_file, bits_per_sample=24, audio_format=WAVE_FORMAT_PCM, dither=None):
+        """ Stream the mix into a WAV file (RF64 once it passes 4 GB) """
+        with WavWriter(output_file, self.sample_rate, self.channels, bits_per_sample, audio_format, dither) as writer:
+            for block in self.blocks():
+                writer.write(block)
+        return output_file
+
+    def close(self):
+        for track in self.tracks:
+            track.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+
+from .wav_read import *
+
+class WavFile:
+    """
+    Memory mapped WAV file.
+
+    The RIFF chunks are parsed once, the data chunk is mapped with np.memmap and
+    only the frames you slice are read and decoded:
+
+        with open_wav("long.wav") as wav:
+            block = wav[48000:96000]  # (frames, channels) float array
+
+    `raw` gives the undecoded samples as a zero-copy (frames, channels) view.
+    """
+    def __init__(self, file, dtype=np.float32):
+        if not os.path.exists(file):
+            raise FileNotFoundError(f"File not found: {file}")
+
+        self.file = file
+        self.dtype = dtype
+
+        with open(file, 'rb') as f:
+            self.header = read_header(f)
+
+        self.sample_rate = self.header['sample_rate']
+        self.channels = self.header['channels']
+        self.bits_per_sample = self.header['bits_per_sample']
+        self.audio_format = self.header['audio_format']
+        self.block_align = self.header['block_align']
+        self.num_frames = self.header['num_frames']
+        self.duration = self.header['duration']
+
+        self._data = map_data(file, self.header)
+
+    def __len__(self):
+        return self.num_frames
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            index = int(key)
+            if index < 0:
+                index += self.num_frames
+            if not 0 <= index < self.num_frames:
+                raise IndexError(f"Frame {key} out of range for {self.num_frames} frames")
+            return self.read(index, index + 1)[0]
+
+        if not isinstance(key, slice):
+            raise TypeError(f"WavFile indices must be int or slice, not {type(key).__name__}")
+
+        start, stop, step = key.indices(self.num_frames)
+        if step == 1:
+            return self.read(start, stop)
+
+        # decode only the covered range, then pick the frames out of it
+        frames = range(start, stop, step)
+        if len(frames) == 0:
+            return self.read(0, 0)
+        low = min(frames[0], frames[-1])
+        high = max(frames[0], frames[-1]) + 1
+        return self.read(low, high)[np.asarray(frames) - low]
+
+    def read(self, start=0, stop=None):
+        """ Decode frames [start, stop) """
+        if stop is None:
+            stop = self.num_frames
+        start = max(0, min(start, self.num_frames))
+        stop = max(start, min(stop, self.num_frames))
+
+        raw = self._data[start * self.block_align:stop * self.block_align]
+        return decode(raw, self.bits_per_sample, self.channels, self.audio_format, self.dtype, self.block_align)
+
+    @property
+    def raw(self):
+        """
+        Undecoded samples as a (frames, channels) view on the mapped file.
+        24 bit has no numpy dtype, so it comes back as (frames, channels, 3) bytes.
+        """
+        bytes_per_sample = self.block_align // self.channels
+        if self.audio_format == WAVE_FORMAT_IEEE_FLOAT:
+            dtype = {4: '<f4', 8: '<f8'}[bytes_per_sample]
+        else:
+            dtype = {1: 'u1', 2: '<i2', 4: '<i4'}.get(bytes_per_sample)
+
+        if dtype is None:
+            return self._data.reshape(self.num_frames, self.channels, bytes_per_sample)
+        return self._data.view(dtype).reshape(self.num_frames, self.channels)
+
+    def close(self):
+        # dropping the map lets the OS release the file
+        self._data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __repr__(self):
+        return (f"WavFile({self.file!r}, sample_rate={self.sample_rate}, channels={self.channels}, "
+                f"bits_per_sample={self.bits_per_sample}, num_frames={self.num_frames})")
+
+def open_wav(file, dtype=np.float32):
+    return WavFile(file, dtype)
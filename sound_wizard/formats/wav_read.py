@@ -1,156 +1,334 @@
 import struct
 import os
 
-def read_wav(file):
+import numpy as np
+
+from .wav_write import *
+
+def read_wav(file, as_list=False, dtype=np.float32, cache=None):
+    """
+    Read a WAV file.
+
+    samples come back as a (frames, channels) float ndarray scaled to [-1, 1).
+    as_list=True gives the old list output instead ([[L0, R0], ...] for stereo,
+    a flat list for mono).
+    cache: a utils.cache.CACHE, the decoded samples are kept in it (read-only) and
+    come back from it while the file is unchanged.
+    """
     if not os.path.exists(file):
         raise FileNotFoundError(f"File not found: {file}")
-    
+
     with open(file, 'rb') as f:
-        # Parse RIFF header (12 bytes)
-        riff_header = f.read(12)
-        if len(riff_header) < 12:
-            raise ValueError("File too small to be a valid WAV file")
-        
-        chunk_id = riff_header[0:4]
-        file_size = struct.unpack('<I', riff_header[4:8])[0] # unpack returns a tuple (1000, ) -> we need [0]th
-        format_type = riff_header[8:12]
-        
-        # Validate RIFF header
-        if chunk_id != b'RIFF':
-            raise ValueError(f"Not a RIFF file. Expected 'RIFF', got {chunk_id}")
-        if format_type != b'WAVE':
-            raise ValueError(f"Not a WAVE file. Expected 'WAVE', got {format_type}")
-        
-        # Initialize variables
-        fmt_data = None
-        audio_data = None
-        
-        # Read chunks until we find fmt and data
-        while f.tell() < file_size + 8:  # +8 because file_size doesn't include first 8 bytes
-            chunk_header = f.read(8)
-            if len(chunk_header) < 8:
-                break
-                
-            chunk_id = chunk_header[0:4]
-            chunk_size = struct.unpack('<I', chunk_header[4:8])[0]
-            
-            # Parse fmt chunk
-            if chunk_id == b'fmt ':
-                fmt_data = f.read(chunk_size)
-                if len(fmt_data) < 16:
-                    raise ValueError("Invalid fmt chunk size")
-                
-                # Parse fmt chunk data
-                audio_format = struct.unpack('<H', fmt_data[0:2])[0]
-                num_channels = struct.unpack('<H', fmt_data[2:4])[0]
-                sample_rate = struct.unpack('<I', fmt_data[4:8])[0]
-                byte_rate = struct.unpack('<I', fmt_data[8:12])[0]
-                block_align = struct.unpack('<H', fmt_data[12:14])[0]
-                bits_per_sample = struct.unpack('<H', fmt_data[14:16])[0]
-                
-            # Parse data chunk
+        header = read_header(f)
+
+    # decode straight from the mapped data chunk, the raw bytes are never copied into memory
+    raw = map_data(file, header)
+
+    if as_list:
+        # old list output, decoded in float64 so values match the previous pure python path
+        sample_array = decode(raw, header['bits_per_sample'], header['channels'], header['audio_format'],
+                              np.float64, header['block_align'])
+        sample_array = sample_array[:, 0].tolist() if header['channels'] == 1 else sample_array.tolist()
+    elif cache is not None:
+        sample_array = cache.cached('read_wav', lambda: decode(raw, header['bits_per_sample'], header['channels'],
+                                                               header['audio_format'], dtype, header['block_align']),
+                                    (file,), {'dtype': np.dtype(dtype).str})
+    else:
+        sample_array = decode(raw, header['bits_per_sample'], header['channels'], header['audio_format'],
+                              dtype, header['block_align'])
+
+    result = {
+        'sample_rate': header['sample_rate'],
+        'channels': header['channels'],
+        'bits_per_sample': header['bits_per_sample'],
+        'audio_format': header['audio_format'],
+        'num_frames': header['num_frames'],
+        'duration': header['duration'],
+        'samples': sample_array
+    }
+    if as_list:
+        result['data'] = raw.tobytes()
+    return result
+
+def info_wav(file):
+    """
+    Header-only probe, no sample data is read.
+
+    Returns sample_rate, channels, bits_per_sample, audio_format, block_align,
+    byte_rate, num_frames, duration, data_offset, data_size and chunks
+    (every chunk as (chunk_id, offset, size)).
+    """
+    if not os.path.exists(file):
+        raise FileNotFoundError(f"File not found: {file}")
+
+    with open(file, 'rb') as f:
+        return read_header(f)
+
+def read_header(f):
+    """
+    Parse the RIFF chunks of an open WAV file without reading the sample data.
+
+    Returns the fmt fields plus where the data chunk lives (data_offset, data_size),
+    the container ('RIFF', 'RF64' or 'BW64') and a list of every chunk as
+    (chunk_id, offset, size). RF64 / BW64 sizes come from the ds64 chunk.
+    """
+    # Parse RIFF header (12 bytes)
+    riff_header = f.read(12)
+    if len(riff_header) < 12:
+        raise ValueError("File too small to be a valid WAV file")
+
+    chunk_id = riff_header[0:4]
+    file_size = struct.unpack('<I', riff_header[4:8])[0] # unpack returns a tuple (1000, ) -> we need [0]th
+    format_type = riff_header[8:12]
+
+    # Validate RIFF header
+    if chunk_id not in (b'RIFF', b'RF64', b'BW64'):
+        raise ValueError(f"Not a RIFF file. Expected 'RIFF', 'RF64' or 'BW64', got {chunk_id}")
+    if format_type != b'WAVE':
+        raise ValueError(f"Not a WAVE file. Expected 'WAVE', got {format_type}")
+
+    # real size on disk, a truncated recording can claim more than there is
+    end_of_file = f.seek(0, 2)
+    f.seek(12)
+
+    header = None
+    data_offset = None
+    data_size = None
+    chunks = []
+
+    ds64 = None
+    if chunk_id != b'RIFF':
+        # RF64 / BW64: the 64-bit sizes are in the ds64 chunk, always the first one
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8 or chunk_header[0:4] != b'ds64':
+            raise ValueError(f"{chunk_id.decode('latin-1')} file without a ds64 chunk")
+        chunk_size = struct.unpack('<I', chunk_header[4:8])[0]
+        chunks.append(('ds64', f.tell(), chunk_size))
+        ds64 = parse_ds64(f.read(chunk_size))
+        if chunk_size % 2 != 0:
+            f.seek(1, 1)
+        if file_size == SIZE_IN_DS64:
+            file_size = ds64['riff_size']
+    elif file_size == SIZE_IN_DS64:
+        file_size = end_of_file - 8 # RIFF written past 4 GB with the size field maxed out
+
+    # Walk the chunks, the data chunk is only skipped over
+    while f.tell() < min(file_size + 8, end_of_file):  # +8 because file_size doesn't include first 8 bytes
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            break
+
+        chunk_id = chunk_header[0:4]
+        chunk_size = struct.unpack('<I', chunk_header[4:8])[0]
+        if chunk_size == SIZE_IN_DS64:
+            if ds64 is not None:
+                chunk_size = ds64['data_size'] if chunk_id == b'data' else ds64['table'].get(chunk_id, chunk_size)
             elif chunk_id == b'data':
-                audio_data = f.read(chunk_size)
-                
-            else:
-                f.seek(chunk_size, 1)  # Skip unwanted chunks 
+                chunk_size = end_of_file - f.tell() # the rest of the file
+        chunks.append((chunk_id.decode('latin-1'), f.tell(), chunk_size))
 
-            if chunk_size % 2 != 0:
-                f.read(1) # padding byte 
-        
-        if fmt_data is None:
-            raise ValueError("No fmt chunk found in WAV file")
-        if audio_data is None:
-            raise ValueError("No data chunk found in WAV file")
-        
-        bytes_per_sample = bits_per_sample // 8
-        num_frames = len(audio_data) // (num_channels * bytes_per_sample) # [L, R], [L, R]
-        
-        # raw samples
-        all_samples = unpack(audio_data, bits_per_sample)
-
-        # normalized samples
-        normalized_samples = normalize_samples(all_samples, bits_per_sample)
-
-        sample_array = []
-        # if stereo
-        if num_channels == 2:
-            left = normalized_samples[0::2] # start from 0 and go to end by 2 steps 
-            right = normalized_samples[1::2] # start from 1 and go to end by 2 steps
-            sample_array = [left, right]
-        elif num_channels == 1:
-            sample_array = [normalized_samples]
-
-        # normalized and transposed samples
-        sample_array = transpose_array(sample_array, num_channels)
-
-        # PROBLEM WAS!!!!!
-        # samples = [
-        #     [L0, L1, L2, L3, ...],  # Left channel
-        #     [R0, R1, R2, R3, ...]   # Right channel
-        # ]
-
-        # # What soundfile wants:
-        # samples = [ is this called interleaved?
-        #     [L0, R0],  # Frame 0
-        #     [L1, R1],  # Frame 1
-        #     [L2, R2],  # Frame 2
-        #     ...
-        # ]
-
-        return {
-            'sample_rate': sample_rate,
-            'channels': num_channels,
-            'bits_per_sample': bits_per_sample,
-            'audio_format': audio_format,
-            'data': audio_data,
-            'num_frames': num_frames,
-            'duration': num_frames / sample_rate,
-            'samples': sample_array
-        }
-    
-def write_wav(file, data, sample_rate, num_channels, bits_per_sample):
-    
-    # 1- Denormalize the samples
-    # 2- Calculate sizes
-    # 3- Write RIFF header
-    # 4- Write fmt chunk
-    # 5- Write data chunk
+        # Parse fmt chunk
+        if chunk_id == b'fmt ':
+            header = parse_fmt(f.read(chunk_size))
 
-    int_samples = denormalize_samples(data, bits_per_sample, num_channels)
+        # Remember where the data chunk is
+        elif chunk_id == b'data':
+            data_offset = f.tell()
+            data_size = min(chunk_size, end_of_file - data_offset)
+            f.seek(chunk_size, 1)
 
-    audio_bytes = pack(int_samples, bits_per_sample, num_channels)
+        else:
+            f.seek(chunk_size, 1)  # Skip unwanted chunks
+
+        if chunk_size % 2 != 0:
+            f.seek(1, 1) # padding byte
+
+    if header is None:
+        raise ValueError("No fmt chunk found in WAV file")
+    if data_offset is None:
+        raise ValueError("No data chunk found in WAV file")
+
+    num_frames = data_size // header['block_align'] # [L, R], [L, R]
+    header.update({
+        'container': riff_header[0:4].decode('latin-1'),
+        'data_offset': data_offset,
+        'data_size': data_size,
+        'num_frames': num_frames,
+        'duration': num_frames / header['sample_rate'],
+        'chunks': chunks,
+    })
+    return header
+
+def parse_ds64(ds64_data):
+    """ 64-bit riff_size, data_size, sample_count and the sizes of other big chunks (table) """
+    if len(ds64_data) < DS64_SIZE:
+        raise ValueError("Invalid ds64 chunk size")
+    riff_size, data_size, sample_count, table_length = struct.unpack('<QQQI', ds64_data[:DS64_SIZE])
+    table = {}
+    for i in range(table_length):
+        entry = ds64_data[DS64_SIZE + 12 * i:DS64_SIZE + 12 * (i + 1)]
+        if len(entry) < 12:
+            raise ValueError("Invalid ds64 chunk table")
+        table[entry[0:4]] = struct.unpack('<Q', entry[4:12])[0]
+    return {'riff_size': riff_size, 'data_size': data_size, 'sample_count': sample_count, 'table': table}
+
+def parse_fmt(fmt_data):
+    if len(fmt_data) < 16:
+        raise ValueError("Invalid fmt chunk size")
+
+    # Parse fmt chunk data
+    audio_format = struct.unpack('<H', fmt_data[0:2])[0]
+    num_channels = struct.unpack('<H', fmt_data[2:4])[0]
+    sample_rate = struct.unpack('<I', fmt_data[4:8])[0]
+    byte_rate = struct.unpack('<I', fmt_data[8:12])[0]
+    block_align = struct.unpack('<H', fmt_data[12:14])[0]
+    bits_per_sample = struct.unpack('<H', fmt_data[14:16])[0]
+
+    # WAVE_FORMAT_EXTENSIBLE keeps the real format in the first 2 bytes of the SubFormat GUID
+    if audio_format == WAVE_FORMAT_EXTENSIBLE:
+        if len(fmt_data) < 40:
+            raise ValueError("Invalid WAVE_FORMAT_EXTENSIBLE fmt chunk")
+        audio_format = struct.unpack('<H', fmt_data[24:26])[0]
+
+    if num_channels == 0 or block_align == 0:
+        raise ValueError("Invalid fmt chunk, zero channels or block align")
+
+    return {
+        'sample_rate': sample_rate,
+        'channels': num_channels,
+        'bits_per_sample': bits_per_sample,
+        'audio_format': audio_format,
+        'byte_rate': byte_rate,
+        'block_align': block_align,
+    }
+
+def map_data(file, header, mode='r'):
+    """
+    Memory map the data chunk as a flat uint8 array (whole frames only).
+    Nothing is read from disk until the pages are touched.
+    """
+    size = header['num_frames'] * header['block_align']
+    if size == 0:
+        return np.zeros(0, dtype=np.uint8) # mmap can't map an empty range
+    return np.memmap(file, dtype=np.uint8, mode=mode, offset=header['data_offset'], shape=(size,))
+
+def iter_blocks(file, block_frames, start=0, stop=None, dtype=np.float32):
+    """
+    Stream a WAV file as (frames, channels) blocks of block_frames frames
+    (the last one can be shorter). Only one block is in memory at a time.
+    """
+    if block_frames <= 0:
+        raise ValueError("block_frames must be positive")
+    if not os.path.exists(file):
+        raise FileNotFoundError(f"File not found: {file}")
 
-    bytes_per_sample = bits_per_sample // 8
-    block_align = num_channels * bytes_per_sample
-    byte_rate = sample_rate * block_align
-    data_size = len(audio_bytes)
-    # data_size = len(int_samples)
-    fmt_chunk_size = 16
-    file_size = 36 + data_size
-
-
-    with open(file, 'wb') as f:
-        # RIFF HEADER (12 bytes)
-        f.write(b'RIFF')
-        f.write(struct.pack('<I', file_size))
-        f.write(b'WAVE')
-
-        # FMT CHUNK (24 bytes)
-        f.write(b'fmt ')
-        f.write(struct.pack('<I', 16)) # subchunk size
-        f.write(struct.pack('<H', 1)) # PCM
-        f.write(struct.pack('<H', num_channels))
-        f.write(struct.pack('<I', sample_rate))
-        f.write(struct.pack('<I', byte_rate))
-        f.write(struct.pack('<H', block_align))
-        f.write(struct.pack('<H', bits_per_sample))
-
-        # Write Data Chunk
-        f.write(b'data')
-        f.write(struct.pack('<I', data_size))
-        f.write(audio_bytes)
-        # f.write(int_samples)
+    with open(file, 'rb') as f:
+        header = read_header(f)
+        block_align = header['block_align']
+
+        stop = header['num_frames'] if stop is None else min(stop, header['num_frames'])
+        position = max(0, start)
+        f.seek(header['data_offset'] + position * block_align)
+
+        while position < stop:
+            frames = min(block_frames, stop - position)
+            audio_data = f.read(frames * block_align)
+            if len(audio_data) < block_align:
+                break
+            yield decode(audio_data, header['bits_per_sample'], header['channels'], header['audio_format'],
+                         dtype, block_align)
+            position += frames
+
+def write_wav(file, data, sample_rate, num_channels, bits_per_sample, audio_format=WAVE_FORMAT_PCM, dither=None,
+              bw64=False):
+    """
+    Write float samples in [-1, 1) to a WAV file.
+
+    data can be a (frames, channels) or (channels, frames) array, a 1-D mono
+    array or the old list of frames. It is not modified. PCM values are clipped
+    (float keeps values past +-1), dither='tpdf' adds triangular dither before rounding to PCM.
+    audio_format=WAVE_FORMAT_IEEE_FLOAT with 32 bits writes float samples.
+    Files over 4 GB are written as RF64 (BW64 with bw64=True), smaller ones as plain RIFF.
+    """
+    frames = as_frames(data, num_channels)
+
+    # the size is known up front, only reserve room for ds64 when it is needed
+    size = 100 + frames.shape[0] * num_channels * (bits_per_sample // 8) # header and chunks stay under 100 bytes
+    rf64 = size > WavWriter.RIFF_LIMIT
+
+    with WavWriter(file, sample_rate, num_channels, bits_per_sample, audio_format, dither, rf64=rf64,
+                   bw64=bw64) as writer:
+        writer.write(frames)
+
+def decode(audio_data, bits_per_sample, num_channels, audio_format=WAVE_FORMAT_PCM, dtype=np.float32, block_align=None):
+    """
+    Vectorized decoder for the raw bytes of a data chunk.
+
+    Returns a (frames, channels) array of `dtype` scaled to [-1, 1).
+    Handles 8 (unsigned), 16, 24 and 32-bit PCM and 32/64-bit IEEE float.
+    audio_data can be bytes, a memoryview or a uint8 ndarray (e.g. a memmap).
+    """
+    if block_align is None:
+        block_align = num_channels * (bits_per_sample // 8)
+    if num_channels < 1 or block_align < num_channels:
+        raise ValueError(f"Invalid block align {block_align} for {num_channels} channels")
+
+    # container size, for extensible files bits_per_sample can be smaller (e.g. 20 bits in 3 bytes)
+    bytes_per_sample = block_align // num_channels
+
+    raw = np.frombuffer(audio_data, dtype=np.uint8)
+    num_frames = len(raw) // block_align
+    raw = raw[:num_frames * block_align] # drop a trailing partial frame
+
+    if audio_format == WAVE_FORMAT_IEEE_FLOAT:
+        if bytes_per_sample == 4:
+            samples = raw.view('<f4')
+        elif bytes_per_sample == 8:
+            samples = raw.view('<f8')
+        else:
+            raise ValueError(f"Unsupported float bit depth: {bits_per_sample}")
+        return samples.reshape(num_frames, num_channels).astype(dtype)
+
+    if audio_format != WAVE_FORMAT_PCM:
+        raise ValueError(f"Unsupported audio format: {audio_format}")
+
+    if bytes_per_sample == 1:
+        # 8 bit is unsigned, 128 is silence
+        samples = raw.astype(dtype)
+        samples -= 128
+    elif bytes_per_sample == 2:
+        samples = raw.view('<i2').astype(dtype)
+    elif bytes_per_sample == 3:
+        samples = unpack24(raw).astype(dtype)
+    elif bytes_per_sample == 4:
+        samples = raw.view('<i4').astype(dtype)
+    else:
+        raise ValueError(f"Unsupported bit depth: {bits_per_sample}")
+
+    samples *= 1.0 / (2 ** (8 * bytes_per_sample - 1))
+    return samples.reshape(num_frames, num_channels)
+
+def unpack24(raw):
+    """
+    24 bit little endian bytes -> int32 array.
+
+    Every sample is read as a 4 byte int through a view with a 3 byte stride,
+    so the top byte belongs to the next sample. << 8 drops it and the
+    arithmetic >> 8 brings the sign back.
+    """
+    raw = np.ascontiguousarray(raw, dtype=np.uint8)
+    n = len(raw) // 3
+    out = np.empty(n, dtype=np.int32)
+    if n == 0:
+        return out
+
+    # the last sample has no 4th byte to borrow, do it by hand
+    if n > 1:
+        strided = np.ndarray(shape=(n - 1,), dtype='<i4', buffer=raw, offset=0, strides=(3,))
+        np.left_shift(strided, 8, out=out[:n - 1])
+    out[n - 1] = int.from_bytes(raw[3 * n - 3:3 * n].tobytes(), 'little', signed=True) << 8
+    np.right_shift(out, 8, out=out)
+    return out
 
 def unpack16(audio_data, bits_per_sample):
     bytes_per_sample = bits_per_sample // 8
@@ -209,21 +387,8 @@ def unpack(audio_data, bits_per_sample):
     return samples
 
 def pack(audio_data, bits_per_sample, num_channels):
-    bytes_per_sample = bits_per_sample // 8
-    samples = []
-
-    for sample in range(0, len(audio_data), 1):
-        for channel in range(num_channels):
-            for j in range(0, bytes_per_sample, 1):
-                if j == bytes_per_sample - 1: # MSB
-                    if audio_data[sample][channel] < 0:
-                        samples.append(((audio_data[sample][channel] >> (8 * j)) & 0XFF) | 0X80)
-                    else:
-                        samples.append((audio_data[sample][channel] >> (8 * j)) & 0XFF)
-                else: # LSB
-                    samples.append((audio_data[sample][channel] >> (8 * j)) & 0XFF)
-
-    return bytes(samples)
+    """ Integer frames [[L0, R0], ...] -> little endian two's complement bytes """
+    return pack_ints(as_frames(audio_data, num_channels), bits_per_sample)
         
 def normalize_samples(samples, bits_per_sample):
 
@@ -261,28 +426,19 @@ def transpose_array(samples, num_channels):
         frames.append(frame) # [[1,5], [2,6], [3,7]]
     return frames
 
-def denormalize_samples(samples, bits_per_sample, num_channels) -> dict:
-    if num_channels == 1:
-        for i in range(len(samples)):
-            samples[i] *= (2 ** (bits_per_sample - 1))
-            samples[i] = int(samples[i])
-    elif num_channels >= 2:
-        for i in range(len(samples)):
-            for j in range(2):
-                samples[i][j] *= (2 ** (bits_per_sample - 1))
-                samples[i][j] = int(samples[i][j])
-    return samples
+def denormalize_samples(samples, bits_per_sample, num_channels):
+    """ Float samples -> integers (truncated), returns a new list and leaves samples alone """
+    ints = np.asarray(samples, dtype=np.float64) * (2 ** (bits_per_sample - 1))
+    return ints.astype(np.int64).tolist()
 
-def get_megabyte(file):
-    wav_data = read_wav(file)
-    sample_rate = wav_data['sample_rate']
-    bits_per_sample = wav_data['bits_per_sample']
-    num_channels = wav_data['channels']
-    duration = wav_data['duration']
+def get_megabyte(file, cache=None):
+    if cache is not None:
+        # header only, not worth a file: memory tier only
+        return float(cache.cached('get_megabyte', lambda: get_megabyte(file), (file,), disk=False))
+    info = info_wav(file)
 
-    bits_per_second = bits_per_sample * sample_rate * num_channels
-    bytes_per_second = bits_per_second / 8
-    total_bytes = bytes_per_second * duration
+    bytes_per_frame = info['bits_per_sample'] * info['channels'] / 8
+    total_bytes = bytes_per_frame * info['num_frames']
 
     megabytes = total_bytes / (1024 * 1024)
-    return megabytes
\ No newline at end of file
+    return megabytes
@@ -0,0 +1,209 @@
+import struct
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# RF64 / BW64 (EBU Tech 3306, ITU-R BS.2088): 32-bit size fields set to this
+# value are stored as 64-bit sizes in a ds64 chunk right after the header
+SIZE_IN_DS64 = 0xFFFFFFFF
+DS64_SIZE = 28 # riff size, data size, sample count (64 bit each) and an empty table length
+
+def as_frames(samples, num_channels):
+    """
+    Bring samples into (frames, channels) layout without copying when possible.
+    Accepts lists, 1-D mono arrays, (frames, channels) and (channels, frames).
+    """
+    samples = np.asarray(samples)
+    if samples.ndim == 1:
+        # mono, or interleaved [L0, R0, L1, R1, ...]
+        if len(samples) % num_channels != 0:
+            raise ValueError(f"{len(samples)} interleaved samples do not split into {num_channels} channels")
+        return samples.reshape(-1, num_channels)
+    if samples.ndim != 2:
+        raise ValueError(f"Expected 1-D or 2-D samples, got shape {samples.shape}")
+    if samples.shape[1] == num_channels:
+        return samples
+    if samples.shape[0] == num_channels:
+        return samples.T # channels first
+    raise ValueError(f"Samples of shape {samples.shape} do not have {num_channels} channels")
+
+def encode(samples, bits_per_sample, audio_format=WAVE_FORMAT_PCM, dither=None, clip=True, rng=None):
+    """
+    Vectorized encoder, float samples in [-1, 1) -> little endian bytes.
+
+    samples: (frames, channels) array (or 1-D for mono), never modified.
+    bits_per_sample: 8 (unsigned), 16, 24 or 32 PCM, or 32/64 with audio_format=WAVE_FORMAT_IEEE_FLOAT
+    dither: None or 'tpdf' (triangular, +-1 LSB) added before rounding to PCM
+    clip: clip PCM to the full scale range (without it values wrap around). Float
+          samples are never clipped, values past +-1 are the headroom float files keep.
+    """
+    samples = np.asarray(samples)
+
+    if audio_format == WAVE_FORMAT_IEEE_FLOAT:
+        if bits_per_sample not in (32, 64):
+            raise ValueError(f"Unsupported float bit depth: {bits_per_sample}")
+        return np.ascontiguousarray(samples, dtype='<f4' if bits_per_sample == 32 else '<f8').tobytes()
+
+    if audio_format != WAVE_FORMAT_PCM:
+        raise ValueError(f"Unsupported audio format: {audio_format}")
+    if bits_per_sample not in (8, 16, 24, 32):
+        raise ValueError(f"Unsupported bit depth: {bits_per_sample}")
+
+    full_scale = 2 ** (bits_per_sample - 1)
+
+    # new array from here on, the caller's samples are never touched
+    ints = np.multiply(samples, full_scale, dtype=np.float64)
+
+    if dither == 'tpdf':
+        if rng is None:
+            rng = np.random.default_rng()
+        # difference of two uniform [0, 1) values is triangular over (-1, 1) LSB
+        ints += rng.random(ints.shape)
+        ints -= rng.random(ints.shape)
+    elif dither is not None:
+        raise ValueError(f"Unknown dither: {dither}")
+
+    np.round(ints, out=ints)
+    if clip:
+        np.clip(ints, -full_scale, full_scale - 1, out=ints)
+
+    return pack_ints(ints.astype(np.int64), bits_per_sample)
+
+def pack_ints(ints, bits_per_sample):
+    """ Integer samples -> little endian two's complement bytes (8 bit is offset to unsigned) """
+    ints = np.ascontiguousarray(ints)
+    if bits_per_sample == 8:
+        return (ints + 128).astype(np.uint8).tobytes()
+    if bits_per_sample == 16:
+        return ints.astype('<i2').tobytes()
+    if bits_per_sample == 24:
+        # keep the low 3 bytes of every little endian int32
+        return ints.astype('<i4').reshape(-1, 1).view(np.uint8)[:, :3].tobytes()
+    if bits_per_sample == 32:
+        return ints.astype('<i4').tobytes()
+    raise ValueError(f"Unsupported bit depth: {bits_per_sample}")
+
+def fmt_chunk(num_channels, sample_rate, bits_per_sample, audio_format=WAVE_FORMAT_PCM):
+    block_align = num_channels * (bits_per_sample // 8)
+    byte_rate = sample_rate * block_align
+    fmt = struct.pack('<HHIIHH', audio_format, num_channels, sample_rate, byte_rate, block_align, bits_per_sample)
+    if audio_format != WAVE_FORMAT_PCM:
+        fmt += struct.pack('<H', 0) # cbSize, non PCM formats need it
+    return b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+
+def ds64_chunk(riff_size=0, data_size=0, sample_count=0):
+    return b'ds64' + struct.pack('<IQQQI', DS64_SIZE, riff_size, data_size, sample_count, 0)
+
+class WavWriter:
+    """
+    Incremental WAV writer.
+
+        with WavWriter("out.wav", 48000, 2, 24) as writer:
+            for block in iter_blocks("in.wav", 4096):
+                writer.write(block)
+
+    The header is written with empty sizes, blocks are appended as they come
+    and the RIFF / data sizes are patched on close.
+
+    Sizes over RIFF_LIMIT don't fit in the 32-bit RIFF fields:
+    rf64=None: a JUNK chunk keeps room for a ds64 chunk, once the file grows past
+               the limit the header turns into RF64 in place (plain RIFF otherwise)
+    rf64=True: RF64 from the start
+    rf64=False: plain RIFF without the JUNK chunk, writing past the limit raises
+    bw64=True writes BW64 instead of RF64 (the same layout).
+    """
+    RIFF_LIMIT = 0xFFFFFFFF
+
+    def __init__(self, file, sample_rate, num_channels, bits_per_sample=16, audio_format=WAVE_FORMAT_PCM,
+                 dither=None, rng=None, rf64=None, bw64=False):
+        self.file = file
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.bits_per_sample = bits_per_sample
+        self.audio_format = audio_format
+        self.dither = dither
+        self.rng = rng
+        self.block_align = num_channels * (bits_per_sample // 8)
+        self.num_frames = 0
+        self.data_size = 0
+        self.rf64 = rf64
+        self.large_id = b'BW64' if bw64 else b'RF64'
+        self.promoted = False # the header is RF64 / BW64
+
+        # fail before creating the file
+        encode(np.zeros((0, num_channels)), bits_per_sample, audio_format)
+
+        self._f = open(file, 'wb')
+        self._f.write(b'RIFF' + struct.pack('<I', 0) + b'WAVE')
+        if rf64 is not False:
+            self._f.write(b'JUNK' + struct.pack('<I', DS64_SIZE) + bytes(DS64_SIZE)) # room for ds64
+            if rf64:
+                self._promote()
+        self._f.write(fmt_chunk(num_channels, sample_rate, bits_per_sample, audio_format))
+
+        # float files carry a fact chunk with the frame count
+        self._fact_offset = None
+        if audio_format != WAVE_FORMAT_PCM:
+            self._f.write(b'fact' + struct.pack('<I', 4))
+            self._fact_offset = self._f.tell()
+            self._f.write(struct.pack('<I', 0))
+
+        self._f.write(b'data')
+        self._data_size_offset = self._f.tell()
+        self._f.write(struct.pack('<I', 0))
+
+    def write(self, block):
+        block = as_frames(block, self.num_channels)
+
+        audio_bytes = encode(block, self.bits_per_sample, self.audio_format, self.dither, rng=self.rng)
+        if not self.promoted and self._f.tell() + len(audio_bytes) + 1 - 8 > self.RIFF_LIMIT:
+            if self.rf64 is False:
+                raise ValueError(f"WAV file would be larger than {self.RIFF_LIMIT} bytes, write it with rf64=None or True")
+            self._promote()
+        self._f.write(audio_bytes)
+        self.data_size += len(audio_bytes)
+        self.num_frames += block.shape[0]
+
+    def _promote(self):
+        # RF64 header and the JUNK chunk becomes ds64, the real sizes are written on close
+        end = self._f.tell()
+        self._f.seek(0)
+        self._f.write(self.large_id + struct.pack('<I', SIZE_IN_DS64))
+        self._f.seek(12)
+        self._f.write(ds64_chunk())
+        self._f.seek(end)
+        self.promoted = True
+
+    def close(self):
+        if self._f is None:
+            return
+        if self.data_size % 2 != 0:
+            self._f.write(b'\x00') # padding byte
+
+        riff_size = self._f.tell() - 8
+        if self.promoted:
+            self._f.seek(12)
+            self._f.write(ds64_chunk(riff_size, self.data_size, self.num_frames))
+            riff_size = data_size = SIZE_IN_DS64
+            num_frames = min(self.num_frames, SIZE_IN_DS64)
+        else:
+            data_size, num_frames = self.data_size, self.num_frames
+
+        self._f.seek(4)
+        self._f.write(struct.pack('<I', riff_size))
+        if self._fact_offset is not None:
+            self._f.seek(self._fact_offset)
+            self._f.write(struct.pack('<I', num_frames))
+        self._f.seek(self._data_size_offset)
+        self._f.write(struct.pack('<I', data_size))
+        self._f.close()
+        self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,236 @@
+import collections
+import hashlib
+import os
+import weakref
+
+import numpy as np
+
+def _handed_over(array):
+    # an array whose memory can be frozen along with it: it owns its data, or is a view
+    # (reshape, slice) of an array that does, not of a memmap / buffer / read-only array
+    if not isinstance(array, np.ndarray) or isinstance(array, np.memmap):
+        return False
+    base = array
+    while isinstance(base.base, np.ndarray):
+        base = base.base
+    return base.base is None and base.flags.writeable and not isinstance(base, np.memmap)
+
+class CACHE:
+    """
+    Content addressed cache of decoded audio and analysis results.
+
+        cache = CACHE("~/.cache/sound_wizard", max_bytes=20 * 2**30)
+        song = read_wav("song.wav", cache=cache) # decoded once, a memory mapped .npy afterwards
+        spectrum = stft(song['samples'], 2048, 512, cache=cache)
+
+    Keys are digests of the operation, its parameters and its inputs: files by path,
+    size and modification time (or their contents with hash_files=True), arrays by their
+    bytes. Arrays the cache handed out are known by their key and never hashed again, so
+    chained steps (decode -> stft) cost one stat() per hit.
+
+    Two tiers, both least recently used first out, bounded in bytes:
+        memory: the arrays used last, up to memory_bytes
+        disk: .npy files under directory (None keeps everything in memory only), up to
+              max_bytes, loaded back with mmap_mode='r' so a hit reads nothing up front.
+              File modification times record use, so the order survives restarts.
+    Cached arrays are read-only. stats counts hits, misses and evictions.
+    """
+    def __init__(self, directory=None, max_bytes=10 * 2**30, memory_bytes=256 * 2**20, hash_files=False):
+        self.directory = None if directory is None else os.path.abspath(os.path.expanduser(directory))
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.hash_files = hash_files
+
+        self._memory = collections.OrderedDict() # key -> array
+        self._memory_size = 0
+        self._disk = collections.OrderedDict() # key -> file size, oldest use first
+        self._disk_size = 0
+        self._known = {} # id(array) -> (weak reference, key) of arrays the cache handed out
+        self._file_hashes = {}
+        self.reset_stats()
+
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._scan()
+
+    def reset_stats(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            'memory_bytes': self._memory_size,
+            'disk_bytes': self._disk_size,
+        }
+
+    # keys
+
+    def file_key(self, path):
+        """ Path, size and modification time of a file, or a digest of its contents with hash_files """
+        path = os.path.realpath(os.fspath(path))
+        stat = os.stat(path)
+        identity = f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+        if not self.hash_files:
+            return identity
+        if identity not in self._file_hashes:
+            digest = hashlib.blake2b(digest_size=20)
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            self._file_hashes[identity] = digest.hexdigest()
+        return self._file_hashes[identity]
+
+    def array_key(self, array):
+        """ Digest of an array's dtype, shape and bytes, the stored key for arrays from the cache """
+        known = self._known.get(id(array))
+        if known is not None and known[0]() is array:
+            return known[1]
+        array = np.asarray(array)
+        digest = hashlib.blake2b(f"{array.dtype.str}{array.shape}".encode(), digest_size=20)
+        digest.update(np.ascontiguousarray(array).reshape(-1).view(np.uint8))
+        return digest.hexdigest()
+
+    def key(self, operation, inputs=(), params=None):
+        """
+        Key of operation(inputs, **params). Inputs that are str / PathLike are files,
+        arrays (lists and tuples too) are hashed and anything else goes in by repr, like
+        the params. Pass arrays as they are: np.asarray() of an array from the cache
+        (a memmap) is a new object the cache does not know, its bytes would be hashed.
+        """
+        parts = [operation]
+        for item in inputs:
+            if isinstance(item, (str, os.PathLike)):
+                parts.append("file:" + self.file_key(item))
+            elif isinstance(item, (np.ndarray, list, tuple)):
+                parts.append("array:" + self.array_key(item))
+            else:
+                parts.append(repr(item))
+        for name, value in sorted((params or {}).items()):
+            parts.append(f"{name}={self.array_key(value) if isinstance(value, np.ndarray) else repr(value)}")
+        return hashlib.blake2b("\n".join(parts).encode(), digest_size=20).hexdigest()
+
+    # storage
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".npy")
+
+    def _scan(self):
+        # index the files left by earlier runs, oldest use first
+        found = []
+        for folder in os.scandir(self.directory):
+            if folder.is_dir():
+                for entry in os.scandir(folder.path):
+                    if entry.name.endswith(".npy"):
+                        stat = entry.stat()
+                        found.append((stat.st_mtime_ns, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(found):
+            self._disk[key] = size
+            self._disk_size += size
+
+    def _remember(self, key, array):
+        reference = weakref.ref(array, lambda _, identity=id(array): self._known.pop(identity, None))
+        self._known[id(array)] = (reference, key)
+        return array
+
+    def _keep(self, key, array):
+        # memory tier, arrays bigger than all of it are not kept
+        if key in self._memory or array.nbytes > self.memory_bytes:
+            return
+        self._memory[key] = array
+        self._memory_size += array.nbytes
+        while self._memory_size > self.memory_bytes:
+            _, dropped = self._memory.popitem(last=False)
+            self._memory_size -= dropped.nbytes
+            self.evictions += 1
+
+    def get(self, key):
+        """ The array stored under key or None """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return self._memory[key]
+
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                array = np.load(path, mmap_mode='r', allow_pickle=False)
+                os.utime(path) # mark as used
+            except (FileNotFoundError, ValueError):
+                self._disk_size -= self._disk.pop(key, 0) # removed by another process
+                array = None
+            if array is not None:
+                if key not in self._disk: # written by another process
+                    self._disk[key] = os.path.getsize(path)
+                    self._disk_size += self._disk[key]
+                self._disk.move_to_end(key)
+                self.disk_hits += 1
+                self._keep(key, array)
+                return self._remember(key, array)
+
+        self.misses += 1
+        return None
+
+    def put(self, key, array, disk=True, copy=True):
+        """
+        Store array read-only under key, on disk too unless disk=False, and return the
+        stored array. copy=True stores a copy and leaves the array given to the caller;
+        copy=False hands it over: it is frozen in place unless its memory belongs to
+        something else (a memmap, a buffer, a read-only array), which is copied still.
+        """
+        array = np.array(array) if copy or not _handed_over(array) else array
+        array.setflags(write=False)
+        self._keep(key, array)
+
+        if disk and self.directory is not None and array.nbytes <= self.max_bytes:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, 'wb') as f:
+                np.save(f, array, allow_pickle=False)
+            os.replace(temporary, path) # readers never see half a file
+            self._disk_size += os.path.getsize(path) - self._disk.pop(key, 0)
+            self._disk[key] = os.path.getsize(path)
+            self._evict_disk()
+        return self._remember(key, array)
+
+    def _evict_disk(self):
+        while self._disk_size > self.max_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_size -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key)) # arrays already mapped stay readable
+            except OSError:
+                pass
+
+    def cached(self, operation, compute, inputs=(), params=None, disk=True):
+        """
+        The stored result of operation(inputs, **params), compute() makes it on a miss.
+        The array compute() returns is handed over to the cache (put(copy=False)) and
+        frozen, so a big result is not held twice: return a copy of one still in use.
+        """
+        key = self.key(operation, inputs, params)
+        array = self.get(key)
+        if array is None:
+            array = self.put(key, compute(), disk, copy=False)
+        return array
+
+    def clear(self):
+        """ Drop every entry, the files on disk too """
+        for key in list(self._disk):
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+        self._memory.clear()
+        self._disk.clear()
+        self._memory_size = self._disk_size = 0
@@ -0,0 +1,177 @@
+import numpy as np
+
+from . import fft as fft_engine
+
+# kernels up to this many taps are cheaper to convolve directly than through the FFT
+DIRECT_MAX_TAPS = 64
+
+def _as_channels(x):
+    # (frames,) or (frames, channels) -> (channels, frames)
+    x = np.asarray(x, dtype=np.float64)
+    if x.ndim == 1:
+        return x[np.newaxis, :]
+    if x.ndim != 2:
+        raise ValueError(f"Expected (frames,) or (frames, channels), got shape {x.shape}")
+    return x.T
+
+def direct_convolution(signal, kernel):
+    """
+    Full linear convolution in the time domain.
+    The loop runs over the kernel taps, every tap is one vectorized multiply-add
+    over the whole signal (and every channel).
+    formula: y[n] = sum(signal[n-k] * kernel[k])
+    """
+    x = _as_channels(signal)
+    h = _as_channels(kernel)
+    N = x.shape[1]
+    M = h.shape[1]
+
+    output = np.zeros((max(x.shape[0], h.shape[0]), N + M - 1))
+    for k in range(M):
+        output[:, k:k + N] += h[:, k:k + 1] * x
+
+    return output[0] if np.ndim(signal) == 1 and np.ndim(kernel) == 1 else output.T
+
+class CONVOLVER:
+    """
+    Uniformly partitioned overlap-save convolution for long kernels (reverb IRs).
+
+    The kernel is cut in partitions of block_size samples and their spectra are
+    computed once. Input is processed in blocks of block_size: every block's
+    spectrum goes into a frequency domain delay line and the output block is
+    sum(H[p] * X[j - p]) over the partitions, so memory and latency only depend
+    on block_size, not on the input length.
+
+    kernel: (taps,) shared by every channel or (taps, channels), a mono block through
+    a (taps, channels) kernel comes out with the kernel's channels
+    process(block) takes and returns (frames,) or (frames, channels) blocks of any
+    size. The output is delayed by `latency` (= block_size) samples, flush()
+    returns the remaining latency + taps - 1 samples of the tail.
+    """
+    def __init__(self, kernel, block_size=1024, max_batch=32):
+        kernel = np.asarray(kernel, dtype=np.float64)
+        if kernel.ndim not in (1, 2) or kernel.shape[0] == 0:
+            raise ValueError(f"Invalid kernel shape: {kernel.shape}")
+        if block_size < 1:
+            raise ValueError("block_size must be positive")
+
+        self.block_size = block_size
+        self.latency = block_size
+        self.taps = kernel.shape[0]
+        self.max_batch = max_batch # partitions transformed per batched rfft
+        self._mono_kernel = kernel.ndim == 1
+
+        # (channels, partitions, bins) spectra of the zero padded partitions
+        h = _as_channels(kernel)
+        self.num_partitions = -(-self.taps // block_size)
+        padded = np.zeros((h.shape[0], self.num_partitions, 2 * block_size))
+        parts = np.zeros((h.shape[0], self.num_partitions * block_size))
+        parts[:, :self.taps] = h
+        padded[:, :, :block_size] = parts.reshape(h.shape[0], self.num_partitions, block_size)
+        self.kernel_f = fft_engine.rfft(padded, axis=-1)
+
+        self._mono = False
+        self.reset()
+
+    def reset(self):
+        self.channels = None # set by the first block
+        self._history = None # previous block_size input samples, (channels, block_size)
+        self._delay_line = None # spectra of the last partitions - 1 blocks
+        self._pending = None # input not yet making a full block
+        self._output = None # computed output not handed out yet
+
+    def _start(self, channels):
+        if not self._mono_kernel and channels not in (1, self.kernel_f.shape[0]):
+            raise ValueError(f"Kernel has {self.kernel_f.shape[0]} channels, block has {channels}")
+        channels = max(channels, self.kernel_f.shape[0])
+        self.channels = channels
+        bins = self.block_size + 1
+        self._history = np.zeros((channels, self.block_size))
+        self._delay_line = np.zeros((channels, self.num_partitions - 1, bins), dtype=np.complex128)
+        self._pending = np.zeros((channels, 0))
+        self._output = np.zeros((channels, self.latency))
+
+    def _convolve_blocks(self, x):
+        """ x: (channels, K * block_size) of complete blocks -> same shape output """
+        B = self.block_size
+        P = self.num_partitions
+        K = x.shape[1] // B
+
+        # overlap-save segments [previous block, current block] as a strided view
+        stream = np.concatenate([self._history, x], axis=1)
+        segments = np.lib.stride_tricks.sliding_window_view(stream, 2 * B, axis=-1)[:, ::B][:, :K]
+        spectra = np.concatenate([self._delay_line, fft_engine.rfft(segments, axis=-1)], axis=1)
+
+        # partition p of the kernel meets the input spectrum from p blocks ago
+        output_f = np.zeros((self.channels, K, B + 1), dtype=np.complex128)
+        for p in range(P):
+            output_f += self.kernel_f[:, p:p + 1, :] * spectra[:, P - 1 - p:P - 1 - p + K, :]
+
+        self._delay_line = spectra[:, K:, :]
+        self._history = stream[:, -B:]
+
+        # the first half of every segment is circular wrap around, keep the second half
+        return fft_engine.irfft(output_f, 2 * B, axis=-1)[:, :, B:].reshape(self.channels, K * B)
+
+    def process(self, block, out=None):
+        mono = np.ndim(block) == 1
+        x = _as_channels(block)
+        self._mono = mono
+        if self.channels is None:
+            self._start(x.shape[0])
+        if x.shape[0] != self.channels:
+            if x.shape[0] != 1:
+                raise ValueError(f"Convolver runs {self.channels} channels, block has {x.shape[0]}")
+            x = np.broadcast_to(x, (self.channels, x.shape[1])) # one channel into every kernel channel
+
+        pending = np.concatenate([self._pending, x], axis=1)
+        complete = (pending.shape[1] // self.block_size) * self.block_size
+        step = self.max_batch * self.block_size
+
+        outputs = [self._output]
+        for start in range(0, complete, step):
+            outputs.append(self._convolve_blocks(pending[:, start:min(start + step, complete)]))
+        self._pending = pending[:, complete:]
+
+        output = np.concatenate(outputs, axis=1)
+        self._output = output[:, x.shape[1]:]
+        output = output[:, :x.shape[1]]
+        output = output[0] if mono and self.channels == 1 else output.T
+        if out is not None:
+            out[...] = output
+            return out
+        return output
+
+    def flush(self):
+        """ Push the tail out, the convolver is reset afterwards """
+        if self.channels is None:
+            return np.zeros(0)
+        length = self.latency + self.taps - 1
+        tail = self.process(np.zeros(length) if self._mono else np.zeros((length, self.channels)))
+        self.reset()
+        return tail
+
+def convolve(signal, kernel, method='auto', block_size=None):
+    """
+    Full linear convolution of (frames,) or (frames, channels) signals.
+
+    method: 'direct', 'fft' (partitioned overlap-save) or 'auto', which uses
+    direct for kernels up to DIRECT_MAX_TAPS taps.
+    """
+    kernel = np.asarray(kernel, dtype=np.float64)
+    if method == 'auto':
+        method = 'direct' if kernel.shape[0] <= DIRECT_MAX_TAPS else 'fft'
+
+    if method == 'direct':
+        return direct_convolution(signal, kernel)
+    if method != 'fft':
+        raise ValueError(f"Unknown convolution method: {method}")
+
+    signal = np.asarray(signal, dtype=np.float64)
+    if block_size is None:
+        # offline there is no latency budget, big partitions are the cheapest
+        block_size = min(16384, max(256, fft_engine.next_power_of_two(kernel.shape[0])))
+
+    convolver = CONVOLVER(kernel, block_size)
+    output = np.concatenate([convolver.process(signal), convolver.flush()], axis=0)
+    return output[convolver.latency:]
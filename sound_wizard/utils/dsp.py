@@ -1,70 +1,179 @@
-import matplotlib.pyplot as plt
+import functools
+
 import numpy as np
 
+from . import fft as fft_engine
+from . import convolution
+
 #add taylor series sine wave 
        
 class WINDOW:
-    def __init__(self, N):
+    """
+    Window functions of length N, all served from the get_window cache.
+    sym=True gives the symmetric window (filter design), sym=False the periodic one
+    (spectral analysis, STFT). Returned arrays are shared, so they are read-only.
+    """
+    def __init__(self, N, sym=True, dtype=np.float64):
         self.N = N
-        self.n = np.arange(N)
-        
+        self.sym = sym
+        self.dtype = dtype
+
+    @property
+    def n(self):
+        return np.arange(self.N)
+
     def rectangular(self):
-        return np.ones(self.N)
+        return get_window('rectangular', self.N, self.sym, self.dtype)
     
     def hanning(self):
-        # Formula: 0.5 - 0.5 * cos(2*pi*n / (N-1))
-        return 0.5 - 0.5 * np.cos((2 * np.pi * self.n) / (self.N - 1))
+        return get_window('hanning', self.N, self.sym, self.dtype)
 
     def hamming(self):
-        # Formula: 0.54 - 0.46 * cos(2*pi*n / (N-1))
-        return 0.54 - 0.46 * np.cos((2 * np.pi * self.n) / (self.N - 1))
+        return get_window('hamming', self.N, self.sym, self.dtype)
 
     def blackman(self):
-        # Formula: 0.42 - 0.5*cos(...) + 0.08*cos(...)
-        term1 = 0.5 * np.cos((2 * np.pi * self.n) / (self.N - 1))
-        term2 = 0.08 * np.cos((4 * np.pi * self.n) / (self.N - 1))
-        return 0.42 - term1 + term2
+        return get_window('blackman', self.N, self.sym, self.dtype)
     
     def bartlett(self):
-        # Triangle window
-        # Math: 1 - | (n - (N-1)/2) / ((N-1)/2) |
-        return 1.0 - np.abs((self.n - (self.N - 1) / 2.0) / ((self.N - 1) / 2.0))
+        return get_window('bartlett', self.N, self.sym, self.dtype)
 
-def time_domain_convolution(signal, kernel):
+    def flattop(self):
+        return get_window('flattop', self.N, self.sym, self.dtype)
 
-    N = len(signal)
-    M = len(kernel)
+    def kaiser(self, beta=8.6):
+        return get_window(('kaiser', beta), self.N, self.sym, self.dtype)
 
-    output_length = N + M - 1
+    def tukey(self, alpha=0.5):
+        return get_window(('tukey', alpha), self.N, self.sym, self.dtype)
 
-    output = [0] * output_length
+WINDOW_ALIASES = {'hann': 'hanning', 'boxcar': 'rectangular', 'triangle': 'bartlett', 'flat_top': 'flattop'}
 
-    for n in range(output_length):
-        accumulator = 0
+def get_window(window_type, N, sym=True, dtype=np.float64):
+    """
+    Cached window factory.
 
-        # formula: y[n] = sum(signal[n-k] * kernel[k])
-        for k in range(M):
-            if (n-k) >= 0 and (n-k) < N:
-                accumulator += signal[n-k] * kernel[k]
+    window_type: a name ('hanning', 'hamming', 'blackman', 'bartlett', 'rectangular', 'flattop',
+                 'kaiser', 'tukey') or (name, parameter), e.g. ('kaiser', 8.6), ('tukey', 0.25)
+    sym: symmetric (divides by N - 1) or periodic (divides by N) window
 
-            output[n] = accumulator
-    
-    return output
+    The same (type, N, sym, dtype) gives back the same read-only array.
+    """
+    if isinstance(window_type, str):
+        name, parameter = window_type, None
+    else:
+        name, parameter = window_type
+    name = name.lower()
+    name = WINDOW_ALIASES.get(name, name)
+    if parameter is not None:
+        parameter = float(parameter)
+    return _cached_window(name, parameter, int(N), bool(sym), np.dtype(dtype))
+
+@functools.lru_cache(maxsize=256)
+def _cached_window(name, parameter, N, sym, dtype):
+    if N < 1:
+        raise ValueError(f"Window length must be positive, got {N}")
+
+    if N == 1:
+        window = np.ones(1)
+    else:
+        # periodic window = symmetric window of N + 1 without its last point
+        M = N if sym else N + 1
+        window = _window(name, parameter, np.arange(M), M - 1)[:N]
+
+    window = window.astype(dtype)
+    window.setflags(write=False)
+    return window
+
+def _window(name, parameter, n, den):
+    if name == 'rectangular':
+        return np.ones(len(n))
+
+    if name == 'hanning':
+        # Formula: 0.5 - 0.5 * cos(2*pi*n / (N-1))
+        return 0.5 - 0.5 * np.cos((2 * np.pi * n) / den)
 
-def frequency_domain_convolution(signal, kernel):
+    if name == 'hamming':
+        # Formula: 0.54 - 0.46 * cos(2*pi*n / (N-1))
+        return 0.54 - 0.46 * np.cos((2 * np.pi * n) / den)
 
-    N = len(signal)
-    M = len(kernel)
+    if name == 'blackman':
+        # Formula: 0.42 - 0.5*cos(...) + 0.08*cos(...)
+        term1 = 0.5 * np.cos((2 * np.pi * n) / den)
+        term2 = 0.08 * np.cos((4 * np.pi * n) / den)
+        return 0.42 - term1 + term2
 
-    fft_length = N + M - 1
+    if name == 'bartlett':
+        # Triangle window
+        # Math: 1 - | (n - (N-1)/2) / ((N-1)/2) |
+        return 1.0 - np.abs((n - den / 2.0) / (den / 2.0))
+
+    if name == 'flattop':
+        # 5 term cosine sum, almost no scalloping loss, for amplitude measurements
+        a = [0.21557895, 0.41663158, 0.277263158, 0.083578947, 0.006947368]
+        phase = (2 * np.pi * n) / den
+        return a[0] - a[1] * np.cos(phase) + a[2] * np.cos(2 * phase) - a[3] * np.cos(3 * phase) + a[4] * np.cos(4 * phase)
+
+    if name == 'kaiser':
+        # I0(beta * sqrt(1 - (2n/(N-1) - 1)^2)) / I0(beta)
+        beta = 8.6 if parameter is None else parameter
+        ratio = 2.0 * n / den - 1.0
+        return np.i0(beta * np.sqrt(np.clip(1.0 - ratio ** 2, 0.0, None))) / np.i0(beta)
+
+    if name == 'tukey':
+        # flat top with cosine tapers over alpha of the length (alpha=0 rectangular, alpha=1 hanning)
+        alpha = 0.5 if parameter is None else parameter
+        if alpha <= 0:
+            return np.ones(len(n))
+        if alpha >= 1:
+            return _window('hanning', None, n, den)
+        x = n / den
+        window = np.ones(len(n))
+        left = x < alpha / 2
+        right = x > 1 - alpha / 2
+        window[left] = 0.5 * (1 + np.cos(np.pi * (2 * x[left] / alpha - 1)))
+        window[right] = 0.5 * (1 + np.cos(np.pi * (2 * x[right] / alpha - 2 / alpha + 1)))
+        return window
+
+    raise ValueError(f"Unknown window type: {name}")
 
-    signal_f = np.fft.fft(signal, fft_length)
-    kernel_f = np.fft.fft(kernel, fft_length)
+def time_domain_convolution(signal, kernel):
+    # formula: y[n] = sum(signal[n-k] * kernel[k]), vectorized over the signal, see utils/convolution.py
+    # for long kernels use convolution.convolve, it switches to partitioned FFT convolution
+    return convolution.direct_convolution(signal, kernel)
+
+def frequency_domain_convolution(signal, kernel, axis=-1):
+    """
+    Full linear convolution through the FFT along axis.
 
-    output_frequency_domain = signal_f * kernel_f # in frequency domain multiplication
+    signal can hold many signals, e.g. (frames, channels) with axis=0. kernel
+    is either 1-D (the same for every signal) or has the same shape as signal.
+    """
+    signal = np.asarray(signal)
+    kernel = np.asarray(kernel)
+    axis = axis % signal.ndim
 
-    output_time_domain = np.fft.ifft(output_frequency_domain) # return time domain
+    N = signal.shape[axis]
+    M = kernel.shape[axis] if kernel.ndim > 1 else len(kernel)
 
+    output_length = N + M - 1
+    fft_length = fft_engine.next_power_of_two(output_length) # radix-2 size, the tail is cut off below
+
+    # 1-D kernel lines up with the transform axis of the signal
+    kernel_axis = axis if kernel.ndim > 1 else -1
+    if kernel.ndim == 1 and axis != signal.ndim - 1:
+        kernel = kernel.reshape((-1,) + (1,) * (signal.ndim - 1 - axis))
+        kernel_axis = axis - signal.ndim
+
+    if np.iscomplexobj(signal) or np.iscomplexobj(kernel):
+        signal_f = fft_engine.fft(signal, fft_length, axis=axis)
+        kernel_f = fft_engine.fft(kernel, fft_length, axis=kernel_axis)
+        output_time_domain = fft_engine.ifft(signal_f * kernel_f, axis=axis) # in frequency domain multiplication
+    else:
+        signal_f = fft_engine.rfft(signal, fft_length, axis=axis)
+        kernel_f = fft_engine.rfft(kernel, fft_length, axis=kernel_axis)
+        output_time_domain = fft_engine.irfft(signal_f * kernel_f, fft_length, axis=axis) # return time domain
+
+    output_time_domain = np.take(output_time_domain, np.arange(output_length), axis=axis)
     return np.real(output_time_domain) # only real part
 
 def discrete_fourier_transform(x):
@@ -89,7 +198,7 @@ def discrete_fourier_transform(x):
 def fft_core(x, dir):
 
     """ 
-    *Recursive Cooley-Tukey FFT
+    *Cooley-Tukey FFT (engine in utils/fft.py)
 
     dir: -1 FFT, +1 IFFT e^(dir)2pi_j
 
@@ -115,37 +224,32 @@ def fft_core(x, dir):
     output[k] = evens[k] + turned_odds # adding
     output[k + len / 2] = evens[k] - turned_odds # sub
 
+    The engine does this iteratively: bit reverse once, then every stage is a
+    single vectorized butterfly with cached twiddles. Lengths that are not a
+    power of two go through Bluestein instead of giving wrong results.
     """
-    # add numpy vectorization later TODO TODO TODO TODO
-    
-    N = len(x)
+    return fft_engine.transform(x, dir) # -> complex array output
 
-    if N <= 1: # Recursion's Base Case
-        return x # Here is the number
-    
-    evens = fft_core(x[0::2], dir) # A, solve this
-    odds = fft_core(x[1::2], dir) # B, solve this
-
-    # odds and evens are calculated on this part
-
-    # combine
-    # each odd index shifts according to their k / N angle
-    T = [np.exp(dir * 2j * np.pi * k / N) * odds[k] for k in range(N // 2)] 
-
-    left_part = [evens[k] + T[k] for k in range(N // 2)]
-    right_part = [evens[k] - T[k] for k in range(N // 2)]
+# axis picks the transform axis, a (frames, channels) array from read_wav uses axis=0
+# and every channel is done in the same call. cache (a utils.cache.CACHE) keeps results
+# and hands them back for the same input, read-only.
 
-    return left_part + right_part # -> complex array output
+def fft(x, axis=-1, cache=None):
+    if cache is not None:
+        return cache.cached('fft', lambda: fft_engine.fft(x, axis=axis), (x,), {'axis': axis})
+    return fft_engine.fft(x, axis=axis)
 
-def fft(x):
-    return fft_core(x, dir=-1)
+def ifft(x, axis=-1):
+    return fft_engine.ifft(x, axis=axis)
 
-def ifft(x):
-    raw_output = fft_core(x, dir=1)
-    N = len(x)
+def rfft(x, axis=-1, cache=None):
+    # real input, only the n//2 + 1 non negative frequencies
+    if cache is not None:
+        return cache.cached('rfft', lambda: fft_engine.rfft(x, axis=axis), (x,), {'axis': axis})
+    return fft_engine.rfft(x, axis=axis)
 
-    normalized_output = [value / N for value in raw_output]
-    return normalized_output
+def irfft(x, n=None, axis=-1):
+    return fft_engine.irfft(x, n, axis=axis)
 
 def fft_freq(n, d=1.0):
     """
@@ -169,41 +273,142 @@ def fft_freq(n, d=1.0):
 
     return result
 
-def stft(signal, frame_size, hop_size, window_func):
-    # study this later TODO TODO TODO TODO
-    
-    signal_len = len(signal)
-    
-    num_frames = 1 + (signal_len - frame_size) // hop_size
-    
-    stft_matrix = []
-    
-    # m=0: [10 20 30 40] m=1: [30 40 50 60] m=2: [50 60 70 80]
-    for m in range(num_frames):
-        start_index = m * hop_size
-        end_index = start_index + frame_size
-        
-        chunk = signal[start_index:end_index]
-        windowed_chunk = chunk * window_func
-        
-        fft_result = fft(windowed_chunk)
-        fft_result = fft_result[:frame_size // 2]
-        
-        stft_matrix.append(fft_result)
-        
-        return np.array(stft_matrix).T
+def get_stft_window(window_func, frame_size):
+    # window_func is a get_window type ('hanning', ('kaiser', 8.6), ...) or an array
+    # names give the periodic window, the right one for spectral analysis
+    if isinstance(window_func, (str, tuple)):
+        window = get_window(window_func, frame_size, sym=False)
+    else:
+        window = np.asarray(window_func, dtype=np.float64)
+    if window.shape != (frame_size,):
+        raise ValueError(f"Window length {window.shape} does not match frame size {frame_size}")
+    return window
+
+def frame_signal(signal, frame_size, hop_size):
+    """
+    All frames of the last axis as a (..., num_frames, frame_size) strided view, nothing is copied.
+    m=0: [10 20 30 40] m=1: [30 40 50 60] m=2: [50 60 70 80]
+    """
+    return np.lib.stride_tricks.sliding_window_view(signal, frame_size, axis=-1)[..., ::hop_size, :]
 
-def auto_correlation(x):
-    N = len(x)
-    result = np.correlate(x, x, mode='full')
-    return result[N-1:]
+def stft(signal, frame_size, hop_size, window_func='hanning', center=False, pad_mode='reflect', cache=None):
+    """
+    Short time Fourier transform.
+
+    signal: 1-D, or (frames, channels) for multichannel audio
+    window_func: WINDOW method name or a window array of frame_size
+    center: pad frame_size // 2 on both sides so frame m is centred on sample m * hop_size
+    cache: a utils.cache.CACHE to keep the result in
+
+    Returns (frame_size // 2 + 1, num_frames) complex bins, (channels, bins, num_frames) for multichannel.
+    Every frame goes through one batched rfft.
+    """
+    if hop_size < 1 or frame_size < 1:
+        raise ValueError("frame_size and hop_size must be positive")
+    if cache is not None:
+        params = {'frame_size': frame_size, 'hop_size': hop_size, 'window_func': window_func, 'center': center,
+                  'pad_mode': pad_mode}
+        return cache.cached('stft', lambda: stft(signal, frame_size, hop_size, window_func, center, pad_mode),
+                            (signal,), params)
+
+    x = np.asarray(signal, dtype=np.float64)
+    if x.ndim == 2:
+        x = x.T # (channels, samples)
+    window = get_stft_window(window_func, frame_size)
+
+    if center:
+        pad = [(0, 0)] * (x.ndim - 1) + [(frame_size // 2, frame_size // 2)]
+        x = np.pad(x, pad, mode=pad_mode if x.shape[-1] > frame_size // 2 else 'constant')
+    if x.shape[-1] < frame_size:
+        x = np.pad(x, [(0, 0)] * (x.ndim - 1) + [(0, frame_size - x.shape[-1])])
+
+    frames = frame_signal(x, frame_size, hop_size)
+    stft_matrix = fft_engine.rfft(frames * window, axis=-1) # (..., num_frames, bins)
+
+    return np.swapaxes(stft_matrix, -1, -2)
+
+def overlap_add(frames, hop_size):
+    """
+    Sum (..., num_frames, frame_size) frames spaced hop_size apart.
+    Frames are cut in hop_size pieces, piece r of every frame lands r blocks
+    later, so the loop is over frame_size / hop_size pieces and not over frames.
+    """
+    num_frames, frame_size = frames.shape[-2:]
+    pieces = -(-frame_size // hop_size)
+    if pieces * hop_size != frame_size:
+        frames = np.concatenate([frames, np.zeros(frames.shape[:-1] + (pieces * hop_size - frame_size,))], axis=-1)
+
+    out = np.zeros(frames.shape[:-2] + (num_frames + pieces - 1, hop_size), dtype=frames.dtype)
+    for r in range(pieces):
+        out[..., r:r + num_frames, :] += frames[..., r * hop_size:(r + 1) * hop_size]
+
+    out = out.reshape(frames.shape[:-2] + (-1,))
+    return out[..., :(num_frames - 1) * hop_size + frame_size]
+
+def istft(stft_matrix, hop_size, window_func='hanning', center=False, length=None, frame_size=None):
+    """
+    Inverse of stft with weighted overlap-add.
+
+    Every frame is windowed again and the sum is divided by the overlapped
+    squared window, which gives back the signal for any window / hop where
+    that sum is not zero. Use the same frame_size, hop_size, window and center
+    as the stft. length trims (or zero pads) the output.
+    frame_size: like irfft's n, odd frame sizes have the same number of bins as the
+    even one below, so pass it for them. By default it is the length of a window
+    array, or 2 * (bins - 1) for a window name / (name, parameter) tuple.
+    """
+    stft_matrix = np.asarray(stft_matrix)
+    bins = stft_matrix.shape[-2]
+    if frame_size is None:
+        frame_size = 2 * (bins - 1) if isinstance(window_func, (str, tuple)) else len(window_func)
+    if frame_size // 2 + 1 != bins:
+        raise ValueError(f"frame_size {frame_size} gives {frame_size // 2 + 1} bins, the stft has {bins}")
+    window = get_stft_window(window_func, frame_size)
+
+    frames = fft_engine.irfft(np.swapaxes(stft_matrix, -1, -2), frame_size, axis=-1) # (..., num_frames, frame_size)
+    frames *= window
+
+    signal = overlap_add(frames, hop_size)
+    window_sum = overlap_add(np.broadcast_to(window ** 2, (frames.shape[-2], frame_size)), hop_size)
+
+    nonzero = window_sum > 1e-10
+    signal[..., nonzero] /= window_sum[nonzero]
+
+    if center:
+        signal = signal[..., frame_size // 2:]
+        if length is None:
+            signal = signal[..., :max(0, signal.shape[-1] - frame_size // 2)]
+    if length is not None:
+        if signal.shape[-1] < length:
+            signal = np.concatenate([signal, np.zeros(signal.shape[:-1] + (length - signal.shape[-1],))], axis=-1)
+        signal = signal[..., :length]
+
+    if signal.ndim == 2:
+        signal = signal.T # back to (frames, channels)
+    return signal
+
+def auto_correlation(x, axis=-1):
+    """
+    r[k] = sum(x[n] * x[n + k]) for k >= 0, through the FFT in O(N log N).
+    x can hold many signals (e.g. frames), each one along axis is done in one batched transform.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    x = np.moveaxis(x, axis, -1)
+    N = x.shape[-1]
+    fft_length = fft_engine.next_power_of_two(2 * N - 1) # no circular wrap around
+    spectrum = fft_engine.rfft(x, fft_length, axis=-1)
+    result = fft_engine.irfft(spectrum.real ** 2 + spectrum.imag ** 2, fft_length, axis=-1)[..., :N]
+    return np.moveaxis(result, -1, axis)
 
 def cross_corelation(x, y):
+    # same as np.correlate(x, y, mode='full')[len(x) - 1:], convolution with y reversed through the FFT
     N = len(x)
-    result = np.correlate(x, y, mode='full')
+    result = frequency_domain_convolution(x, np.conj(np.asarray(y)[::-1]))
     return result[N-1:]
 
 def plot_fft(_time, _original_signal, _freq_axis_half, _fft_mag_half):
+    # matplotlib is heavy, only load it when something is actually plotted
+    import matplotlib.pyplot as plt
 
     # --- ADIM 4: ÇİZİM (PLOTTING) ---
     plt.figure(figsize=(12, 8)) # Geniş bir tuval açalım
@@ -0,0 +1,232 @@
+import functools
+
+import numpy as np
+
+# FFT engine behind dsp.fft / dsp.ifft
+#
+# power of two sizes: iterative radix-2, one vectorized butterfly pass per stage
+# other sizes: Bluestein (chirp-z), a circular convolution done with radix-2
+# bit reversal permutations, twiddle tables and Bluestein chirps are cached per size
+#
+# every function transforms one axis (default last) of an n-d array, so a whole
+# batch of signals ((frames, channels), (batch, n), ...) shares one plan and one
+# vectorized pass per stage
+
+FORWARD = -1
+INVERSE = 1
+
+def is_power_of_two(n):
+    return n > 0 and (n & (n - 1)) == 0
+
+def next_power_of_two(n):
+    return 1 << max(0, int(n) - 1).bit_length()
+
+def _read_only(array):
+    array.setflags(write=False)
+    return array
+
+@functools.lru_cache(maxsize=64)
+def bit_reversal(n):
+    """ Bit reversed index permutation for a power of two n """
+    bits = n.bit_length() - 1
+    index = np.arange(n)
+    reversed_index = np.zeros(n, dtype=np.intp)
+    for b in range(bits):
+        reversed_index |= ((index >> b) & 1) << (bits - 1 - b)
+    return _read_only(reversed_index)
+
+@functools.lru_cache(maxsize=64)
+def twiddles(n, direction):
+    """ e^(dir * 2pi j * k / n) for k < n/2, stage of size m uses every (n/m)th one """
+    return _read_only(np.exp(direction * 2j * np.pi * np.arange(n // 2) / n))
+
+@functools.lru_cache(maxsize=32)
+def bluestein_plan(n, direction):
+    """ Chirp and the spectrum of the conjugate chirp filter for a length n transform """
+    k = np.arange(n)
+    # k^2 mod 2n keeps the angle small, k*k/n loses precision for large k
+    chirp = np.exp(direction * 1j * np.pi * ((k * k) % (2 * n)) / n)
+
+    m = next_power_of_two(2 * n - 1)
+    kernel = np.zeros(m, dtype=np.complex128)
+    kernel[:n] = np.conj(chirp)
+    kernel[m - n + 1:] = np.conj(chirp[1:])[::-1] # negative lags wrap around
+
+    return _read_only(chirp), m, _read_only(radix2(kernel, FORWARD))
+
+@functools.lru_cache(maxsize=32)
+def rfft_plan(n):
+    """ Index and twiddles to split the n/2 point FFT of a packed real signal """
+    half = n // 2
+    k = np.arange(half + 1)
+    return (_read_only(k % half), _read_only((-k) % half),
+            _read_only(np.exp(-2j * np.pi * k / n)))
+
+def radix2(x, direction):
+    """
+    Iterative Cooley-Tukey over the last axis (power of two length).
+
+    After the bit reversal every stage is one vectorized butterfly over
+    all blocks:
+
+    evens = [A, B, C, D], odds = [x, y, z, w] (inside every block of size m)
+    t = odds * twiddle(k / m)
+    block[k] = evens[k] + t[k]
+    block[k + m / 2] = evens[k] - t[k]
+    """
+    n = x.shape[-1]
+    # fancy indexing gives us our own copy, contiguous so the stage reshapes below are views
+    out = np.ascontiguousarray(np.asarray(x, dtype=np.complex128)[..., bit_reversal(n)])
+    if n <= 1:
+        return out
+
+    batch = out.shape[:-1]
+    w = twiddles(n, direction)
+    scratch = np.empty(batch + (n // 2,), dtype=np.complex128)
+
+    half = 1
+    while half < n:
+        m = 2 * half
+        blocks = out.reshape(batch + (n // m, 2, half))
+        evens = blocks[..., 0, :]
+        odds = blocks[..., 1, :]
+        t = scratch.reshape(batch + (n // m, half))
+
+        np.multiply(odds, w[::n // m], out=t)
+        np.subtract(evens, t, out=odds)
+        np.add(evens, t, out=evens)
+        half = m
+
+    return out
+
+def bluestein(x, direction):
+    """ Any length DFT over the last axis as a power of two convolution """
+    n = x.shape[-1]
+    chirp, m, kernel_f = bluestein_plan(n, direction)
+
+    padded = np.zeros(x.shape[:-1] + (m,), dtype=np.complex128)
+    np.multiply(x, chirp, out=padded[..., :n])
+
+    spectrum = radix2(padded, FORWARD)
+    spectrum *= kernel_f
+    convolved = radix2(spectrum, INVERSE)
+
+    out = convolved[..., :n]
+    out *= chirp / m
+    return out
+
+def transform(x, direction):
+    """ Unnormalized DFT over the last axis, direction -1 forward, +1 inverse """
+    x = np.asarray(x)
+    n = x.shape[-1]
+    if n == 0:
+        return np.zeros(x.shape, dtype=np.complex128)
+    if is_power_of_two(n):
+        return radix2(x, direction)
+    return bluestein(x, direction)
+
+def _fit(x, n):
+    """ Zero pad or truncate the last axis to n """
+    x = np.asarray(x)
+    if n is None or n == x.shape[-1]:
+        return x
+    if n < 1:
+        raise ValueError(f"Invalid number of FFT points: {n}")
+    if n < x.shape[-1]:
+        return x[..., :n]
+    padded = np.zeros(x.shape[:-1] + (n,), dtype=np.result_type(x.dtype, np.float64))
+    padded[..., :x.shape[-1]] = x
+    return padded
+
+def _along(func, x, axis, *args):
+    """ Run func (which works on the last axis) along axis """
+    x = np.asarray(x)
+    if x.ndim == 0:
+        raise ValueError("FFT input must have at least one dimension")
+    axis = axis % x.ndim
+    if axis == x.ndim - 1:
+        return func(x, *args)
+    return np.moveaxis(func(np.moveaxis(x, axis, -1), *args), -1, axis)
+
+def fft(x, n=None, axis=-1):
+    return _along(_fft, x, axis, n)
+
+def ifft(x, n=None, axis=-1):
+    return _along(_ifft, x, axis, n)
+
+def rfft(x, n=None, axis=-1):
+    """
+    FFT of a real signal, returns the n//2 + 1 non negative frequency bins.
+
+    Even lengths pack the signal into a half length complex one
+    (z = evens + j * odds), do one n/2 point FFT and split the result.
+    """
+    return _along(_rfft, x, axis, n)
+
+def irfft(X, n=None, axis=-1):
+    """ Inverse of rfft, n defaults to 2 * (len(X) - 1) """
+    return _along(_irfft, X, axis, n)
+
+def _fft(x, n):
+    return transform(_fit(x, n), FORWARD)
+
+def _ifft(x, n):
+    x = _fit(x, n)
+    out = transform(x, INVERSE)
+    out /= max(1, x.shape[-1])
+    return out
+
+def _rfft(x, n):
+    x = _fit(x, n)
+    if np.iscomplexobj(x):
+        raise TypeError("rfft expects a real signal")
+    n = x.shape[-1]
+
+    if n % 2 != 0 or n < 2:
+        return transform(x, FORWARD)[..., :n // 2 + 1]
+
+    z = np.empty(x.shape[:-1] + (n // 2,), dtype=np.complex128)
+    z.real = x[..., 0::2]
+    z.imag = x[..., 1::2]
+    Z = transform(z, FORWARD)
+
+    index, mirror, w = rfft_plan(n)
+    Zk = Z[..., index]
+    Zc = np.conj(Z[..., mirror])
+
+    evens = (Zk + Zc) * 0.5 # spectrum of x[0::2]
+    odds = (Zk - Zc) * -0.5j # spectrum of x[1::2]
+    odds *= w
+    evens += odds
+    return evens
+
+def _irfft(X, n):
+    X = np.asarray(X, dtype=np.complex128)
+    if n is None:
+        n = 2 * (X.shape[-1] - 1)
+    if n < 1:
+        raise ValueError(f"Invalid number of FFT points: {n}")
+    half = n // 2
+    X = _fit(X, half + 1)
+
+    if n % 2 != 0:
+        # rebuild the full hermitian spectrum
+        full = np.concatenate([X, np.conj(X[..., 1:half + 1][..., ::-1])], axis=-1)
+        return _ifft(full, None).real
+
+    index, mirror, w = rfft_plan(n)
+    Xk = X[..., :half]
+    Xc = np.conj(X[..., half - np.arange(half)])
+
+    evens = (Xk + Xc) * 0.5
+    odds = (Xk - Xc) * 0.5
+    odds *= np.conj(w[:half])
+    evens += 1j * odds
+
+    z = transform(evens, INVERSE)
+    z /= half
+
+    out = np.empty(X.shape[:-1] + (n,), dtype=np.float64)
+    out[..., 0::2] = z.real
+    out[..., 1::2] = z.imag
+    return out
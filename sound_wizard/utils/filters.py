@@ -0,0 +1,213 @@
+import functools
+
+import numpy as np
+
+from .fft import _read_only
+
+# samples per block of the block state-space kernel and frames per call of it
+KERNEL_BLOCK = 64
+KERNEL_CHUNK = 65536
+
+BIQUAD_TYPES = ('lowpass', 'highpass', 'bandpass', 'notch', 'allpass', 'peaking', 'lowshelf', 'highshelf')
+BUTTERWORTH_Q = 1 / np.sqrt(2)
+
+def as_sos(sos):
+    """ (sections, 6) rows of b0 b1 b2 a0 a1 a2, normalized to a0 = 1 """
+    sos = np.atleast_2d(np.asarray(sos, dtype=np.float64))
+    if sos.ndim != 2 or sos.shape[1] != 6 or sos.shape[0] == 0:
+        raise ValueError(f"Second order sections must have shape (sections, 6), got {sos.shape}")
+    if np.any(sos[:, 3] == 0):
+        raise ValueError("a0 of a section can't be 0")
+    return sos / sos[:, 3:4]
+
+def state_space(sos):
+    """
+    (A, B, C, D) of a cascade of second order sections:
+        state' = A @ state + B * x,  y = C @ state + D * x
+
+    The state holds the two transposed direct form II delays of every section,
+    section after section, so it has shape (2 * sections,).
+    """
+    sections = as_sos(sos)
+    order = 2 * len(sections)
+    A = np.zeros((order, order))
+    B = np.zeros(order)
+    C = np.zeros(order)
+    D = 1.0
+
+    for i, (b0, b1, b2, _, a1, a2) in enumerate(sections):
+        k = 2 * i
+        # the input of this section is the output of the ones before: u = C @ state + D * x
+        gains = np.array([b1 - a1 * b0, b2 - a2 * b0])
+        A[k:k + 2, k:k + 2] = [[-a1, 1.0], [-a2, 0.0]]
+        A[k:k + 2, :k] = np.outer(gains, C[:k])
+        B[k:k + 2] = gains * D
+        # y = first delay + b0 * u
+        C[:k] *= b0
+        C[k] = 1.0
+        D *= b0
+    return A, B, C, D
+
+@functools.lru_cache(maxsize=64)
+def block_kernel(sos_key, block=KERNEL_BLOCK):
+    """
+    Matrices that filter `block` samples at once (read-only, cached per filter):
+        T (block, block): the impulse response as a lower triangular Toeplitz matrix
+        Z (block, order): output of the initial state, C @ A^n
+        G (order, block): state at the end of the block from its input, A^(block-1-k) @ B
+        powers (block + 1, order, order): A^n
+    sos_key: the sections as a tuple of 6-tuples
+    """
+    A, B, C, D = state_space(np.array(sos_key))
+    order = len(B)
+
+    powers = np.empty((block + 1, order, order))
+    powers[0] = np.eye(order)
+    for n in range(1, block + 1):
+        powers[n] = A @ powers[n - 1]
+
+    impulse = np.empty(block)
+    impulse[0] = D
+    impulse[1:] = (C @ powers[:block - 1] @ B)
+    lags = np.subtract.outer(np.arange(block), np.arange(block))
+    T = np.where(lags >= 0, impulse[np.clip(lags, 0, None)], 0.0)
+
+    Z = C @ powers[:block] # (block, order)
+    G = (powers[block - 1::-1] @ B).T # column k is A^(block-1-k) @ B
+    return _read_only(T), _read_only(Z), _read_only(G), _read_only(powers)
+
+def _filter_blocks(kernel, x, state):
+    """
+    x: (channels, N), state: (channels, order) -> y, final state.
+
+    Inside a block the output is the block convolved with the impulse response plus
+    the response to the state at its start, both one matmul over all blocks. The
+    block start states follow s[j + 1] = P @ s[j] + u[j] (P = A^block), a linear
+    recurrence solved with a log2(blocks) step scan, which stops early once P^d has
+    decayed below rounding.
+    """
+    T, Z, G, powers = kernel
+    block = T.shape[0]
+    channels, N = x.shape
+    num_blocks = -(-N // block)
+
+    padded = np.zeros((channels, num_blocks * block))
+    padded[:, :N] = x
+    X = padded.reshape(channels, num_blocks, block)
+
+    starts = np.empty((channels, num_blocks + 1, state.shape[1]))
+    starts[:, 0] = state
+    starts[:, 1:] = X @ G.T
+    step = 1
+    P = powers[block]
+    while step <= num_blocks and np.abs(P).max() > 1e-18:
+        starts[:, step:] += starts[:, :-step] @ P.T
+        P = P @ P
+        step *= 2
+
+    Y = X @ T.T
+    Y += starts[:, :num_blocks] @ Z.T
+
+    # the last block can be partial, its end state only sees `rest` samples
+    rest = N - (num_blocks - 1) * block
+    final = starts[:, num_blocks - 1] @ powers[rest].T + X[:, -1, :rest] @ G[:, block - rest:].T
+    return Y.reshape(channels, -1)[:, :N], final
+
+def sosfilt(sos, x, zi=None):
+    """
+    Filter (frames,) or (frames, channels) through a cascade of second order sections.
+
+    zi: state to start from, (channels, sections, 2) or (sections, 2) for 1-D x
+        (transposed direct form II delays). With zi the final state is returned too:
+        (y, zf), feed zf into the next call to filter a stream block by block.
+
+    No Python loop runs per sample: see _filter_blocks.
+    """
+    sections = as_sos(sos)
+    x = np.asarray(x, dtype=np.float64)
+    mono = x.ndim == 1
+    channels_first = x[np.newaxis, :] if mono else x.T
+    channels = channels_first.shape[0]
+    order = 2 * len(sections)
+
+    state = np.zeros((channels, order))
+    if zi is not None:
+        state[...] = np.reshape(zi, (channels, order))
+
+    y = np.empty(channels_first.shape)
+    if x.shape[0]:
+        kernel = block_kernel(tuple(map(tuple, sections.tolist())))
+        for start in range(0, x.shape[0], KERNEL_CHUNK):
+            stop = start + KERNEL_CHUNK
+            y[:, start:stop], state = _filter_blocks(kernel, channels_first[:, start:stop], state)
+
+    y = y[0] if mono else y.T
+    if zi is None:
+        return y
+    zf = state.reshape((len(sections), 2) if mono else (channels, len(sections), 2))
+    return y, zf
+
+@functools.lru_cache(maxsize=256)
+def biquad(filter_type, frequency, sample_rate, q=BUTTERWORTH_Q, gain_db=0.0):
+    """
+    One second order section (b0 b1 b2 1 a1 a2, read-only, cached) from the RBJ
+    Audio EQ Cookbook.
+
+    frequency: cutoff / centre / shelf midpoint in Hz, below sample_rate / 2
+    q: quality factor, for the shelves the default BUTTERWORTH_Q is the steepest slope without overshoot
+    gain_db: boost or cut of peaking and shelf filters, ignored by the others
+    bandpass has 0 dB gain at the centre.
+    """
+    if not 0 < frequency < sample_rate / 2:
+        raise ValueError(f"Frequency {frequency} Hz must be between 0 and {sample_rate / 2} Hz")
+    if q <= 0:
+        raise ValueError("q must be positive")
+
+    w0 = 2 * np.pi * frequency / sample_rate
+    cos, sin = np.cos(w0), np.sin(w0)
+    alpha = sin / (2 * q)
+    A = 10 ** (gain_db / 40)
+
+    if filter_type == 'lowpass':
+        b, a = [(1 - cos) / 2, 1 - cos, (1 - cos) / 2], [1 + alpha, -2 * cos, 1 - alpha]
+    elif filter_type == 'highpass':
+        b, a = [(1 + cos) / 2, -(1 + cos), (1 + cos) / 2], [1 + alpha, -2 * cos, 1 - alpha]
+    elif filter_type == 'bandpass':
+        b, a = [alpha, 0.0, -alpha], [1 + alpha, -2 * cos, 1 - alpha]
+    elif filter_type == 'notch':
+        b, a = [1.0, -2 * cos, 1.0], [1 + alpha, -2 * cos, 1 - alpha]
+    elif filter_type == 'allpass':
+        b, a = [1 - alpha, -2 * cos, 1 + alpha], [1 + alpha, -2 * cos, 1 - alpha]
+    elif filter_type == 'peaking':
+        b, a = [1 + alpha * A, -2 * cos, 1 - alpha * A], [1 + alpha / A, -2 * cos, 1 - alpha / A]
+    elif filter_type in ('lowshelf', 'highshelf'):
+        sign = 1 if filter_type == 'lowshelf' else -1 # the high shelf mirrors the low one
+        root = 2 * np.sqrt(A) * alpha
+        b = [A * ((A + 1) - sign * (A - 1) * cos + root),
+             sign * 2 * A * ((A - 1) - sign * (A + 1) * cos),
+             A * ((A + 1) - sign * (A - 1) * cos - root)]
+        a = [(A + 1) + sign * (A - 1) * cos + root,
+             -sign * 2 * ((A - 1) + sign * (A + 1) * cos),
+             (A + 1) + sign * (A - 1) * cos - root]
+    else:
+        raise ValueError(f"Unknown filter type: {filter_type}, expected one of {BIQUAD_TYPES}")
+
+    return _read_only(as_sos(b + a)[0])
+
+def butterworth_q(order):
+    """ Q of each section of an even order Butterworth filter built from biquads """
+    if order < 2 or order % 2:
+        raise ValueError(f"Butterworth order must be even and at least 2, got {order}")
+    k = np.arange(order // 2)
+    return 1 / (2 * np.cos((2 * k + 1) * np.pi / (2 * order)))
+
+def cascade(*sections):
+    """ Stack sections and cascades into one (sections, 6) array, run first to last """
+    return np.vstack([as_sos(section) for section in sections])
+
+def frequency_response(sos, frequencies, sample_rate):
+    """ Complex response of the cascade at frequencies in Hz, the product of the sections """
+    sections = as_sos(sos)
+    z = np.exp(-2j * np.pi * np.asarray(frequencies, dtype=np.float64) / sample_rate)[..., np.newaxis] # z^-1
+    powers = z ** np.arange(3)
+    return np.prod((powers @ sections[:, :3].T) / (powers @ sections[:, 3:].T), axis=-1)
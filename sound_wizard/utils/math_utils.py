@@ -51,11 +51,11 @@ def distance(point_a, point_b):
     return _sqrt(dx * dx + dy * dy)
 
 def amp_to_db(amplitude):
-    # Protect against zero (silence)
-    if amplitude <= 0:
-        return -100.0 # A "noise floor" lower limit
-        
-    return 20 * np.log10(amplitude)
+    # works on arrays too, protect against zero (silence)
+    amplitude = np.asarray(amplitude, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        db = np.where(amplitude > 0, 20 * np.log10(amplitude), -100.0) # A "noise floor" lower limit
+    return db if db.ndim else float(db)
 
 def db_to_amp(db):
     # The inverse: Amplitude = 10^(dB/20)
@@ -0,0 +1,324 @@
+import concurrent.futures
+import functools
+
+import numpy as np
+
+from . import filters
+from .math_utils import amp_to_db
+from .resample import RESAMPLER
+from ..formats.wav_read import info_wav, iter_blocks
+
+# EBU R128 / ITU-R BS.1770-4
+SUBBLOCKS_PER_SECOND = 10 # loudness is kept per 100 ms
+MOMENTARY_SUBBLOCKS = 4 # 400 ms
+SHORT_TERM_SUBBLOCKS = 30 # 3 s
+ABSOLUTE_GATE = -70.0 # LUFS
+RELATIVE_GATE = -10.0 # LU below the absolutely gated loudness
+RANGE_RELATIVE_GATE = -20.0 # LU, for the loudness range
+
+@functools.lru_cache(maxsize=16)
+def k_weighting(sample_rate):
+    """
+    K-weighting filter of BS.1770 as second order sections (read-only, cached):
+    a +4 dB high shelf (head effect) followed by a 38 Hz highpass (RLB).
+    The analog prototypes are mapped to sample_rate, at 48 kHz these are the
+    coefficients of the standard.
+    """
+    K = np.tan(np.pi * 1681.974450955533 / sample_rate)
+    Q = 0.7071752369554196
+    Vh = 10 ** (3.999843853973347 / 20)
+    Vb = Vh ** 0.4996667741545416
+    a0 = 1 + K / Q + K * K
+    shelf = [(Vh + Vb * K / Q + K * K) / a0, 2 * (K * K - Vh) / a0, (Vh - Vb * K / Q + K * K) / a0,
+             1.0, 2 * (K * K - 1) / a0, (1 - K / Q + K * K) / a0]
+
+    K = np.tan(np.pi * 38.13547087602444 / sample_rate)
+    Q = 0.5003270373238773
+    a0 = 1 + K / Q + K * K
+    highpass = [1.0, -2.0, 1.0, 1.0, 2 * (K * K - 1) / a0, (1 - K / Q + K * K) / a0]
+
+    sos = np.array([shelf, highpass])
+    sos.setflags(write=False)
+    return sos
+
+def channel_weights(channels):
+    """ BS.1770 weights, 5.1 in L R C LFE Ls Rs order leaves out the LFE and lifts the surrounds """
+    if channels == 6:
+        return np.array([1.0, 1.0, 1.0, 0.0, 1.41, 1.41])
+    return np.ones(channels)
+
+def loudness(mean_square):
+    """ LUFS of K-weighted, channel weighted mean squares, -inf for silence """
+    with np.errstate(divide='ignore'):
+        return -0.691 + 10 * np.log10(mean_square)
+
+def true_peak_factor(sample_rate):
+    # BS.1770 asks for at least 192 kHz when looking for inter-sample peaks
+    return 4 if sample_rate < 96000 else 2 if sample_rate < 192000 else 1
+
+class METER:
+    """
+    Level and loudness of a stream in one pass: per channel RMS, sample peak and
+    true peak (oversampled), and EBU R128 momentary / short-term / integrated
+    loudness and loudness range.
+
+        meter = METER(48000, 2)
+        for block in iter_blocks("mix.wav", 65536):
+            meter.process(block)
+        meter.finish()
+        meter.integrated_loudness(), meter.true_peak
+
+    process(block, out=None) passes the block through unchanged, so a METER can
+    also sit in an EffectChain.
+
+    Loudness is kept as energy per absolute 100 ms sub-block (start is the frame
+    the first processed block begins at), so meters of separate parts of a file
+    can be merge()d into the meter of the whole file. warmup() and the lookahead of
+    finish() give the filters the audio around a part, which makes the merged
+    result the same as a single pass (see meter_wav).
+    """
+    def __init__(self, sample_rate, channels, start=0, true_peak=True, weights=None):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.start = start
+        self.weights = channel_weights(channels) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.sos = k_weighting(sample_rate)
+
+        self._zi = np.zeros((channels, len(self.sos), 2))
+        self._position = start # absolute index of the next frame
+        self.frames = 0
+        self._sum_squares = np.zeros(channels)
+        self._peak = np.zeros(channels)
+
+        self._first = None # absolute index of the first sub-block in _energy
+        self._used = 0
+        self._energy = np.zeros(0) # K-weighted, channel weighted sum of squares per sub-block
+        self._count = np.zeros(0, dtype=np.int64) # frames per sub-block
+
+        self.factor = true_peak_factor(sample_rate) if true_peak else 0
+        self._resampler = RESAMPLER(sample_rate, sample_rate * self.factor) if self.factor > 1 else None
+        self._warm_frames = 0 # frames given to warmup()
+        self._seen = 0 # oversampled frames out of the resampler so far
+        self._true_peak = np.zeros(channels)
+        self._finished = False
+
+    @property
+    def lookahead_frames(self):
+        """ Frames after the end finish() can use for the true peak """
+        return self._resampler.taps // 2 + 1 if self._resampler is not None else 0
+
+    def _as_block(self, block):
+        x = np.asarray(block, dtype=np.float64)
+        x = x[:, np.newaxis] if x.ndim == 1 else x
+        if x.shape[1] != self.channels:
+            raise ValueError(f"METER has {self.channels} channels, block has {x.shape[1]}")
+        return x
+
+    def warmup(self, block):
+        """ Audio right before start: runs through the filters but is not measured """
+        if self.frames:
+            raise ValueError("warmup() has to come before the first process()")
+        x = self._as_block(block)
+        _, self._zi = filters.sosfilt(self.sos, x, self._zi)
+        if self._resampler is not None:
+            self._seen += len(self._resampler.process(x))
+            self._warm_frames += x.shape[0]
+
+    def _oversampled(self, x, limit):
+        # peaks of the resampler output that belongs to the measured frames (below `limit`)
+        output = self._resampler.process(x) if x is not None else self._resampler.flush()
+        first = self._warm_frames * self.factor - self._seen
+        self._seen += len(output)
+        output = output[max(0, first):max(0, limit - self._seen + len(output))]
+        if len(output):
+            np.maximum(self._true_peak, np.abs(output).max(axis=0), out=self._true_peak)
+
+    def process(self, block, out=None):
+        if self._finished:
+            raise ValueError("METER is finished")
+        x = self._as_block(block)
+        n = x.shape[0]
+        if n:
+            self._sum_squares += np.einsum('nc,nc->c', x, x)
+            np.maximum(self._peak, np.abs(x).max(axis=0), out=self._peak)
+
+            weighted, self._zi = filters.sosfilt(self.sos, x, self._zi)
+            energy = np.square(weighted) @ self.weights
+
+            subblocks = (np.arange(self._position, self._position + n) * SUBBLOCKS_PER_SECOND) // self.sample_rate
+            first = int(subblocks[0])
+            self._accumulate(first, np.bincount(subblocks - first, weights=energy),
+                             np.bincount(subblocks - first))
+
+            self._position += n
+            self.frames += n
+            if self._resampler is not None:
+                self._oversampled(x, (self._warm_frames + self.frames) * self.factor)
+
+        if out is None:
+            return block
+        if out is not block:
+            out[...] = block
+        return out
+
+    def finish(self, lookahead=None):
+        """
+        Complete the true peak. lookahead: the frames after the end (lookahead_frames
+        are enough), without it the stream is taken to end here.
+        """
+        if self._finished:
+            return self
+        self._finished = True
+        if self._resampler is not None:
+            limit = (self._warm_frames + self.frames) * self.factor
+            if lookahead is not None and len(lookahead):
+                self._oversampled(self._as_block(lookahead), limit)
+            self._oversampled(None, limit)
+        return self
+
+    def _accumulate(self, first, energy, count):
+        if self._first is None:
+            self._first = first
+        low = min(self._first, first)
+        high = max(self._first + self._used, first + len(energy))
+        if low < self._first or high - low > len(self._energy):
+            size = max(high - low, 2 * len(self._energy))
+            grown_energy = np.zeros(size)
+            grown_count = np.zeros(size, dtype=np.int64)
+            offset = self._first - low
+            grown_energy[offset:offset + self._used] = self._energy[:self._used]
+            grown_count[offset:offset + self._used] = self._count[:self._used]
+            self._energy, self._count, self._first = grown_energy, grown_count, low
+        self._used = high - low
+
+        offset = first - self._first
+        self._energy[offset:offset + len(energy)] += energy
+        self._count[offset:offset + len(count)] += count
+
+    def merge(self, other):
+        """
+        Add the measurements of another METER (another part of the same stream) to this one.
+        Both are finished first, the merged meter can't process more blocks.
+        """
+        if (other.sample_rate, other.channels, other.factor) != (self.sample_rate, self.channels, self.factor):
+            raise ValueError("Only meters of the same sample rate, channels and true peak setting can be merged")
+        self.finish()
+        other.finish()
+        self.frames += other.frames
+        self._sum_squares += other._sum_squares
+        np.maximum(self._peak, other._peak, out=self._peak)
+        np.maximum(self._true_peak, other._true_peak, out=self._true_peak)
+        if other._first is not None:
+            self._accumulate(other._first, other._energy[:other._used], other._count[:other._used])
+        self.start = min(self.start, other.start)
+        return self
+
+    @property
+    def rms(self):
+        return np.sqrt(self._sum_squares / max(1, self.frames))
+
+    @property
+    def peak(self):
+        return self._peak.copy()
+
+    @property
+    def true_peak(self):
+        """ Oversampled peak per channel (never below the sample peak), finishes the meter """
+        self.finish()
+        return np.maximum(self._true_peak, self._peak)
+
+    def _window_mean_squares(self, subblocks):
+        """ Mean square of every complete window of `subblocks` sub-blocks, one per 100 ms step """
+        if self._first is None or self._used < subblocks:
+            return np.zeros(0)
+        index = np.arange(self._first, self._first + self._used + 1, dtype=np.int64)
+        bounds = -(-index * self.sample_rate // SUBBLOCKS_PER_SECOND) # first frame of every sub-block
+        complete = self._count[:self._used] == np.diff(bounds)
+
+        def window_sums(values):
+            total = np.concatenate([[0], np.cumsum(values)])
+            return total[subblocks:] - total[:-subblocks]
+
+        full = window_sums(complete) == subblocks
+        return (window_sums(self._energy[:self._used]) / np.maximum(1, window_sums(self._count[:self._used])))[full]
+
+    def momentary_loudness(self):
+        """ LUFS of every 400 ms window, 100 ms apart """
+        return loudness(self._window_mean_squares(MOMENTARY_SUBBLOCKS))
+
+    def short_term_loudness(self):
+        """ LUFS of every 3 s window, 100 ms apart """
+        return loudness(self._window_mean_squares(SHORT_TERM_SUBBLOCKS))
+
+    def integrated_loudness(self):
+        """ Gated loudness of the whole stream in LUFS (BS.1770-4), -inf when everything is gated """
+        mean_squares = self._window_mean_squares(MOMENTARY_SUBBLOCKS)
+        mean_squares = mean_squares[loudness(mean_squares) > ABSOLUTE_GATE]
+        if len(mean_squares) == 0:
+            return float('-inf')
+        gate = loudness(mean_squares.mean()) + RELATIVE_GATE
+        return float(loudness(mean_squares[loudness(mean_squares) > gate].mean()))
+
+    def loudness_range(self):
+        """ LRA in LU (EBU Tech 3342): spread of the gated short-term loudness, 10th to 95th percentile """
+        mean_squares = self._window_mean_squares(SHORT_TERM_SUBBLOCKS)
+        mean_squares = mean_squares[loudness(mean_squares) > ABSOLUTE_GATE]
+        if len(mean_squares) == 0:
+            return 0.0
+        gate = loudness(mean_squares.mean()) + RANGE_RELATIVE_GATE
+        values = loudness(mean_squares[loudness(mean_squares) > gate])
+        low, high = np.percentile(values, [10, 95])
+        return float(high - low)
+
+    def summary(self):
+        """ Everything in dB: dBFS per channel for levels, LUFS / LU for loudness """
+        momentary = self.momentary_loudness()
+        short_term = self.short_term_loudness()
+        return {
+            'frames': self.frames,
+            'rms_db': amp_to_db(self.rms),
+            'peak_db': amp_to_db(self.peak),
+            'true_peak_db': amp_to_db(self.true_peak),
+            'integrated_loudness': self.integrated_loudness(),
+            'loudness_range': self.loudness_range(),
+            'max_momentary': float(momentary.max()) if len(momentary) else float('-inf'),
+            'max_short_term': float(short_term.max()) if len(short_term) else float('-inf'),
+        }
+
+def meter_wav(file, start=0, stop=None, block_frames=65536, preroll_seconds=0.5, true_peak=True):
+    """
+    Meter frames start..stop of a WAV file, streamed block by block. The preroll
+    before start and the frames after stop only settle the filters, so meters of
+    neighbouring parts merge into the meter of the whole file.
+    """
+    info = info_wav(file)
+    stop = info['num_frames'] if stop is None else min(stop, info['num_frames'])
+    meter = METER(info['sample_rate'], info['channels'], start, true_peak)
+
+    preroll = int(preroll_seconds * info['sample_rate'])
+    for block in iter_blocks(file, block_frames, max(0, start - preroll), start, dtype=np.float64):
+        meter.warmup(block)
+    for block in iter_blocks(file, block_frames, start, stop, dtype=np.float64):
+        meter.process(block)
+
+    lookahead = list(iter_blocks(file, max(1, meter.lookahead_frames), stop, stop + meter.lookahead_frames,
+                                 dtype=np.float64))
+    return meter.finish(lookahead[0] if lookahead else None)
+
+def _meter_part(job):
+    return meter_wav(*job)
+
+def meter_file(file, workers=1, part_seconds=60.0, block_frames=65536, true_peak=True):
+    """
+    Meter a whole WAV file, split into parts of part_seconds metered by `workers`
+    processes and merged. Returns the METER.
+    """
+    info = info_wav(file)
+    part = max(1, int(part_seconds * info['sample_rate']))
+    jobs = [(file, start, start + part, block_frames, 0.5, true_peak) for start in range(0, info['num_frames'], part)]
+    if len(jobs) <= 1 or workers == 1:
+        meters = map(_meter_part, jobs)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            meters = list(pool.map(_meter_part, jobs))
+    return functools.reduce(METER.merge, meters, METER(info['sample_rate'], info['channels'], 0, true_peak))
@@ -1,58 +1,203 @@
 # add music cent stuff and mathematical calculations for music theory
 # different systems, scales, modes, contourpoıint, intervals, chords, chord progressions, voice leading, harmonic analysis, form analysis, rhythmic analysis, timbral analysis
-import math
+import functools
+
+import numpy as np
+
+A4_FREQ = 440.0 # Frequency of A4 in Hz
+A4_MIDI = 69
+NOTE_NAMES = np.array(['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'])
+
+def _ratio_cents(ratios):
+    # cents away from equal temperament of the 12 notes above C
+    return tuple(1200 * np.log2(ratios) - 100 * np.arange(12))
+
+# deviation in cents from equal temperament for every pitch class, C based
+TUNINGS = {
+    'equal': (0.0,) * 12,
+    'just': _ratio_cents([1, 16/15, 9/8, 6/5, 5/4, 4/3, 45/32, 3/2, 8/5, 5/3, 9/5, 15/8]),
+    'pythagorean': _ratio_cents([1, 256/243, 9/8, 32/27, 81/64, 4/3, 729/512, 3/2, 128/81, 27/16, 16/9, 243/128]),
+}
+
+@functools.lru_cache(maxsize=32)
+def tuning_offsets(tuning='equal'):
+    """
+    Cents away from equal temperament per pitch class (read-only, cached), shifted
+    so A has none and A4 stays at the reference frequency.
+    tuning: a name from TUNINGS or 12 cent values starting at C.
+    """
+    if isinstance(tuning, str):
+        if tuning not in TUNINGS:
+            raise ValueError(f"Unknown tuning: {tuning}, expected one of {tuple(TUNINGS)} or 12 cent values")
+        tuning = TUNINGS[tuning]
+    offsets = np.array(tuning, dtype=np.float64)
+    if offsets.shape != (12,):
+        raise ValueError("A tuning needs one cent value for each of the 12 pitch classes")
+    offsets = offsets - offsets[A4_MIDI % 12]
+    offsets.setflags(write=False)
+    return offsets
+
+@functools.lru_cache(maxsize=32)
+def midi_table(a4=A4_FREQ, tuning='equal'):
+    """ Frequencies of MIDI notes 0-127 (read-only, cached) """
+    midi = np.arange(128)
+    table = a4 * np.exp2(((midi - A4_MIDI) * 100 + tuning_offsets(tuning)[midi % 12]) / 1200)
+    table.setflags(write=False)
+    return table
+
+def _tuple(tuning):
+    # tunings are cache keys, lists / arrays of cents have to become tuples
+    return tuning if isinstance(tuning, str) else tuple(np.asarray(tuning, dtype=np.float64).tolist())
+
+def _note_cents(notes, offsets):
+    # cents of whole MIDI notes above A4 in the tuning
+    return (notes - A4_MIDI) * 100 + offsets[notes % 12]
+
+def midi_to_freq(midi, a4=A4_FREQ, tuning='equal'):
+    """
+    Frequency of MIDI note numbers, scalars or arrays of any shape.
+    Fractional numbers lie between two notes, evenly in cents: in equal
+    temperament 69.5 is A4 + 50 cents.
+    """
+    tuning = _tuple(tuning)
+    midi = np.asarray(midi)
+    if np.issubdtype(midi.dtype, np.integer) and midi.size and 0 <= midi.min() and midi.max() < 128:
+        result = midi_table(float(a4), tuning)[midi]
+    else:
+        offsets = tuning_offsets(tuning)
+        lower = np.floor(midi).astype(np.int64)
+        below = _note_cents(lower, offsets)
+        cents = below + (midi - lower) * (_note_cents(lower + 1, offsets) - below)
+        result = a4 * np.exp2(cents / 1200)
+    return result if result.ndim else float(result)
+
+def freq_to_midi(freq, a4=A4_FREQ, tuning='equal'):
+    """
+    Fractional MIDI note numbers of frequencies, the inverse of midi_to_freq.
+    Frequencies that are not positive give nan.
+    """
+    offsets = tuning_offsets(_tuple(tuning))
+    freq = np.asarray(freq, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cents = 1200 * np.log2(np.where(freq > 0, freq, np.nan) / a4)
+    if not offsets.any():
+        midi = A4_MIDI + cents / 100 # equal temperament
+        return midi if midi.ndim else float(midi)
+
+    # tuned notes are less than a semitone away from the equal tempered ones,
+    # so the note below is the equal tempered one below or one of its neighbours
+    lower = np.floor(np.nan_to_num(cents / 100)).astype(np.int64) + A4_MIDI
+    lower += (cents >= _note_cents(lower, offsets)).astype(np.int64) - 1
+    lower += cents >= _note_cents(lower + 1, offsets)
+
+    below = _note_cents(lower, offsets)
+    midi = lower + (cents - below) / (_note_cents(lower + 1, offsets) - below)
+    return midi if midi.ndim else float(midi)
+
+def cents(freq1, freq2):
+    """ Distance in cents from freq1 to freq2, 1200 * log2(f2 / f1), over arrays too """
+    result = 1200 * np.log2(np.asarray(freq2, dtype=np.float64) / np.asarray(freq1, dtype=np.float64))
+    return result if np.ndim(result) else float(result)
+
+def quantize(freq, a4=A4_FREQ, tuning='equal'):
+    """
+    Nearest notes of frequencies: (MIDI numbers, cents away from them).
+    Frequencies that are not positive give note -1 and nan cents.
+    """
+    midi = np.asarray(freq_to_midi(freq, a4, tuning))
+    notes = np.where(np.isnan(midi), -1, np.rint(np.nan_to_num(midi))).astype(np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        deviation = 1200 * np.log2(np.asarray(freq, dtype=np.float64) / a4)
+    deviation = np.where(notes >= 0, deviation - _note_cents(notes, tuning_offsets(_tuple(tuning))), np.nan)
+    if notes.ndim == 0:
+        return int(notes), float(deviation)
+    return notes, deviation
+
+def note_names(midi):
+    """ 'A4' style names of MIDI note numbers, '' for negative numbers """
+    midi = np.asarray(midi, dtype=np.int64)
+    names = np.char.add(NOTE_NAMES[midi % 12], (midi // 12 - 1).astype(str))
+    return np.where(midi >= 0, names, '')
 
 class NOTE:
-    NOTES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-    A4_FREQ = 440.0  # Frequency of A4 in Hz
-    
+    """
+    A note name, octave and cent deviation. Notes are immutable: add_semitones()
+    and the from_* constructors return new (for plain notes shared) objects.
+    """
+    __slots__ = ('name', 'octave', 'cent_deviation', 'index')
+
+    NOTES = NOTE_NAMES.tolist()
+    A4_FREQ = A4_FREQ # Frequency of A4 in Hz
+
     def __init__(self, name, octave=4, cent_deviation=0):
-        self.name = name
-        self.octave = octave
-        self.cent_deviation = cent_deviation
         # Find the index (0-11) for calculations
         if name not in self.NOTES:
             raise ValueError(f"Invalid note name: {name}")
-        self.index = self.NOTES.index(name)
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'octave', octave)
+        object.__setattr__(self, 'cent_deviation', cent_deviation)
+        object.__setattr__(self, 'index', self.NOTES.index(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("NOTE is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("NOTE is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, NOTE):
+            return NotImplemented
+        return (self.index, self.octave, self.cent_deviation) == (other.index, other.octave, other.cent_deviation)
+
+    def __hash__(self):
+        return hash((self.index, self.octave, self.cent_deviation))
+
+    def __repr__(self):
+        cents = f", {self.cent_deviation:+g} cents" if self.cent_deviation else ""
+        return f"NOTE({self.name}{self.octave}{cents})"
+
+    @classmethod
+    def from_midi(cls, midi, cent_deviation=0):
+        if cent_deviation == 0:
+            return _plain_note(int(midi))
+        return cls(cls.NOTES[midi % 12], midi // 12 - 1, cent_deviation)
+
+    @classmethod
+    def from_frequency(cls, freq, a4=None, tuning='equal'):
+        """ Nearest note, the rest goes into cent_deviation """
+        notes, deviation = quantize(freq, cls.A4_FREQ if a4 is None else a4, tuning)
+        if notes < 0:
+            raise ValueError(f"No note for frequency {freq}")
+        return cls.from_midi(int(notes), round(float(deviation), 2))
 
     def add_semitones(self, semitones):
-        total_semitones = self.index + semitones
-        new_index = total_semitones % 12
-        octave_shift = total_semitones // 12
-        new_octave = self.octave + octave_shift
-        return NOTE(self.NOTES[new_index], new_octave)
-    
+        return NOTE.from_midi(self.get_midi_number() + semitones)
+
     def get_midi_number(self):
         # Formula: (octave + 1) * 12 + note_index
         return (self.octave + 1) * 12 + self.index
-    
-    def get_frequency(self):
+
+    def get_frequency(self, a4=None, tuning='equal'):
         """
-        Calculates frequency based on A4 = 440Hz equal temperament.
-        Formula: f = 440 * 2^((n - 69) / 12)
+        Calculates frequency based on A4 = 440Hz (A4_FREQ) equal temperament.
+        Formula: f = 440 * 2^((n - 69) / 12), cent_deviation moves it by 2^(cents / 1200)
         """
-        midi_n = self.get_midi_number()
-        # A4 is MIDI 69
-        n = midi_n - 69
-        
-        # Base frequency from equal temperament
-        freq = self.A4_FREQ * (2 ** (n / 12.0))
-        
-        # Apply cent deviation if any
-        # Formula: f_new = f_old * 2^(cents / 1200)
-        if self.cent_deviation != 0:
-            freq = freq * (2 ** (self.cent_deviation / 1200.0))
-            
-        return round(freq, 2)
-    
+        freq = midi_to_freq(self.get_midi_number(), self.A4_FREQ if a4 is None else a4, tuning)
+        return round(freq * 2 ** (self.cent_deviation / 1200), 2)
+
     @staticmethod
     def calculate_cents(freq1, freq2):
         """
-        Calculates the distance in cents between two frequencies.
+        Calculates the distance in cents between two frequencies (or arrays of them).
         Formula: 1200 * log2(f2 / f1)
         """
-        return 1200 * math.log2(freq2 / freq1)
-    
+        return cents(freq1, freq2)
+
+@functools.lru_cache(maxsize=None)
+def _plain_note(midi):
+    # notes without cent deviation are immutable, one object per MIDI number is enough
+    return NOTE(NOTE.NOTES[midi % 12], midi // 12 - 1)
+
 class MODE:
     # Define standard interval patterns (semitones)
     PATTERNS = {
@@ -71,16 +216,15 @@ class MODE:
         if self.mode_type not in self.PATTERNS:
              raise ValueError(f"Unknown mode: {mode_type}")
         self.intervals = self.PATTERNS[self.mode_type]
-        
+        # semitones of every scale step above the root, the octave included
+        self.offsets = np.concatenate([[0], np.cumsum(self.intervals)])
+
+    def midi_numbers(self):
+        return self.root.get_midi_number() + self.offsets
+
+    def frequencies(self, a4=A4_FREQ, tuning='equal'):
+        return midi_to_freq(self.midi_numbers(), a4, tuning)
+
     def generate_scale(self, showName:bool = True):
-        scale = [self.root.name] if showName else [self.root]
-        current_note = self.root
-        for interval in self.intervals:
-            next_note = current_note.add_semitones(interval)
-            scale.append(next_note.name if showName else next_note)
-            current_note = next_note
-            
-        return scale
-        
-ionian = MODE('D', 'dorian')
-print(ionian.generate_scale())
\ No newline at end of file
+        scale = [NOTE.from_midi(midi) for midi in self.midi_numbers().tolist()]
+        return [note.name for note in scale] if showName else scale
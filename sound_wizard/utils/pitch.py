@@ -0,0 +1,126 @@
+import numpy as np
+
+from . import fft as fft_engine
+from . import music
+from .dsp import frame_signal
+
+def difference_function(frames, max_lag):
+    """
+    YIN difference d[tau] = sum((x[j] - x[j + tau]) ** 2) over j < frame_size - max_lag,
+    for tau = 0 .. max_lag of every frame. frames: (..., frame_size)
+
+    Written as energy[0] + energy[tau] - 2 * r[tau], the correlation r comes out of
+    one batched FFT for all frames and the energies out of a cumulative sum.
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    frame_size = frames.shape[-1]
+    window = frame_size - max_lag
+    if window < 1:
+        raise ValueError(f"max_lag {max_lag} does not fit in frames of {frame_size}")
+
+    # j + tau < frame_size, so a transform of frame_size points does not wrap around
+    fft_length = fft_engine.next_power_of_two(frame_size)
+    spectrum = fft_engine.rfft(frames, fft_length, axis=-1)
+    head = fft_engine.rfft(frames[..., :window], fft_length, axis=-1)
+    correlation = fft_engine.irfft(spectrum * np.conj(head), fft_length, axis=-1)[..., :max_lag + 1]
+
+    energy = np.zeros(frames.shape[:-1] + (frame_size + 1,))
+    np.cumsum(np.square(frames), axis=-1, out=energy[..., 1:])
+    lagged = energy[..., window:window + max_lag + 1] - energy[..., :max_lag + 1]
+
+    difference = lagged[..., :1] + lagged - 2 * correlation
+    return np.maximum(difference, 0.0, out=difference) # rounding can go slightly negative
+
+def cumulative_mean_normalized_difference(difference):
+    """ d'[tau] = d[tau] * tau / sum(d[1..tau]), d'[0] = 1. Silence gives 1 everywhere. """
+    lags = np.arange(difference.shape[-1])
+    running = np.cumsum(difference[..., 1:], axis=-1)
+    normalized = np.ones_like(difference)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(difference[..., 1:] * lags[1:], running, out=normalized[..., 1:], where=running > 0)
+    return normalized
+
+def yin(frames, sample_rate, fmin=50.0, fmax=2000.0, threshold=0.1):
+    """
+    Fundamental frequency of every frame with YIN, all frames at once.
+    frames: (num_frames, frame_size), frame_size has to be longer than sample_rate / fmin.
+
+    The period is the first dip of d' under threshold (followed down to its minimum)
+    between sample_rate / fmax and sample_rate / fmin, refined with a parabola.
+    Returns (frequency, confidence); frequency is nan for frames without a dip under
+    threshold, confidence is 1 - d' at the chosen period.
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    min_lag = max(1, int(sample_rate / fmax))
+    max_lag = int(np.ceil(sample_rate / fmin))
+    if max_lag + 1 >= frames.shape[-1] or min_lag >= max_lag:
+        raise ValueError(f"Frames of {frames.shape[-1]} samples can't hold periods of {fmin}-{fmax} Hz")
+
+    normalized = cumulative_mean_normalized_difference(difference_function(frames, max_lag + 1))
+    search = normalized[:, min_lag:max_lag + 1]
+    columns = np.arange(search.shape[1])
+
+    below = search < threshold
+    voiced = below.any(axis=1)
+    first = np.where(voiced, np.argmax(below, axis=1), np.argmin(search, axis=1))
+
+    # walk down from the first dip to its minimum: the first lag after it where d' stops falling
+    rising = np.ones(search.shape, dtype=bool)
+    np.greater_equal(search[:, 1:], search[:, :-1], out=rising[:, :-1])
+    rows = np.arange(len(search))
+    lag = min_lag + np.argmax(rising & (columns >= first[:, np.newaxis]), axis=1)
+
+    before, at, after = normalized[rows, lag - 1], normalized[rows, lag], normalized[rows, lag + 1]
+    curvature = before - 2 * at + after
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shift = np.where(curvature > 0, 0.5 * (before - after) / curvature, 0.0)
+    shift = np.clip(shift, -0.5, 0.5)
+
+    frequency = np.where(voiced, sample_rate / (lag + shift), np.nan)
+    confidence = np.clip(1.0 - at, 0.0, 1.0)
+    return frequency, confidence
+
+def track_pitch(signal, sample_rate, frame_size=2048, hop_size=512, fmin=50.0, fmax=2000.0, threshold=0.1,
+                center=True, a4=music.A4_FREQ, tuning='equal', batch=1024):
+    """
+    Pitch curve of a signal, (frames,) or (frames, channels) (the channels are averaged).
+
+    Frames are cut like stft() does and go through yin() `batch` frames at a time,
+    so memory does not grow with the length of the signal. Returns a dict of arrays,
+    one value per frame:
+        time: centre of the frame in seconds
+        frequency: f0 in Hz, nan where unvoiced
+        confidence: 0..1
+        midi, cents: nearest note and the distance to it (music.quantize), -1 / nan where unvoiced
+    """
+    x = np.asarray(signal, dtype=np.float64)
+    if x.ndim == 2:
+        x = x.mean(axis=1)
+
+    if center:
+        x = np.pad(x, frame_size // 2, mode='reflect' if len(x) > frame_size // 2 else 'constant')
+    if len(x) < frame_size:
+        x = np.pad(x, (0, frame_size - len(x)))
+
+    frames = frame_signal(x, frame_size, hop_size)
+    frequency = np.empty(len(frames))
+    confidence = np.empty(len(frames))
+    for start in range(0, len(frames), batch):
+        stop = start + batch
+        frequency[start:stop], confidence[start:stop] = yin(frames[start:stop], sample_rate, fmin, fmax, threshold)
+
+    midi, cents = music.quantize(frequency, a4, tuning)
+    offset = 0 if center else frame_size // 2
+    return {
+        'time': (np.arange(len(frames)) * hop_size + offset) / sample_rate,
+        'frequency': frequency,
+        'confidence': confidence,
+        'midi': midi,
+        'cents': cents,
+    }
+
+def pitch_to_notes(frequency, a4=music.A4_FREQ, tuning='equal'):
+    """ music.NOTE objects (cent deviation included) for a pitch curve, None where unvoiced """
+    midi, cents = music.quantize(np.asarray(frequency, dtype=np.float64).ravel(), a4, tuning)
+    return [None if note < 0 else music.NOTE.from_midi(note, round(deviation, 2))
+            for note, deviation in zip(midi.tolist(), cents.tolist())]
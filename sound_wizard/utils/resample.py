@@ -0,0 +1,166 @@
+import functools
+import math
+
+import numpy as np
+
+def ratio(orig_rate, target_rate):
+    """ 44100 -> 48000 is up 160, down 147 """
+    if orig_rate <= 0 or target_rate <= 0:
+        raise ValueError("Sample rates must be positive")
+    if int(orig_rate) != orig_rate or int(target_rate) != target_rate:
+        raise ValueError("Sample rates must be whole numbers")
+    divisor = math.gcd(int(orig_rate), int(target_rate))
+    return int(target_rate) // divisor, int(orig_rate) // divisor
+
+@functools.lru_cache(maxsize=32)
+def filter_bank(up, down, taps=64, cutoff=0.94, beta=8.6):
+    """
+    Polyphase windowed-sinc filter bank for resampling by up / down (read-only, cached).
+
+    The prototype lowpass has taps * up coefficients at the upsampled rate, with
+    its cutoff at `cutoff` times the lower of the two Nyquist frequencies, and is
+    kaiser windowed. Row p holds the taps of phase p in input order, oldest sample
+    first, so an output sample is bank[p] @ x[n - taps + 1:n + 1].
+    """
+    if taps < 2 or taps % 2:
+        raise ValueError("taps must be an even number")
+    length = taps * up
+    center = length // 2 # whole number of input samples, taps // 2
+
+    offsets = np.arange(length) - center
+    frequency = cutoff * 0.5 / max(up, down) # cycles per upsampled sample
+    prototype = 2 * frequency * np.sinc(2 * frequency * offsets)
+    prototype *= np.i0(beta * np.sqrt(np.clip(1 - (offsets / center) ** 2, 0, 1))) / np.i0(beta)
+    prototype *= up / prototype.sum() # zero stuffing by `up` loses that much gain
+
+    # phase p uses prototype[p], prototype[p + up], ... against x[n], x[n - 1], ...
+    bank = prototype.reshape(taps, up).T[:, ::-1].copy()
+    bank.setflags(write=False)
+    return bank
+
+class RESAMPLER:
+    """
+    Streaming polyphase sample rate converter for any whole number rates.
+
+        resampler = RESAMPLER(44100, 48000)
+        for block in blocks:
+            write(resampler.process(block))
+        write(resampler.flush())
+
+    Output sample m sits at input time m * orig_rate / target_rate, the filter is
+    centered on it, so the output is not delayed. An output is handed out once
+    the taps // 2 input samples after it have arrived; flush() computes the rest
+    as if the input was followed by silence. The blocks put together are the same
+    as resample() on the whole signal.
+
+    process(block) takes (frames,) or (frames, channels) blocks of any size, all
+    channels are filtered in one pass. The number of frames returned varies.
+    """
+    def __init__(self, orig_rate, target_rate, taps=64, cutoff=0.94, beta=8.6, chunk=4096):
+        self.orig_rate = orig_rate
+        self.target_rate = target_rate
+        self.up, self.down = ratio(orig_rate, target_rate)
+        # taps count at the lower rate: going down by a big ratio the filter has to span
+        # more input samples for the same transition band relative to the new Nyquist
+        self.taps = -(-taps * max(self.up, self.down) // self.up)
+        self.taps += self.taps % 2
+        self.bank = filter_bank(self.up, self.down, self.taps, cutoff, beta)
+        self.chunk = chunk # output frames computed per vectorized step, bounds the scratch memory
+        self.reset()
+
+    def reset(self):
+        self.channels = None # set by the first block
+        self._mono = False
+        self._buffer = None # input from absolute index _offset on, (channels, frames)
+        self._offset = -self.taps # the taps samples before the start are silence
+        self._received = 0 # input frames so far
+        self._produced = 0 # output frames so far
+
+    def output_length(self, input_frames):
+        """ Frames resample() returns for input_frames """
+        return -(-input_frames * self.up // self.down)
+
+    def _outputs(self, last):
+        # outputs whose newest input sample (n + taps // 2) is at most `last`
+        newest = last - self.taps // 2
+        return max(0, ((newest + 1) * self.up - 1) // self.down + 1 - self._produced)
+
+    def _first(self, m):
+        # buffer index of the oldest input sample output m is computed from
+        return (m * self.down) // self.up + self.taps // 2 - (self.taps - 1) - self._offset
+
+    def _compute(self, count):
+        up, down = self.up, self.down
+        output = np.empty((self.channels, count))
+        if count == 0:
+            return output
+        windows = np.lib.stride_tricks.sliding_window_view(self._buffer, self.taps, axis=1) # (channels, frames, taps)
+
+        span = self.chunk * up
+        for start in range(self._produced, self._produced + count, span):
+            stop = min(self._produced + count, start + span)
+            target = output[:, start - self._produced:stop - self._produced]
+
+            if stop - start >= 16 * up:
+                # outputs r, r + up, r + 2 * up, ... share a phase and their windows
+                # are `down` input samples apart, so every phase is one strided matmul
+                for r in range(up):
+                    first = self._first(start + r)
+                    phase = ((start + r) * down) % up
+                    length = len(range(r, stop - start, up))
+                    target[:, r::up] = windows[:, first:first + (length - 1) * down + 1:down] @ self.bank[phase]
+            else:
+                # few outputs per phase (or a huge up), gather every window instead
+                m = np.arange(start, stop, dtype=np.int64)
+                np.einsum('cmk,mk->cm', windows[:, self._first(m)], self.bank[(m * down) % up], out=target)
+
+        self._produced += count
+        # keep what the next output still needs
+        keep = max(0, min(self._first(self._produced), self._buffer.shape[1]))
+        self._buffer = self._buffer[:, keep:]
+        self._offset += keep
+        return output
+
+    def _result(self, output, mono):
+        return output[0] if mono else output.T
+
+    def process(self, block):
+        block = np.asarray(block, dtype=np.float64)
+        mono = block.ndim == 1
+        x = block[np.newaxis, :] if mono else block.T
+        if self.channels is None:
+            self.channels = x.shape[0]
+            self._mono = mono
+            self._buffer = np.zeros((self.channels, self.taps))
+        elif x.shape[0] != self.channels:
+            raise ValueError(f"RESAMPLER has {self.channels} channels, block has {x.shape[0]}")
+
+        self._buffer = np.concatenate([self._buffer, x], axis=1)
+        self._received += x.shape[1]
+        return self._result(self._compute(self._outputs(self._received - 1)), self._mono)
+
+    def flush(self):
+        """ The outputs still waiting for input after the end, the resampler is reset afterwards """
+        if self.channels is None:
+            return np.zeros(0)
+        remaining = self.output_length(self._received) - self._produced
+        self._buffer = np.concatenate([self._buffer, np.zeros((self.channels, self.taps))], axis=1)
+        output = self._result(self._compute(max(0, remaining)), self._mono)
+        self.reset()
+        return output
+
+def resample(signal, orig_rate, target_rate, taps=64, cutoff=0.94, beta=8.6):
+    """
+    Resample (frames,) or (frames, channels) signals from orig_rate to target_rate.
+    Returns ceil(frames * target_rate / orig_rate) frames.
+
+    taps: filter length in samples of the lower rate, more is a steeper filter (downsampling
+          by up / down computes every output from taps * down / up input samples)
+    cutoff: passband edge as a fraction of the lower Nyquist frequency
+    beta: kaiser window parameter, stopband attenuation
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    if orig_rate == target_rate:
+        return signal.copy()
+    resampler = RESAMPLER(orig_rate, target_rate, taps, cutoff, beta)
+    return np.concatenate([resampler.process(signal), resampler.flush()], axis=0)
@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pytest
+
+from sound_wizard.cli import build_chain, main, parse_effect, parse_track
+from sound_wizard.formats.wav_read import read_wav, write_wav
+
+
+def test_parse_effect():
+    assert parse_effect("gain:db=-3") == {'type': 'gain', 'db': -3.0}
+    assert parse_effect("fade:in=0.5,shape=s_curve") == {'type': 'fade', 'in': 0.5, 'shape': 's_curve'}
+    assert parse_effect("eq:filter=highpass,freq=80,order=4") == {'type': 'eq', 'filter': 'highpass', 'freq': 80.0,
+                                                                 'order': 4.0}
+
+
+def test_batch_isolates_failures(tmp_path, capsys):
+    source = tmp_path / "in"
+    source.mkdir()
+    x = np.random.default_rng(0).uniform(-0.5, 0.5, (4000, 2))
+    write_wav(str(source / "good.wav"), x, 8000, 2, 16)
+    (source / "broken.wav").write_bytes(b"not a wav file")
+
+    output = tmp_path / "out"
+    code = main(["batch", str(source), "-o", str(output), "-e", "gain:db=-6.0206", "-j", "1"])
+
+    assert code == 1
+    assert "FAILED" in capsys.readouterr().err
+    assert os.listdir(output) == ["good.wav"]
+    np.testing.assert_allclose(read_wav(str(output / "good.wav"), dtype=np.float64)['samples'], x / 2, atol=1e-4)
+
+
+def test_mix(tmp_path):
+    x = np.random.default_rng(1).uniform(-0.25, 0.25, (800, 2))
+    write_wav(str(tmp_path / "a.wav"), x, 8000, 2, 32, audio_format=3)
+    assert parse_track("C:/a.wav:gain=-3,pan=0.5") == ("C:/a.wav", {'gain': -3.0, 'pan': 0.5})
+    assert parse_track("C:/a.wav") == ("C:/a.wav", {})
+
+    target = str(tmp_path / "mix" / "out.wav")
+    code = main(["mix", str(tmp_path / "a.wav"), str(tmp_path / "a.wav") + ":offset=0.1,gain=-6.0206", "-o", target,
+                 "--float"])
+    assert code == 0
+    expected = np.zeros((1600, 2))
+    expected[:800] += x
+    expected[800:] += x / 2
+    result = read_wav(target, dtype=np.float64)
+    assert result['bits_per_sample'] == 32
+    np.testing.assert_allclose(result['samples'], expected, atol=1e-6)
+
+    assert main(["mix", str(tmp_path / "a.wav"), "-o", target, "--float", "--bits", "64"]) == 0
+    assert read_wav(target)['bits_per_sample'] == 64
+    assert main(["mix", str(tmp_path / "a.wav"), "-o", target]) == 0
+    assert read_wav(target)['bits_per_sample'] == 24
+    with pytest.raises(SystemExit):
+        main(["mix", str(tmp_path / "a.wav"), "-o", target, "--bits", "64"])
+    with pytest.raises(SystemExit):
+        main(["mix", str(tmp_path / "a.wav") + ":gain=x", "-o", target])
+    with pytest.raises(SystemExit):
+        main(["mix", str(tmp_path / "missing.wav"), "-o", target])
+
+
+def test_ping_pong_flag():
+    info = {'sample_rate': 8000, 'channels': 2, 'num_frames': 100}
+    for value, expected in [('false', False), ('no', False), ('off', False), ('0', False), ('1', True), ('On', True)]:
+        delay = build_chain([parse_effect(f"delay:ping_pong={value}")], info, 64).effects[0]
+        assert delay.ping_pong is expected
+    with pytest.raises(ValueError):
+        build_chain([parse_effect("delay:ping_pong=maybe")], info, 64)
+
+
+def test_batch_rejects_bad_chain_once(tmp_path, capsys):
+    source = tmp_path / "in"
+    source.mkdir()
+    for name in ("a.wav", "b.wav", "c.wav"):
+        write_wav(str(source / name), np.zeros((100, 2)), 8000, 2, 16)
+
+    with pytest.raises(SystemExit) as exit_info:
+        main(["batch", str(source), "-o", str(tmp_path / "out"), "-e", "delay:ping_pong=maybe", "-j", "1"])
+    assert exit_info.value.code != 0
+    err = capsys.readouterr().err
+    assert err.count("ping_pong") == 1 and "FAILED" not in err
+    assert not (tmp_path / "out").exists()
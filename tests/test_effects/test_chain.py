@@ -0,0 +1,67 @@
+import numpy as np
+
+from sound_wizard.effects.chain import EffectChain
+from sound_wizard.effects.delay import DELAY, FADE
+from sound_wizard.effects.dynamics import LIMITER
+from sound_wizard.effects.gain import GAIN
+from sound_wizard.formats.wav_read import read_wav, write_wav
+from sound_wizard.utils.resample import resample
+
+
+def test_chain_matches_effects_one_by_one():
+    x = np.random.default_rng(0).standard_normal((3000, 2))
+
+    expected = GAIN(gain_factor=0.5).process(x)
+    expected = DELAY(1000, delay_seconds=0.05).process(expected)
+    expected = FADE(3000, 100, 100).process(expected)
+
+    chain = EffectChain([GAIN(gain_factor=0.5), DELAY(1000, delay_seconds=0.05), FADE(3000, 100, 100), np.negative])
+    blocks = [chain.process(x[i:i + 512]) for i in range(0, 3000, 512)]
+    np.testing.assert_allclose(np.concatenate(blocks), -expected)
+
+
+def test_render(tmp_path):
+    x = np.random.default_rng(1).uniform(-0.5, 0.5, (5000, 2))
+    source = str(tmp_path / "in.wav")
+    target = str(tmp_path / "out.wav")
+    write_wav(source, x, 8000, 2, 24)
+
+    EffectChain([GAIN(gain_factor=2.0)], block_size=1000).render(source, target)
+    np.testing.assert_allclose(read_wav(target, dtype=np.float64)['samples'], 2 * x, atol=1e-6)
+
+
+def test_render_resampled(tmp_path):
+    x = np.random.default_rng(2).uniform(-0.5, 0.5, (4410, 2))
+    source = str(tmp_path / "in.wav")
+    target = str(tmp_path / "out.wav")
+    write_wav(source, x, 44100, 2, 32, audio_format=3)
+
+    EffectChain([GAIN(gain_factor=0.5)], block_size=1000).render(source, target, sample_rate=48000)
+    result = read_wav(target, dtype=np.float64)
+    assert result['sample_rate'] == 48000
+    np.testing.assert_allclose(result['samples'], resample(x * 0.5, 44100, 48000), atol=1e-6)
+
+
+def test_render_makes_up_for_latency(tmp_path):
+    x = np.random.default_rng(3).uniform(-0.1, 0.1, (3000, 2))
+    source = str(tmp_path / "in.wav")
+    target = str(tmp_path / "out.wav")
+    write_wav(source, x, 8000, 2, 32, audio_format=3)
+
+    chain = EffectChain([LIMITER(8000, lookahead=0.1), GAIN(gain_factor=2.0)], block_size=500)
+    assert chain.latency == 800
+    chain.render(source, target)
+    np.testing.assert_allclose(read_wav(target, dtype=np.float64)['samples'], 2 * x, atol=1e-7)
+
+
+def test_render_latency_keeps_fades_in_place(tmp_path):
+    x = np.full((8000, 1), 0.5)
+    source = str(tmp_path / "in.wav")
+    target = str(tmp_path / "out.wav")
+    write_wav(source, x, 8000, 1, 32, audio_format=3)
+
+    EffectChain([LIMITER(8000, lookahead=0.05), FADE(8000, 0, 1000)], block_size=1000).render(source, target)
+    expected = FADE(8000, 0, 1000).process(x.copy())
+    result = read_wav(target, dtype=np.float64)['samples'].reshape(x.shape)
+    np.testing.assert_allclose(result, expected, atol=1e-7)
+    assert abs(result[-1, 0]) < 1e-3
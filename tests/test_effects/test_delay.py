@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from sound_wizard.effects.delay import *
+
+
+@pytest.mark.parametrize("fade_type", FADE_TYPES)
+def test_fade_in_place(fade_type):
+    samples = np.ones((100, 2))
+    out = fade(samples, 2, 0.2, 0.1, fade_type, 100)
+    assert out is samples
+    assert samples[0, 0] < 0.1 and samples[-1, 1] < 0.1
+    np.testing.assert_array_equal(samples[20:90], 1.0)
+    assert np.all(np.diff(samples[:20, 0]) > 0)
+
+
+def test_crossfade_sums_to_one():
+    a = np.ones((50, 2))
+    b = np.ones((40, 2))
+    np.testing.assert_allclose(crossfade(a, b, 10, "linear"), np.ones((80, 2)))
+
+    power = crossfade(np.ones(20), np.zeros(20), 20, "equal_power") ** 2
+    power += crossfade(np.zeros(20), np.ones(20), 20, "equal_power") ** 2
+    np.testing.assert_allclose(power, 1.0)
+
+
+def test_fade_blocks_match_whole():
+    signal = np.random.default_rng(0).standard_normal((1000, 2))
+    whole = fade(signal.copy(), 2, 0.3, 0.25, "s_curve", 1000)
+
+    fader = FADE(1000, 300, 250, "s_curve")
+    blocks = [fader.process_block(signal[i:i + 128]) for i in range(0, 1000, 128)]
+    np.testing.assert_allclose(np.concatenate(blocks), whole)
+
+
+def reference_delay(x, delay, feedback, mix, ping_pong):
+    buffer = np.zeros_like(x)
+    y = np.zeros_like(x)
+    for i in range(len(x)):
+        delayed = buffer[i - delay] if i >= delay else np.zeros(x.shape[1])
+        buffer[i] = x[i] + feedback * (delayed[::-1] if ping_pong else delayed)
+        y[i] = (1 - mix) * x[i] + mix * delayed
+    return y
+
+
+@pytest.mark.parametrize("ping_pong", [False, True])
+def test_delay_matches_sample_loop(ping_pong):
+    x = np.random.default_rng(0).standard_normal((2000, 2))
+    delay = DELAY(1000, delay_seconds=0.037, feedback=0.6, mix=0.4, ping_pong=ping_pong, max_block=256)
+
+    out = np.concatenate([delay.process(x[i:i + 333]) for i in range(0, 2000, 333)])
+    np.testing.assert_allclose(out, reference_delay(x, 37, 0.6, 0.4, ping_pong), atol=1e-12)
+
+
+def test_modulated_delay_in_place_mono():
+    x = np.random.default_rng(1).standard_normal(1000)
+    delay = DELAY(1000, delay_seconds=0.02, mod_depth_seconds=0.005, mod_rate=3, channels=1)
+    block = x.copy()
+    out = delay.process(block, out=block)
+    assert out.shape == x.shape and np.shares_memory(out, block)
+    np.testing.assert_allclose(block[:15], 0.5 * x[:15]) # nothing delayed yet
+
+
+@pytest.mark.parametrize("sample_rate, delay_seconds, depth", [
+    (44100, 0.02, 0.002), (44100, 0.01, 0.001), (48000, 0.015, 0.003),
+    (44100, 0.03, 0.005), (48000, 0.03, 0.005), (44100, 0.3, 0.002)])
+def test_default_max_delay_fits_modulation(sample_rate, delay_seconds, depth):
+    # max_delay comes from the same seconds, rounding must not push the modulation over it
+    for max_delay_seconds in [None, delay_seconds + depth]:
+        delay = DELAY(sample_rate, delay_seconds=delay_seconds, mod_depth_seconds=depth,
+                      max_delay_seconds=max_delay_seconds, channels=2)
+        assert delay.process(np.zeros((64, 2))).shape == (64, 2)
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from sound_wizard.effects.dynamics import *
+
+
+def test_peak_envelope_matches_recursion():
+    level = np.abs(np.random.default_rng(0).standard_normal((500, 2)))
+    expected = np.empty_like(level)
+    held = np.array([0.5, 0.0])
+    for n in range(len(level)):
+        held = np.maximum(level[n], 0.97 * held)
+        expected[n] = held
+    np.testing.assert_allclose(peak_envelope(level, 0.97, np.array([0.5, 0.0])), expected, rtol=1e-12)
+
+
+def test_sliding_max():
+    x = np.random.default_rng(1).standard_normal((100, 2))
+    for width in [1, 7, 50, 100]:
+        expected = [x[i:i + width].max(axis=0) for i in range(101 - width)]
+        np.testing.assert_array_equal(sliding_max(x, width), expected)
+
+
+def test_gain_computer():
+    levels = np.array([-40.0, -20.0, -10.0, 0.0])
+    np.testing.assert_allclose(gain_computer(levels, -20, 4), [0, 0, -7.5, -15])
+    np.testing.assert_allclose(gain_computer(levels, -20, 2, mode='expander'), [-20, 0, 0, 0])
+    # the soft knee meets the hard curve at its edges and is halfway in between at the threshold
+    np.testing.assert_allclose(gain_computer([-25, -20, -15], -20, 4, knee_db=10), [0, -0.9375, -3.75])
+    with pytest.raises(ValueError):
+        gain_computer(levels, -20, 4, mode='gate')
+
+
+def test_compressor_streams_and_settles():
+    rng = np.random.default_rng(2)
+    x = np.concatenate([0.01 * rng.standard_normal((4000, 2)), rng.standard_normal((8000, 2))])
+
+    whole = COMPRESSOR(8000, threshold_db=-20, ratio=4, attack=0.002, release=0.05).process(x)
+    compressor = COMPRESSOR(8000, threshold_db=-20, ratio=4, attack=0.002, release=0.05)
+    blocks = np.concatenate([compressor.process(x[i:i + 700]) for i in range(0, len(x), 700)])
+    np.testing.assert_allclose(blocks, whole, atol=1e-12)
+
+    np.testing.assert_allclose(whole[:3000], x[:3000]) # under the threshold
+    assert np.abs(whole[-2000:]).max() < 0.5 * np.abs(x[-2000:]).max()
+    assert np.all(np.sign(whole) == np.sign(x)) # only gain, one value for both channels
+
+
+def test_compressor_sidechain():
+    x = np.ones((1000, 2)) * 0.1
+    trigger = np.zeros(1000)
+    trigger[500:] = 1.0
+    ducked = COMPRESSOR(1000, threshold_db=-20, ratio=10, attack=0, release=0).process(x, sidechain=trigger)
+    np.testing.assert_allclose(ducked[:500], 0.1)
+    np.testing.assert_allclose(ducked[500:], 0.1 * 10 ** (-18 / 20))
+
+
+def test_limiter_is_brickwall():
+    rng = np.random.default_rng(3)
+    x = rng.standard_normal((20000, 2)) * np.linspace(0.05, 3, 20000)[:, np.newaxis]
+    limiter = LIMITER(8000, ceiling_db=-1, lookahead=0.005, release=0.05)
+
+    blocks = [limiter.process(x[i:i + 999]) for i in range(0, len(x), 999)]
+    blocks.append(limiter.flush())
+    y = np.concatenate(blocks)[limiter.latency:]
+
+    assert y.shape == x.shape
+    assert np.abs(y).max() <= 10 ** (-1 / 20) * (1 + 1e-12)
+    np.testing.assert_allclose(y[:1000], x[:1000]) # quiet start goes through untouched
+    assert np.all(np.sign(y) == np.sign(x))
+
+    whole = LIMITER(8000, ceiling_db=-1, lookahead=0.005, release=0.05).process(np.concatenate([x, x[:40]]))
+    np.testing.assert_allclose(np.concatenate(blocks)[:len(whole)], whole, atol=1e-12)
+
+
+def test_limiter_mono_flush():
+    x = np.random.default_rng(4).standard_normal(3000)
+    limiter = LIMITER(8000, lookahead=0.01)
+    y = np.concatenate([limiter.process(x[:1000]), limiter.process(x[1000:]), limiter.flush()])
+    assert y.shape == (3080,)
+    np.testing.assert_allclose(y, LIMITER(8000, lookahead=0.01).process(np.concatenate([x, np.zeros(80)])))
@@ -0,0 +1,51 @@
+import numpy as np
+
+from sound_wizard.effects.eq import *
+from sound_wizard.utils.filters import sosfilt
+
+
+def test_biquad_blocks_match_whole():
+    x = np.random.default_rng(0).standard_normal((5000, 2))
+    highpass = BIQUAD.design('highpass', 80, 48000, order=4)
+    whole = sosfilt(highpass.sos, x)
+
+    out = x.copy()
+    for start in range(0, len(x), 1000):
+        highpass.process(out[start:start + 1000], out=out[start:start + 1000])
+    np.testing.assert_allclose(out, whole, atol=1e-10)
+
+    highpass.reset()
+    mono = highpass.process(x[:, 0])
+    assert mono.shape == (5000,)
+    np.testing.assert_allclose(mono, whole[:, 0], atol=1e-10)
+
+
+def test_eq_bands():
+    eq = EQ(48000, [{'filter_type': 'highpass', 'frequency': 50}])
+    index = eq.add_band('peaking', 2000, q=1.0, gain_db=6)
+    np.testing.assert_allclose(eq.response([2000]), [6], atol=0.01)
+
+    eq.set_band(index, gain_db=-3)
+    assert eq.bands[index]['gain_db'] == -3
+    np.testing.assert_allclose(eq.response([2000]), [-3], atol=0.01)
+    assert eq.sos.shape == (2, 6)
+
+    eq.remove_band(0)
+    eq.remove_band(0)
+    block = np.ones((10, 2))
+    np.testing.assert_array_equal(eq.process(block), block)
+
+
+def test_eq_change_keeps_state():
+    # moving a band between blocks filters on from the old state, like one call per coefficient set
+    x = np.random.default_rng(1).standard_normal((2000, 2))
+    eq = EQ(48000)
+    eq.add_band('peaking', 1000, gain_db=6)
+    first = eq.process(x[:1000])
+    first_sos = eq.sos
+    eq.set_band(0, frequency=1200)
+    second = eq.process(x[1000:])
+
+    expected, state = sosfilt(first_sos, x[:1000], np.zeros((2, 1, 2)))
+    np.testing.assert_allclose(first, expected, atol=1e-10)
+    np.testing.assert_allclose(second, sosfilt(eq.sos, x[1000:], state)[0], atol=1e-10)
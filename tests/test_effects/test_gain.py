@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from sound_wizard.effects.gain import GAIN
+
+
+def test_process_keeps_shape():
+    mono = GAIN([1, 2, 3, 4], 2)
+    mono.process()
+    np.testing.assert_array_equal(mono.get_samples(), [2, 4, 6, 8])
+
+    stereo = GAIN([[1, -1], [2, -2]], 0.5)
+    stereo.process()
+    np.testing.assert_array_equal(stereo.get_samples(), [[0.5, -0.5], [1, -1]])
+    assert stereo.is_stereo()
+    assert stereo.get_rms() == pytest.approx(np.sqrt(0.625))
+
+
+def test_ramp_carries_across_blocks():
+    gain = GAIN(gain_factor=0.0, ramp_samples=8)
+    gain.set_gain(1.0)
+
+    ones = np.ones((6, 2))
+    first = gain.process_block(ones)
+    second = gain.process_block(ones)
+    curve = np.concatenate([first, second])[:, 0]
+    np.testing.assert_allclose(curve, list(np.arange(1, 9) / 8) + [1.0] * 4)
+
+    block = np.ones(4)
+    gain.set_gain_db(-6.0206, ramp_samples=0)
+    gain.process_block(block, out=block)
+    np.testing.assert_allclose(block, 0.5, atol=1e-5)
+
+
+def test_automation():
+    gain = GAIN()
+    gain.set_automation([0, 10], [0.0, -20.0])
+    out = np.concatenate([gain.process_block(np.ones(5)), gain.process_block(np.ones(10))])
+    np.testing.assert_allclose(out[[0, 10, 14]], [1.0, 0.1, 0.1])
+
+
+def test_integer_block_in_place():
+    block = np.array([[1000, -1000], [30000, -30000], [-32768, 32767]], dtype=np.int16)
+    gain = GAIN(gain_factor=2.0, ramp_samples=0)
+    assert gain.process_block(block, out=block) is block
+    np.testing.assert_array_equal(block, [[2000, -2000], [32767, -32768], [-32768, 32767]])
+
+    ramp = GAIN(gain_factor=1.0, ramp_samples=4)
+    ramp.set_gain(0.5)
+    pcm = np.full(4, 1001, dtype=np.int32)
+    ramp.process_block(pcm, out=pcm)
+    np.testing.assert_array_equal(pcm, np.rint(1001 * (1 - np.arange(1, 5) / 8)))
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from sound_wizard.effects.mixer import MIXER
+from sound_wizard.formats.wav_read import read_wav, write_wav
+
+
+def test_mix_matches_sum(tmp_path):
+    rng = np.random.default_rng(0)
+    stereo = rng.uniform(-0.5, 0.5, (3000, 2))
+    mono = rng.uniform(-0.5, 0.5, 1000)
+    path = str(tmp_path / "stereo.wav")
+    write_wav(path, stereo, 8000, 2, 32, audio_format=3)
+
+    with MIXER(8000, block_size=256) as mixer:
+        mixer.add_track(path, gain_db=-6.0206)
+        mixer.add_track(mono, pan=1.0, offset_seconds=0.5)
+        mixer.add_track(stereo, pan=-0.5, offset_seconds=-0.125) # starts 1000 frames in
+        assert mixer.num_frames == 5000
+        result = mixer.mix()
+
+    expected = np.zeros((5000, 2))
+    expected[:3000] += stereo / 2
+    expected[4000:, 1] += mono
+    expected[:2000] += stereo[1000:] * [1.0, 0.5]
+    np.testing.assert_allclose(result, expected, atol=1e-6)
+
+
+def test_mono_pan_keeps_power():
+    with MIXER(1000) as mixer:
+        for pan in [-1, -0.3, 0, 0.8]:
+            mixer.add_track(np.ones(10), pan=pan)
+        gains = [track.matrix(2) for track in mixer.tracks]
+    np.testing.assert_allclose([np.sum(gain ** 2) for gain in gains], 1.0)
+    np.testing.assert_allclose(gains[0], [[1, 0]], atol=1e-15)
+
+
+def test_render_streams(tmp_path):
+    tracks = [np.full((1000, 2), 0.01 * i) for i in range(10)]
+    target = str(tmp_path / "mix.wav")
+    with MIXER(8000, block_size=300) as mixer:
+        for track in tracks:
+            mixer.add_track(track)
+        mixer.render(target, 32, audio_format=3)
+    np.testing.assert_allclose(read_wav(target, dtype=np.float64)['samples'], 0.45, atol=1e-7)
+
+
+def test_track_errors(tmp_path):
+    path = str(tmp_path / "fast.wav")
+    write_wav(path, np.zeros((10, 2)), 96000, 2, 16)
+    mixer = MIXER(48000)
+    with pytest.raises(ValueError):
+        mixer.add_track(path)
+    with pytest.raises(ValueError):
+        mixer.add_track(np.zeros((10, 6)))
+    with pytest.raises(ValueError):
+        mixer.add_track(np.zeros(10), pan=2)
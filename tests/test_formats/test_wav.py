@@ -0,0 +1,196 @@
+import struct
+
+import numpy as np
+import pytest
+
+from sound_wizard.formats.wav_read import *
+from sound_wizard.formats.wav_file import open_wav
+from sound_wizard.formats.wav_write import WavWriter
+
+
+def make_wav(path, raw, sample_rate, num_channels, bits_per_sample, audio_format=1, extensible=False):
+    block_align = num_channels * (bits_per_sample // 8)
+    if extensible:
+        fmt = struct.pack('<HHIIHH', 0xFFFE, num_channels, sample_rate, sample_rate * block_align,
+                          block_align, bits_per_sample)
+        fmt += struct.pack('<HHI', 22, bits_per_sample, 0)
+        fmt += struct.pack('<H', audio_format) + b'\x00\x00\x00\x00\x10\x00\x80\x00\x00\xaa\x00\x38\x9b\x71'
+    else:
+        fmt = struct.pack('<HHIIHH', audio_format, num_channels, sample_rate, sample_rate * block_align,
+                          block_align, bits_per_sample)
+
+    body = b'WAVE' + b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+    body += b'data' + struct.pack('<I', len(raw)) + raw
+    with open(path, 'wb') as f:
+        f.write(b'RIFF' + struct.pack('<I', len(body)) + body)
+
+
+def int_bytes(values, bits_per_sample):
+    n = bits_per_sample // 8
+    return b''.join(int(v).to_bytes(n, 'little', signed=True) for v in values)
+
+
+@pytest.mark.parametrize("bits_per_sample", [16, 24, 32])
+def test_read_pcm(tmp_path, bits_per_sample):
+    full_scale = 2 ** (bits_per_sample - 1)
+    values = [0, 1, -1, full_scale - 1, -full_scale, 12345, -12345, 7]
+    path = tmp_path / "pcm.wav"
+    make_wav(path, int_bytes(values, bits_per_sample), 8000, 2, bits_per_sample)
+
+    data = read_wav(str(path), dtype=np.float64)
+    expected = np.array(values, dtype=np.float64).reshape(-1, 2) / full_scale
+    assert data['samples'].shape == (4, 2)
+    assert data['num_frames'] == 4
+    np.testing.assert_array_equal(data['samples'], expected)
+
+
+def test_read_8bit_unsigned(tmp_path):
+    path = tmp_path / "u8.wav"
+    make_wav(path, bytes([0, 128, 255]), 8000, 1, 8)
+
+    samples = read_wav(str(path))['samples']
+    np.testing.assert_allclose(samples[:, 0], [-1.0, 0.0, 127 / 128])
+
+
+def test_read_float_and_extensible(tmp_path):
+    values = np.array([0.5, -0.25, 1.0, -1.0], dtype='<f4')
+    path = tmp_path / "float.wav"
+    make_wav(path, values.tobytes(), 48000, 2, 32, audio_format=3)
+    np.testing.assert_array_equal(read_wav(str(path))['samples'], values.reshape(2, 2))
+
+    path = tmp_path / "ext.wav"
+    make_wav(path, int_bytes([100, -100], 24), 48000, 1, 24, extensible=True)
+    data = read_wav(str(path), dtype=np.float64)
+    assert data['audio_format'] == 1
+    np.testing.assert_array_equal(data['samples'][:, 0], [100 / 2 ** 23, -100 / 2 ** 23])
+
+
+def test_read_as_list(tmp_path):
+    path = tmp_path / "mono.wav"
+    make_wav(path, int_bytes([16384, -16384], 16), 8000, 1, 16)
+    assert read_wav(str(path), as_list=True)['samples'] == [0.5, -0.5]
+
+    path = tmp_path / "stereo.wav"
+    make_wav(path, int_bytes([16384, -16384], 16), 8000, 2, 16)
+    assert read_wav(str(path), as_list=True)['samples'] == [[0.5, -0.5]]
+
+
+def test_open_wav_slicing(tmp_path):
+    values = list(range(-10, 10))
+    path = tmp_path / "slice.wav"
+    make_wav(path, int_bytes(values, 24), 8000, 2, 24)
+    full = read_wav(str(path), dtype=np.float64)['samples']
+
+    with open_wav(str(path), dtype=np.float64) as wav:
+        assert len(wav) == 10
+        np.testing.assert_array_equal(wav[:], full)
+        np.testing.assert_array_equal(wav[3:7], full[3:7])
+        np.testing.assert_array_equal(wav[-1], full[-1])
+        np.testing.assert_array_equal(wav[8:1:-3], full[8:1:-3])
+        assert wav.raw.shape == (10, 2, 3)
+
+
+@pytest.mark.parametrize("bits_per_sample", [8, 16, 24, 32])
+def test_stream_roundtrip(tmp_path, bits_per_sample):
+    rng = np.random.default_rng(0)
+    samples = rng.uniform(-1, 1, size=(1000, 2))
+    path = str(tmp_path / "stream.wav")
+
+    with WavWriter(path, 8000, 2, bits_per_sample) as writer:
+        for start in range(0, 1000, 300):
+            writer.write(samples[start:start + 300])
+
+    blocks = list(iter_blocks(path, 256, dtype=np.float64))
+    assert [len(block) for block in blocks] == [256, 256, 256, 232]
+    np.testing.assert_allclose(np.concatenate(blocks), samples, atol=2 / 2 ** bits_per_sample)
+    assert read_wav(path)['num_frames'] == 1000
+
+
+def test_write_wav_layouts_and_float(tmp_path):
+    samples = np.array([[0.5, -0.5], [0.25, -1.0], [1.5, 0.0]])
+    original = samples.copy()
+    path = str(tmp_path / "out.wav")
+
+    write_wav(path, samples.T, 8000, 2, 16)
+    np.testing.assert_array_equal(samples, original)
+    expected = np.clip(samples, -1, 32767 / 32768)
+    np.testing.assert_allclose(read_wav(path, dtype=np.float64)['samples'], expected, atol=1 / 32768)
+
+    write_wav(path, samples, 8000, 2, 32, audio_format=WAVE_FORMAT_IEEE_FLOAT)
+    data = read_wav(path)
+    assert data['audio_format'] == WAVE_FORMAT_IEEE_FLOAT
+    np.testing.assert_array_equal(data['samples'], samples) # float keeps the headroom past +-1
+
+    with WavWriter(path, 8000, 2, 64, WAVE_FORMAT_IEEE_FLOAT) as writer:
+        writer.write(samples * 4)
+    np.testing.assert_array_equal(read_wav(path, dtype=np.float64)['samples'], samples * 4)
+
+
+def test_pack_twos_complement():
+    assert pack([[-1, 1], [-256, 255]], 16, 2) == struct.pack('<4h', -1, 1, -256, 255)
+    assert pack([[-2], [3]], 24, 1) == b'\xfe\xff\xff\x03\x00\x00'
+
+
+def test_tpdf_dither():
+    rng = np.random.default_rng(1)
+    quiet = np.full(100000, 0.25 / 32768) # a quarter of an LSB
+    ints = np.frombuffer(encode(quiet, 16, dither='tpdf', rng=rng), dtype='<i2')
+    assert set(np.unique(ints)) <= {-1, 0, 1, 2}
+    assert abs(ints.mean() - 0.25) < 0.01
+
+
+def test_info_wav(tmp_path):
+    path = str(tmp_path / "info.wav")
+    write_wav(path, np.zeros((4800, 2)), 48000, 2, 24)
+
+    info = info_wav(path)
+    assert (info['sample_rate'], info['channels'], info['bits_per_sample']) == (48000, 2, 24)
+    assert info['num_frames'] == 4800
+    assert info['duration'] == 0.1
+    assert info['data_offset'] == 44
+    assert info['chunks'] == [('fmt ', 20, 16), ('data', 44, 4800 * 6)]
+    assert get_megabyte(path) == 4800 * 6 / (1024 * 1024)
+
+
+@pytest.mark.parametrize("audio_format, bits_per_sample", [(1, 16), (3, 32)])
+def test_writer_promotes_to_rf64(tmp_path, monkeypatch, audio_format, bits_per_sample):
+    monkeypatch.setattr(WavWriter, 'RIFF_LIMIT', 2000) # stands in for 4 GB
+    x = np.random.default_rng(0).uniform(-0.5, 0.5, (1000, 2))
+    path = str(tmp_path / "long.wav")
+
+    with WavWriter(path, 8000, 2, bits_per_sample, audio_format) as writer:
+        for start in range(0, 1000, 100):
+            writer.write(x[start:start + 100])
+        assert writer.promoted
+
+    with open(path, 'rb') as f:
+        assert f.read(4) == b'RF64' and f.read(4) == b'\xff\xff\xff\xff'
+        assert f.read(8) == b'WAVEds64'
+
+    info = info_wav(path)
+    assert info['container'] == 'RF64'
+    assert info['num_frames'] == 1000 and info['data_size'] == 1000 * bits_per_sample // 4
+    assert info['chunks'][0][0] == 'ds64'
+
+    expected = read_wav(path, dtype=np.float64)['samples']
+    np.testing.assert_allclose(expected, x, atol=1e-4)
+    np.testing.assert_array_equal(open_wav(path, dtype=np.float64)[250:750], expected[250:750])
+    np.testing.assert_array_equal(np.concatenate(list(iter_blocks(path, 300, dtype=np.float64))), expected)
+
+
+def test_writer_stays_riff_under_the_limit(tmp_path, monkeypatch):
+    path = str(tmp_path / "short.wav")
+    with WavWriter(path, 8000, 1, 16) as writer:
+        writer.write(np.zeros(100))
+    info = info_wav(path)
+    assert info['container'] == 'RIFF' and info['num_frames'] == 100
+    assert [chunk[0] for chunk in info['chunks']] == ['JUNK', 'fmt ', 'data']
+
+    monkeypatch.setattr(WavWriter, 'RIFF_LIMIT', 2000)
+    with pytest.raises(ValueError):
+        with WavWriter(path, 8000, 1, 16, rf64=False) as writer:
+            writer.write(np.zeros(1000))
+
+    write_wav(path, np.zeros((1000, 2)), 8000, 2, 16, bw64=True)
+    info = info_wav(path)
+    assert info['container'] == 'BW64' and info['num_frames'] == 1000
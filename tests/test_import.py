@@ -0,0 +1,28 @@
+import subprocess
+import sys
+
+# numpy is imported up front, the budget is for sound_wizard's own modules
+IMPORT_BUDGET_SECONDS = 0.25
+
+SCRIPT = """
+import importlib, pkgutil, sys, time
+import numpy
+import sound_wizard
+
+start = time.perf_counter()
+for module in pkgutil.walk_packages(sound_wizard.__path__, 'sound_wizard.'):
+    importlib.import_module(module.name)
+elapsed = time.perf_counter() - start
+
+heavy = sorted(name for name in ('matplotlib', 'scipy', 'soundfile') if name in sys.modules)
+sys.stderr.write(f"{elapsed} {','.join(heavy)}")
+"""
+
+
+def test_import_is_fast_and_silent():
+    result = subprocess.run([sys.executable, "-c", SCRIPT], capture_output=True, text=True, check=True)
+
+    elapsed, _, heavy = result.stderr.strip().rpartition("\n")[2].partition(" ")
+    assert result.stdout == "" # no demo code printing on import
+    assert heavy == ""
+    assert float(elapsed) < IMPORT_BUDGET_SECONDS
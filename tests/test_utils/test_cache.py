@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+import pytest
+
+from sound_wizard.formats.wav_read import get_megabyte, read_wav, write_wav
+from sound_wizard.utils.cache import CACHE
+from sound_wizard.utils.dsp import rfft, stft
+
+
+def test_memory_and_disk_tiers(tmp_path):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return np.arange(10.0)
+
+    cache = CACHE(str(tmp_path))
+    first = cache.cached('range', compute, params={'n': 10})
+    second = cache.cached('range', compute, params={'n': 10})
+    assert second is first and len(calls) == 1
+    assert not first.flags.writeable
+    assert cache.stats['misses'] == 1 and cache.stats['memory_hits'] == 1
+
+    # put() keeps its own read-only copy, the caller's array stays writeable
+    mine = np.ones(4)
+    stored = cache.put(cache.key('mine'), mine, disk=False)
+    assert mine.flags.writeable and not stored.flags.writeable
+    mine[0] = 5
+    assert cache.get(cache.key('mine'))[0] == 1
+
+    # compute() results are handed over: frozen in place (views of them too), not copied
+    fresh = np.zeros((4, 3))
+    assert cache.cached('fresh', lambda: fresh.T, disk=False).base is fresh
+    buffer = np.frombuffer(bytes(32)) # memory the cache does not own
+    assert not np.shares_memory(cache.cached('buffer', lambda: buffer, disk=False), buffer)
+
+    # a new cache over the same directory maps the file back
+    reopened = CACHE(str(tmp_path))
+    third = reopened.cached('range', compute, params={'n': 10})
+    assert isinstance(third, np.memmap) and len(calls) == 1
+    np.testing.assert_array_equal(third, first)
+    assert reopened.stats['disk_hits'] == 1 and reopened.stats['disk_bytes'] > 0
+
+
+def test_lru_eviction_by_bytes(tmp_path):
+    memory = CACHE(memory_bytes=1700) # 2 arrays of 800 bytes fit
+    for name in 'abc':
+        memory.put(memory.key(name), np.zeros(100))
+    assert memory.stats['memory_bytes'] == 1600 and memory.stats['evictions'] == 1
+    assert memory.get(memory.key('a')) is None
+
+    disk = CACHE(str(tmp_path), max_bytes=3000, memory_bytes=0) # 3 files of a bit over 800 bytes fit
+    for name in 'abc':
+        disk.put(disk.key(name), np.zeros(100))
+    disk.get(disk.key('a')) # now b is the oldest
+    disk.put(disk.key('d'), np.zeros(100))
+
+    assert disk.stats['evictions'] == 1 and disk.stats['disk_bytes'] <= 3000
+    assert disk.get(disk.key('b')) is None
+    assert disk.get(disk.key('a')) is not None
+    assert not os.path.exists(os.path.join(tmp_path, disk.key('b')[:2], disk.key('b') + ".npy"))
+
+    disk.clear()
+    assert disk.get(disk.key('a')) is None
+
+
+def test_read_wav_and_spectra(tmp_path):
+    path = str(tmp_path / "a.wav")
+    x = np.random.default_rng(0).uniform(-0.5, 0.5, (4000, 2))
+    write_wav(path, x, 8000, 2, 16)
+    cache = CACHE(str(tmp_path / "cache"))
+
+    samples = read_wav(path, cache=cache)['samples']
+    np.testing.assert_array_equal(samples, read_wav(path)['samples'])
+    assert read_wav(path, cache=cache)['samples'] is samples
+    assert read_wav(path, dtype=np.float64, cache=cache)['samples'].dtype == np.float64 # another key
+
+    spectrum = stft(samples, 256, 64, cache=cache)
+    np.testing.assert_allclose(spectrum, stft(samples, 256, 64))
+    assert stft(samples, 256, 64, cache=cache) is spectrum
+    assert stft(samples, 256, 128, cache=cache) is not spectrum
+    np.testing.assert_allclose(rfft(samples, axis=0, cache=cache), rfft(samples, axis=0))
+    assert get_megabyte(path, cache=cache) == pytest.approx(get_megabyte(path))
+
+    # another run finds both on disk, the mapped samples lead to the stored spectrum without hashing them
+    reopened = CACHE(str(tmp_path / "cache"))
+    mapped = read_wav(path, cache=reopened)['samples']
+    assert isinstance(mapped, np.memmap)
+    np.testing.assert_array_equal(stft(mapped, 256, 64, cache=reopened), spectrum)
+    assert reopened.stats['misses'] == 0
+
+    # a changed file is a different key
+    write_wav(path, x[::-1], 8000, 2, 16)
+    os.utime(path, ns=(1, 1))
+    np.testing.assert_allclose(read_wav(path, cache=cache)['samples'], samples[::-1])
+
+
+def test_hash_files_ignores_mtime(tmp_path):
+    path = str(tmp_path / "a.wav")
+    write_wav(path, np.zeros((100, 1)), 8000, 1, 16)
+    cache = CACHE(hash_files=True)
+    key = cache.file_key(path)
+    os.utime(path, ns=(1, 1))
+    assert cache.file_key(path) == key
+    assert cache.array_key(np.zeros(3)) == cache.array_key(np.zeros(3))
+    assert cache.array_key(np.zeros(3)) != cache.array_key(np.zeros(3, dtype=np.float32))
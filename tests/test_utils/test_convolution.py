@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from sound_wizard.utils.convolution import *
+
+
+def reference(x, h):
+    return np.stack([np.convolve(x[:, c], h) for c in range(x.shape[1])], axis=1)
+
+
+@pytest.mark.parametrize("method, taps", [('auto', 20), ('auto', 700), ('direct', 100), ('fft', 5)])
+def test_convolve(method, taps):
+    rng = np.random.default_rng(taps)
+    x = rng.standard_normal((3000, 2))
+    h = rng.standard_normal(taps)
+
+    np.testing.assert_allclose(convolve(x, h, method), reference(x, h), atol=1e-9)
+    np.testing.assert_allclose(convolve(x[:, 0], h, method), np.convolve(x[:, 0], h), atol=1e-9)
+
+
+def test_streaming_blocks_of_any_size():
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((4000, 2))
+    h = rng.standard_normal(500)
+
+    convolver = CONVOLVER(h, block_size=128)
+    outputs = []
+    start = 0
+    for size in [1, 60, 300, 7, 1000, 2632]:
+        block = x[start:start + size]
+        out = convolver.process(block)
+        assert out.shape == block.shape
+        outputs.append(out)
+        start += size
+    outputs.append(convolver.flush())
+
+    y = np.concatenate(outputs)[convolver.latency:]
+    np.testing.assert_allclose(y, reference(x, h), atol=1e-9)
+
+
+@pytest.mark.parametrize("method", ['direct', 'fft'])
+def test_mono_signal_stereo_kernel(method):
+    rng = np.random.default_rng(4)
+    x = rng.standard_normal(3000)
+    h = rng.standard_normal((200, 2))
+
+    expected = np.stack([np.convolve(x, h[:, c]) for c in range(2)], axis=1)
+    np.testing.assert_allclose(convolve(x, h, method), expected, atol=1e-9)
+
+    convolver = CONVOLVER(h, block_size=128)
+    y = np.concatenate([convolver.process(x[:1000]), convolver.process(x[1000:]), convolver.flush()])
+    np.testing.assert_allclose(y[convolver.latency:], expected, atol=1e-9)
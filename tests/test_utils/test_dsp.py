@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from sound_wizard.utils.dsp import *
+
+
+def test_stft_frames_match_rfft():
+    x = np.random.default_rng(0).standard_normal(4096)
+    window = WINDOW(512).hanning()
+
+    S = stft(x, 512, 128, window)
+    assert S.shape == (257, 1 + (4096 - 512) // 128)
+    np.testing.assert_allclose(S[:, 3], np.fft.rfft(x[384:896] * window), atol=1e-10)
+
+
+@pytest.mark.parametrize("frame_size, hop_size, window", [(512, 128, 'hanning'), (1000, 300, 'hamming'),
+                                                          (1024, 256, ('kaiser', 8.6))])
+def test_istft_reconstructs(frame_size, hop_size, window):
+    x = np.random.default_rng(1).standard_normal((6000, 2))
+
+    S = stft(x, frame_size, hop_size, window, center=True)
+    assert S.shape[:2] == (2, frame_size // 2 + 1)
+    np.testing.assert_allclose(istft(S, hop_size, window, center=True, length=6000), x, atol=1e-10)
+
+
+def test_istft_odd_frame_size():
+    x = np.random.default_rng(2).standard_normal(3000)
+    S = stft(x, 255, 64, center=True)
+    assert S.shape[0] == 128 # the same bins as 254
+    np.testing.assert_allclose(istft(S, 64, center=True, length=3000, frame_size=255), x, atol=1e-10)
+
+    window = WINDOW(255).hanning()
+    np.testing.assert_allclose(istft(stft(x, 255, 64, window), 64, window, length=3000)[64:2900], x[64:2900],
+                               atol=1e-10)
+    with pytest.raises(ValueError):
+        istft(S, 64, frame_size=512)
+
+
+def test_window_factory():
+    assert get_window('hanning', 1)[0] == 1.0
+    assert get_window('hanning', 64) is WINDOW(64).hanning()
+    assert not get_window('hanning', 64).flags.writeable
+
+    # periodic hanning of N is the symmetric one of N + 1 without the last point
+    np.testing.assert_allclose(get_window('hann', 64, sym=False), get_window('hanning', 65)[:64])
+    np.testing.assert_allclose(get_window(('tukey', 1.0), 32), get_window('hanning', 32))
+    np.testing.assert_allclose(get_window(('kaiser', 0.0), 16), np.ones(16))
+    assert get_window('flattop', 101, dtype=np.float32).dtype == np.float32
+    assert get_window('flattop', 101)[50] == pytest.approx(1.0, abs=1e-6)
+
+
+def test_correlation_matches_numpy():
+    rng = np.random.default_rng(3)
+    x = rng.standard_normal(1000)
+    y = rng.standard_normal(300)
+
+    np.testing.assert_allclose(auto_correlation(x), np.correlate(x, x, mode='full')[999:], atol=1e-9)
+    np.testing.assert_allclose(cross_corelation(x, y), np.correlate(x, y, mode='full')[999:], atol=1e-9)
+    frames = rng.standard_normal((4, 200))
+    np.testing.assert_allclose(auto_correlation(frames)[2], np.correlate(frames[2], frames[2], mode='full')[199:], atol=1e-9)
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from sound_wizard.utils import fft as fft_engine
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 8, 12, 100, 1024, 1000])
+def test_matches_numpy(n):
+    rng = np.random.default_rng(n)
+    x = rng.standard_normal(n) + 1j * rng.standard_normal(n)
+
+    np.testing.assert_allclose(fft_engine.fft(x), np.fft.fft(x), atol=1e-10)
+    np.testing.assert_allclose(fft_engine.ifft(x), np.fft.ifft(x), atol=1e-10)
+    np.testing.assert_allclose(fft_engine.rfft(x.real), np.fft.rfft(x.real), atol=1e-10)
+    np.testing.assert_allclose(fft_engine.irfft(np.fft.rfft(x.real), n), x.real, atol=1e-10)
+
+
+def test_padding():
+    np.testing.assert_allclose(fft_engine.fft([1, 2, 3], 8), np.fft.fft([1, 2, 3], 8), atol=1e-12)
+    np.testing.assert_allclose(fft_engine.rfft(np.arange(10.0), 6), np.fft.rfft(np.arange(10.0), 6), atol=1e-12)
+
+
+@pytest.mark.parametrize("n", [64, 100])
+def test_axis_batches(n):
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((n, 3))
+
+    np.testing.assert_allclose(fft_engine.fft(x, axis=0), np.fft.fft(x, axis=0), atol=1e-10)
+    np.testing.assert_allclose(fft_engine.rfft(x.T), np.fft.rfft(x.T), atol=1e-10)
+    np.testing.assert_allclose(fft_engine.irfft(np.fft.rfft(x, axis=0), n, axis=0), x, atol=1e-10)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from sound_wizard.utils.filters import *
+
+
+def reference(sos, x):
+    # transposed direct form II, one sample at a time
+    y = np.array(x, dtype=np.float64)
+    for b0, b1, b2, a0, a1, a2 in np.asarray(sos) / np.asarray(sos)[:, 3:4]:
+        z1 = z2 = 0.0
+        for n, value in enumerate(y):
+            out = b0 * value + z1
+            z1 = b1 * value - a1 * out + z2
+            z2 = b2 * value - a2 * out
+            y[n] = out
+    return y
+
+
+SOS = [[0.0009, 0.0018, 0.0009, 1.0, -1.9112, 0.9150], # lowpass, poles close to 1
+       [1.2, -1.5, 0.6, 1.0, -0.9, 0.5]]
+
+
+def test_sosfilt_matches_recursion():
+    x = np.random.default_rng(0).standard_normal((1000, 2))
+    np.testing.assert_allclose(sosfilt(SOS, x[:, 0]), reference(SOS, x[:, 0]), atol=1e-10)
+    np.testing.assert_allclose(sosfilt(SOS, x)[:, 1], reference(SOS, x[:, 1]), atol=1e-10)
+
+
+def test_sosfilt_streams_with_state():
+    x = np.random.default_rng(1).standard_normal((3000, 2))
+
+    state = np.zeros((2, 2, 2))
+    outputs = []
+    start = 0
+    for size in [1, 63, 64, 65, 7, 2800]:
+        y, state = sosfilt(SOS, x[start:start + size], state)
+        outputs.append(y)
+        start += size
+
+    np.testing.assert_allclose(np.concatenate(outputs), sosfilt(SOS, x), atol=1e-10)
+
+
+def test_biquad_designs():
+    db = lambda sos, freq: 20 * np.log10(np.abs(frequency_response(sos, freq, 48000)))
+
+    np.testing.assert_allclose(db(biquad('lowpass', 1000, 48000), [10, 1000]), [0, -3.0103], atol=1e-3)
+    np.testing.assert_allclose(db(biquad('highpass', 1000, 48000), [23999, 1000]), [0, -3.0103], atol=1e-3)
+    np.testing.assert_allclose(db(biquad('bandpass', 1000, 48000, q=2), 1000), 0, atol=1e-9)
+    np.testing.assert_allclose(db(biquad('peaking', 1000, 48000, q=2, gain_db=-6), [1000, 10]), [-6, 0], atol=1e-2)
+    np.testing.assert_allclose(db(biquad('lowshelf', 300, 48000, gain_db=4), [1, 300, 20000]), [4, 2, 0], atol=1e-2)
+    np.testing.assert_allclose(db(biquad('highshelf', 3000, 48000, gain_db=4), [1, 3000]), [0, 2], atol=1e-2)
+    np.testing.assert_allclose(db(biquad('allpass', 1000, 48000), [10, 1000, 9000]), 0, atol=1e-9)
+    assert db(biquad('notch', 1000, 48000), 1000) < -100
+
+    # a 4th order Butterworth highpass: -3 dB at the cutoff, 24 dB per octave below
+    sos = cascade(*(biquad('highpass', 100, 48000, q) for q in butterworth_q(4)))
+    np.testing.assert_allclose(db(sos, [100, 25]), [-3.0103, -48.2], atol=0.1)
+    assert sos.shape == (2, 6)
+
+
+def test_biquad_rejects_bad_parameters():
+    with pytest.raises(ValueError):
+        biquad('lowpass', 30000, 48000)
+    with pytest.raises(ValueError):
+        biquad('bandstop', 1000, 48000)
+    with pytest.raises(ValueError):
+        butterworth_q(3)
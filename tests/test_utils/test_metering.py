@@ -0,0 +1,56 @@
+import numpy as np
+
+from sound_wizard.formats.wav_read import write_wav
+from sound_wizard.utils.metering import *
+
+
+def test_sine_levels():
+    sample_rate = 48000
+    t = np.arange(10 * sample_rate) / sample_rate
+    x = 0.1 * np.sin(2 * np.pi * 997 * t)
+
+    meter = METER(sample_rate, 2)
+    for start in range(0, len(x), 30000):
+        meter.process(np.stack([x[start:start + 30000], 0.5 * x[start:start + 30000]], axis=1))
+    summary = meter.summary()
+
+    np.testing.assert_allclose(summary['rms_db'], [-23.0103, -29.0309], atol=1e-3)
+    np.testing.assert_allclose(summary['peak_db'], [-20, -26.0206], atol=1e-3)
+    # a 997 Hz sine at -20 dBFS in both channels reads -20 LUFS, in one channel -3 LU less
+    assert abs(summary['integrated_loudness'] - (-20 + 10 * np.log10(1.25 / 2))) < 0.05
+    assert summary['loudness_range'] < 0.1
+
+
+def test_true_peak_between_samples():
+    sample_rate = 48000
+    x = np.sin(2 * np.pi * 12000 * np.arange(3 * sample_rate) / sample_rate + np.pi / 4) # samples at +-0.707
+
+    meter = METER(sample_rate, 1)
+    meter.warmup(x[:sample_rate])
+    meter.process(x[sample_rate:2 * sample_rate])
+    meter.finish(x[2 * sample_rate:])
+    np.testing.assert_allclose(meter.peak, np.sqrt(0.5))
+    np.testing.assert_allclose(meter.true_peak, 1.0, atol=1e-3)
+
+
+def test_parts_merge_into_whole_file(tmp_path):
+    sample_rate = 16000
+    x = np.random.default_rng(0).standard_normal((12 * sample_rate, 2)) * np.linspace(0.01, 0.5, 12 * sample_rate)[:, None]
+    path = str(tmp_path / "noise.wav")
+    write_wav(path, x, sample_rate, 2, 32, audio_format=3)
+
+    whole = meter_wav(path)
+    parts = meter_file(path, part_seconds=3.33)
+    assert parts.frames == whole.frames == len(x)
+
+    np.testing.assert_allclose(parts.rms, whole.rms)
+    np.testing.assert_allclose(parts.true_peak, whole.true_peak)
+    np.testing.assert_allclose(parts.short_term_loudness(), whole.short_term_loudness(), atol=1e-9)
+    assert abs(parts.integrated_loudness() - whole.integrated_loudness()) < 1e-9
+
+
+def test_silence():
+    meter = METER(48000, 2)
+    meter.process(np.zeros((48000, 2)))
+    assert meter.integrated_loudness() == float('-inf')
+    assert meter.summary()['peak_db'].tolist() == [-100.0, -100.0]
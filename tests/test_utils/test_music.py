@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from sound_wizard.utils.music import *
+
+
+def test_note_frequencies():
+    assert NOTE('A').get_frequency() == 440.0
+    assert NOTE('C', 4).get_frequency() == 261.63
+    assert NOTE('C', 4, 50).get_frequency() == 269.29
+    assert NOTE('A').get_frequency(a4=432) == 432.0
+    assert NOTE('E', 4).get_frequency(tuning='just') == 330.0 # a just fourth below A4
+    np.testing.assert_allclose(midi_to_freq(np.arange(128)), 440 * 2 ** ((np.arange(128) - 69) / 12))
+
+
+def test_scale():
+    assert MODE('D', 'dorian').generate_scale() == ['D', 'E', 'F', 'G', 'A', 'B', 'C', 'D']
+    notes = MODE('C', 'ionian').generate_scale(showName=False)
+    assert notes[1] is NOTE('C').add_semitones(2) # plain notes are shared
+    np.testing.assert_allclose(MODE('C', 'ionian').frequencies(tuning='just') / 264, [1, 9/8, 5/4, 4/3, 3/2, 5/3, 15/8, 2])
+
+
+def test_note_is_immutable():
+    note = NOTE('A')
+    with pytest.raises(AttributeError):
+        note.octave = 5
+    assert note == NOTE('A', 4) and hash(note) == hash(NOTE('A', 4))
+    assert NOTE.from_frequency(445) == NOTE('A', 4, 19.56)
+
+
+@pytest.mark.parametrize("tuning", ['equal', 'just', 'pythagorean'])
+def test_freq_to_midi_inverts_midi_to_freq(tuning):
+    freq = np.random.default_rng(0).uniform(20, 8000, 10000)
+    np.testing.assert_allclose(midi_to_freq(freq_to_midi(freq, tuning=tuning), tuning=tuning), freq, rtol=1e-12)
+    np.testing.assert_allclose(freq_to_midi(midi_table(tuning=tuning), tuning=tuning), np.arange(128), atol=1e-9)
+
+
+def test_quantize():
+    notes, deviation = quantize([440.0, 445.0, 0.0, 261.0])
+    np.testing.assert_array_equal(notes, [69, 69, -1, 60])
+    np.testing.assert_allclose(deviation[[0, 1, 3]], [0, cents(440, 445), cents(midi_to_freq(60), 261)])
+    assert np.isnan(deviation[2])
+    assert note_names(notes).tolist() == ['A4', 'A4', '', 'C4']
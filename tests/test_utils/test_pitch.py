@@ -0,0 +1,31 @@
+import numpy as np
+
+from sound_wizard.utils.pitch import *
+
+
+def test_difference_function():
+    frames = np.random.default_rng(0).standard_normal((3, 1024))
+    window = 1024 - 400
+    expected = [[np.sum((f[:window] - f[lag:lag + window]) ** 2) for lag in range(401)] for f in frames]
+    np.testing.assert_allclose(difference_function(frames, 400), expected, atol=1e-9)
+
+
+def test_track_pitch():
+    sample_rate = 16000
+    t = np.arange(sample_rate) / sample_rate
+    tone = np.sin(2 * np.pi * 220 * t) + 0.5 * np.sin(2 * np.pi * 440 * t) + 0.3 * np.sin(2 * np.pi * 660 * t)
+    x = np.concatenate([tone, np.zeros(sample_rate // 2), 0.3 * np.sin(2 * np.pi * 445 * t)])
+
+    result = track_pitch(np.stack([x, x], axis=1), sample_rate, frame_size=1024, hop_size=256, batch=10)
+    frequency = result['frequency']
+    assert len(frequency) == len(result['time']) == 1 + len(x) // 256
+
+    np.testing.assert_allclose(frequency[4:58], 220, atol=0.05)
+    assert np.isnan(frequency[68:90]).all() and (result['midi'][68:90] == -1).all()
+    np.testing.assert_allclose(frequency[100:-4], 445, atol=0.5)
+
+    assert (result['midi'][4:58] == 57).all()
+    notes = pitch_to_notes(frequency[[10, 80, 120]])
+    assert (notes[0].name, notes[0].octave) == ('A', 3) and abs(notes[0].cent_deviation) < 0.5
+    assert notes[1] is None
+    assert (notes[2].name, notes[2].octave) == ('A', 4) and abs(notes[2].cent_deviation - 19.56) < 2
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from sound_wizard.utils.resample import *
+
+
+@pytest.mark.parametrize("orig_rate, target_rate", [(44100, 48000), (48000, 44100), (96000, 48000), (16000, 48000)])
+def test_sine_is_kept(orig_rate, target_rate):
+    t = np.arange(orig_rate // 4) / orig_rate
+    x = np.stack([np.sin(2 * np.pi * 1000 * t), 0.5 * np.cos(2 * np.pi * 3000 * t)], axis=1)
+
+    y = resample(x, orig_rate, target_rate)
+    assert y.shape == (-(-len(x) * target_rate // orig_rate), 2)
+
+    t = np.arange(len(y)) / target_rate
+    expected = np.stack([np.sin(2 * np.pi * 1000 * t), 0.5 * np.cos(2 * np.pi * 3000 * t)], axis=1)
+    np.testing.assert_allclose(y[100:-100], expected[100:-100], atol=1e-4)
+
+
+def test_aliases_are_removed():
+    t = np.arange(9600) / 96000
+    y = resample(np.sin(2 * np.pi * 30000 * t), 96000, 48000) # above the new Nyquist frequency
+    assert np.abs(y[100:-100]).max() < 1e-3
+
+
+def test_large_ratio_keeps_the_stopband():
+    # 48k -> 8k: the filter spans 6 times more input, the same band edges as 2:1
+    t = np.arange(48000) / 48000
+    passband = resample(np.sin(2 * np.pi * 3000 * t), 48000, 8000)[200:-200]
+    alias = resample(np.sin(2 * np.pi * 5000 * t), 48000, 8000)[200:-200]
+    assert abs(np.sqrt(2 * np.mean(passband ** 2)) - 1) < 1e-3
+    assert np.abs(alias).max() < 1e-4
+    assert RESAMPLER(48000, 8000).taps == 6 * 64 and RESAMPLER(8000, 48000).taps == 64
+
+
+@pytest.mark.parametrize("orig_rate, target_rate", [(44100, 48000), (96000, 44100), (48000, 8000)])
+def test_streaming_matches_resample(orig_rate, target_rate):
+    x = np.random.default_rng(0).standard_normal((10000, 2))
+
+    resampler = RESAMPLER(orig_rate, target_rate)
+    outputs = []
+    start = 0
+    for size in [1, 3, 64, 1000, 17, 8915]:
+        outputs.append(resampler.process(x[start:start + size]))
+        start += size
+    outputs.append(resampler.flush())
+
+    np.testing.assert_allclose(np.concatenate(outputs), resample(x, orig_rate, target_rate), atol=1e-12)
+    np.testing.assert_allclose(resample(x[:, 0], orig_rate, target_rate), resample(x, orig_rate, target_rate)[:, 0])
+
+
+def test_filter_bank_is_cached():
+    assert ratio(44100, 48000) == (160, 147)
+    bank = RESAMPLER(44100, 48000).bank
+    assert bank is RESAMPLER(88200, 96000).bank
+    assert bank.shape == (160, 64) and not bank.flags.writeable
+    np.testing.assert_allclose(bank.sum(), 160)